@@ -1,9 +1,8 @@
 """メダルの性格に基づくターゲット選定ロジック"""
 
-import random
 from abc import ABC, abstractmethod
 from typing import Dict, Optional, List, Tuple
-from battle.constants import TraitType, TeamType, PartType
+from battle.constants import TraitType, TeamType, PartType, RngStream
 
 class Personality(ABC):
     """性格の基底クラス"""
@@ -20,23 +19,20 @@ class Personality(ABC):
         my_team = my_comps.get('team').team_type
         target_team_type = TeamType.ENEMY if my_team == TeamType.PLAYER else TeamType.PLAYER
         
-        valid_targets = []
-        for eid, comps in world.get_entities_with_components('team', 'defeated'):
-            if comps['team'].team_type == target_team_type and not comps['defeated'].is_defeated:
-                valid_targets.append(eid)
-        return valid_targets
+        # チームの生存機体索引から取得（索引の無いWorldでは全機体を走査する）
+        roster = world.get_singleton('teamroster')
+        if roster is not None:
+            return list(roster.members.get(target_team_type, []))
+        return [eid for eid, comps in world.query('team', 'defeated')
+                if comps['team'].team_type == target_team_type and not comps['defeated'].is_defeated]
 
     def _get_random_alive_part(self, world, target_eid: int) -> Optional[str]:
         """指定したターゲット機体の、生存しているパーツからランダムに1つ返す"""
         t_comps = world.try_get_entity(target_eid)
         if not t_comps: return None
         
-        alive_parts = []
-        for pt, pid in t_comps['partlist'].parts.items():
-            if world.entities[pid]['health'].hp > 0:
-                alive_parts.append(pt)
-        
-        return random.choice(alive_parts) if alive_parts else None
+        alive_parts = t_comps['aliveparts'].alive_parts
+        return world.rng(RngStream.AI).choice(alive_parts) if alive_parts else None
 
 class RandomPersonality(Personality):
     """ランダム：各パーツが独立してランダムにターゲット（機体と部位）を選ぶ性格"""
@@ -61,7 +57,7 @@ class RandomPersonality(Personality):
 
             # 射撃系（ライフル・ガトリング）の場合のみ、事前にターゲットを固定する
             if attack_comp.trait in TraitType.SHOOTING_TRAITS:
-                target_eid = random.choice(valid_targets)
+                target_eid = world.rng(RngStream.AI).choice(valid_targets)
                 target_part = self._get_random_alive_part(world, target_eid)
                 
                 if target_part:
@@ -87,11 +83,9 @@ class WeightedHPPersonality(Personality):
         # 全敵機体の生存パーツをリストアップ: (機体ID, 部位名, HP)
         candidates = []
         for eid in valid_enemy_ids:
-            t_comps = world.try_get_entity(eid)
-            for pt, pid in t_comps['partlist'].parts.items():
-                hp = world.entities[pid]['health'].hp
-                if hp > 0:
-                    candidates.append((eid, pt, hp))
+            alive = world.try_get_entity(eid)['aliveparts']
+            for pt in alive.alive_parts:
+                candidates.append((eid, pt, alive.hp[pt]))
         
         if not candidates:
             return {pt: None for pt in [PartType.HEAD, PartType.RIGHT_ARM, PartType.LEFT_ARM]}
@@ -112,7 +106,7 @@ class WeightedHPPersonality(Personality):
                 top_n = candidates[:3]
                 weights = [0.6, 0.3, 0.1][:len(top_n)]
                 
-                choice = random.choices(top_n, weights=weights, k=1)[0]
+                choice = world.rng(RngStream.AI).choices(top_n, weights=weights, k=1)[0]
                 targets[part_type] = (choice[0], choice[1])
         
         return targets
@@ -1,8 +1,11 @@
 """コマンダーの方針に基づく行動決定ロジック"""
 
-import random
 from abc import ABC, abstractmethod
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional, List
+from battle.constants import RngStream, PartType, TraitType, MENU_PART_ORDER, PART_BITS
+from battle.matchup_table import pack_attack
+from battle.service.combat_service import CombatService
+from battle.utils import apply_part_damage, calculate_action_times, get_closest_target_by_gauge, is_target_valid
 
 class Strategy(ABC):
     """コマンダーの方針（AI）の基底クラス"""
@@ -14,24 +17,229 @@ class Strategy(ABC):
 class RandomStrategy(Strategy):
     """ランダム方針：使用可能な攻撃パーツからランダムに選択する"""
     def decide_action(self, world, entity_id: int) -> Tuple[str, Optional[str]]:
-        comps = world.entities.get(entity_id)
-        part_list = comps.get('partlist')
-        
-        available_parts = []
-        for part_type in ["head", "right_arm", "left_arm"]:
-            p_id = part_list.parts.get(part_type)
-            if p_id:
-                h = world.entities[p_id].get('health')
-                if h and h.hp > 0:
-                    available_parts.append(part_type)
+        alive_mask = world.entities.get(entity_id)['aliveparts'].alive_mask
+        available_parts = [part_type for part_type in MENU_PART_ORDER if alive_mask & PART_BITS[part_type]]
         
         if not available_parts:
             return "skip", None
             
-        return "attack", random.choice(available_parts)
+        return "attack", world.rng(RngStream.COMMANDER).choice(available_parts)
+
+class _Lookahead:
+    """1回の決定の先読み状態（残りの評価数と、攻撃前のWorldでの相手機体ごとの最善の反撃の評価）"""
+    __slots__ = ('remaining', 'used', 'opponents', 'replies')
+
+    def __init__(self, budget: Optional[int], opponents: List[int]):
+        self.remaining = budget
+        self.used = 0
+        self.opponents = opponents
+        self.replies: Dict[int, float] = {}
+
+    def spend(self, count: int, force: bool = False) -> bool:
+        """評価数を消費する（上限を超える場合は消費せず False。force なら上限を超えても消費する）"""
+        if self.remaining is not None and count > self.remaining and not force:
+            return False
+        if self.remaining is not None:
+            self.remaining = max(0, self.remaining - count)
+        self.used += count
+        return True
+
+class SearchStrategy(Strategy):
+    """
+    探索方針：自身の攻撃と相手の反撃までの2手を先読みし（expectimax）、最も評価の高いパーツを選ぶ。
+
+    1. 使用可能な各攻撃パーツについて、想定されるターゲットへの攻撃結果を期待値で評価し、
+       行動時間（チャージ＋クールダウン）あたりの評価値を求める（1手目）
+       - 射撃パーツは選定済みのターゲット（part_targets）、格闘パーツは現時点で最も近い敵の生存パーツ（等確率）を狙うとみなす
+       - 命中・防御突破・防御成功（かばう）の各分岐（CombatService.hit_branches）を相性表の確率で重み付けし、部位破壊・機能停止・リーダー撃破に加点する
+    2. 1手目の評価が高いパーツから順に、命中の各分岐をフォークしたWorld（World.fork）に仮に適用し、
+       生存している相手機体が次に取れる最善の攻撃（1手目と同じ評価）の期待値を REPLY_WEIGHT 倍して差し引く（2手目）。
+       外れた場合は攻撃前のWorldでの相手の最善の攻撃を用いる。停止などダメージ以外の効果は評価しない
+
+    1回の決定で評価する攻撃（_expected_value の呼び出し）とフォークの数を evaluation_budget で制限する（None なら制限しない）。
+    1手目は最低1パーツを評価し、次のパーツの評価で上限を超える場合はそれまでのパーツから選ぶ。
+    2手目の途中で上限に達したパーツは採用せず、2手目まで評価できたパーツから選ぶ（1つも無ければ1手目の最善）。
+    使った評価数は evaluations に残る。
+
+    乱数も実時間も使わないため、同じ状態からは実行環境の負荷によらず常に同じ決定になる。
+    """
+    # 部位破壊時の加点（頭部は機能停止）
+    BREAK_BONUS = {PartType.HEAD: 3.0, PartType.RIGHT_ARM: 1.0, PartType.LEFT_ARM: 1.0, PartType.LEGS: 1.5}
+    LEADER_BONUS = 10.0   # リーダーの頭部破壊（勝利）への加点
+    REPLY_WEIGHT = 1.0    # 相手の反撃の評価を差し引く重み
+
+    # 3対3では1回の決定の評価数の中央値が約80、最大が約350のため、評価数の多い一部の決定でのみ上限に達する値
+    # （1回の決定の時間は simulation.benchmark の search_decision_ms で確認できる）
+    DEFAULT_EVALUATION_BUDGET = 128
+
+    def __init__(self, evaluation_budget: Optional[int] = DEFAULT_EVALUATION_BUDGET):
+        self.evaluation_budget = evaluation_budget
+        self.evaluations = 0   # 直前の決定で使った評価数
+
+    def decide_action(self, world, entity_id: int) -> Tuple[str, Optional[str]]:
+        comps = world.entities.get(entity_id)
+        search = _Lookahead(self.evaluation_budget, self._opponents(world, comps['team'].team_type))
+
+        # 1手目：最低1パーツは評価し、上限を超える場合はそれまでのパーツから選ぶ
+        candidates = []
+        for part_type, p_comps, targets in self._usable_parts(world, comps):
+            if not search.spend(len(targets), force=not candidates):
+                break
+            candidates.append((self._evaluate_part(world, comps, p_comps, targets), part_type, p_comps, targets))
+
+        if not candidates:
+            self.evaluations = search.used
+            return "skip", None
+
+        # 2手目：1手目の評価が高い順に（同点ならメニュー順）、相手の反撃を差し引いて評価し直す
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        best_part, best_score = candidates[0][1], None
+        for score, part_type, p_comps, targets in candidates:
+            reply = self._expected_reply(world, comps, p_comps, targets, search)
+            if reply is None:
+                break
+            score -= self.REPLY_WEIGHT * reply
+            if best_score is None or score > best_score:
+                best_part, best_score = part_type, score
+
+        self.evaluations = search.used
+        return "attack", best_part
+
+    def _usable_parts(self, world, comps):
+        """使用可能な攻撃パーツと想定ターゲット [(部位, パーツのコンポーネント, _likely_targets の結果)]（メニュー順）"""
+        part_list = comps['partlist']
+        alive_mask = comps['aliveparts'].alive_mask
+        usable = []
+        for part_type in MENU_PART_ORDER:
+            if not alive_mask & PART_BITS[part_type]:
+                continue
+            p_comps = world.entities.get(part_list.parts[part_type])
+            if 'attack' not in p_comps:
+                continue
+            usable.append((part_type, p_comps, self._likely_targets(world, comps, part_type, p_comps['attack'])))
+        return usable
+
+    def _opponents(self, world, team_type: str) -> List[int]:
+        """相手チームの機体ID（生成順）"""
+        return [eid for eid, comps in world.query('team', 'aliveparts', 'partlist', 'gauge', 'defeated')
+                if comps['team'].team_type != team_type]
+
+    def _expected_reply(self, world, comps, p_comps, targets, search: _Lookahead) -> Optional[float]:
+        """
+        パーツで攻撃した後の、相手の最善の反撃の評価の期待値（評価数の上限に達したら None）。
+        命中の各分岐はフォークしたWorldへ仮に適用して評価し、外れた場合は攻撃前のWorldで評価する。
+        ダメージを受けた機体以外の反撃は攻撃の影響を受けないため、攻撃前のWorldでの評価を使い回す。
+        """
+        expected = 0.0
+        for prob, target_id, desired_part in targets:
+            others = self._current_reply(world, [eid for eid in search.opponents if eid != target_id], search)
+            current = self._current_reply(world, [target_id], search)
+            if others is None or current is None:
+                return None
+
+            target_comps = world.entities[target_id]
+            branches = []
+            if desired_part in target_comps['aliveparts'].alive_parts:
+                record = pack_attack(world, comps, p_comps, target_comps, desired_part)
+                branches = CombatService.hit_branches(record)
+
+            value, hit_prob = 0.0, 0.0
+            for branch_prob, part_type, damage in branches:
+                # フォーク1つを1評価と数える
+                if not search.spend(1):
+                    return None
+                forked = world.fork()
+                apply_part_damage(forked, target_id, forked.entities[target_id], part_type, damage)
+                reply = self._opponent_reply(forked, target_id, search)
+                if reply is None:
+                    return None
+                value += branch_prob * max(others, reply)
+                hit_prob += branch_prob
+
+            value += max(0.0, 1.0 - hit_prob) * max(others, current)
+            expected += prob * value
+        return expected
+
+    def _current_reply(self, world, opponent_ids: List[int], search: _Lookahead) -> Optional[float]:
+        """攻撃前のWorldでの、指定した相手機体の最善の反撃の評価（機体ごとに1回だけ評価する）"""
+        best = 0.0
+        for opponent_id in opponent_ids:
+            reply = search.replies.get(opponent_id)
+            if reply is None:
+                reply = self._opponent_reply(world, opponent_id, search)
+                if reply is None:
+                    return None
+                search.replies[opponent_id] = reply
+            best = max(best, reply)
+        return best
+
+    def _opponent_reply(self, world, opponent_id: int, search: _Lookahead) -> Optional[float]:
+        """相手機体が次に取れる最善の攻撃の、行動時間あたりの評価値（機能停止なら0、評価数の上限に達したら None）"""
+        opponent_comps = world.entities[opponent_id]
+        if opponent_comps['defeated'].is_defeated:
+            return 0.0
+
+        best = 0.0
+        for _, p_comps, targets in self._usable_parts(world, opponent_comps):
+            if not search.spend(len(targets)):
+                return None
+            best = max(best, self._evaluate_part(world, opponent_comps, p_comps, targets))
+        return best
+
+    def _evaluate_part(self, world, comps, p_comps, targets: List[Tuple[float, int, str]]) -> float:
+        """パーツを使った場合の、行動時間あたりの期待評価値（targets は _likely_targets の結果）"""
+        attack_comp = p_comps['attack']
+        value = 0.0
+        for prob, target_id, desired_part in targets:
+            value += prob * self._expected_value(world, comps, p_comps, target_id, desired_part)
+
+        charging_time, cooldown_time = calculate_action_times(attack_comp.base_attack)
+        return value / ((charging_time + cooldown_time) * attack_comp.time_modifier)
+
+    def _likely_targets(self, world, comps, part_type: str, attack_comp) -> List[Tuple[float, int, str]]:
+        """実行時に狙うと想定されるターゲットの分布 [(確率, 機体ID, 狙う部位)]"""
+        if attack_comp.trait in TraitType.MELEE_TRAITS:
+            target_id = get_closest_target_by_gauge(world, comps['team'].team_type)
+            if target_id is None:
+                return []
+            alive_parts = world.entities[target_id]['aliveparts'].alive_parts
+            return [(1.0 / len(alive_parts), target_id, pt) for pt in alive_parts]
+
+        target_data = comps['gauge'].part_targets.get(part_type)
+        if target_data and is_target_valid(world, *target_data):
+            return [(1.0, target_data[0], target_data[1])]
+        # ターゲットが無い射撃はターゲットロストになる
+        return []
+
+    def _expected_value(self, world, attacker_comps, atk_part_comps, target_id: int, desired_part: str) -> float:
+        """1体のターゲットへの攻撃の期待評価値（命中 → 防御突破／防御成功 の分岐）"""
+        target_comps = world.entities[target_id]
+        alive = target_comps['aliveparts']
+        if desired_part not in alive.alive_parts:
+            return 0.0
+
+        # 命中部位（防御成功時のかばう部位を含む）とダメージは CombatService と同じ規則で分岐させる
+        record = pack_attack(world, attacker_comps, atk_part_comps, target_comps, desired_part)
+        leader = target_comps['team'].is_leader
+        return sum(prob * self._damage_value(alive, part_type, damage, leader)
+                   for prob, part_type, damage in CombatService.hit_branches(record))
+
+    def _damage_value(self, alive, part_type: str, damage: int, leader: bool) -> float:
+        """部位へダメージを与えた結果の評価値（削ったHPの割合＋破壊時の加点）"""
+        hp = alive.hp[part_type]
+        dealt = min(damage, hp)
+        value = dealt / alive.max_hp[part_type]
+        if dealt >= hp:
+            value += self.BREAK_BONUS.get(part_type, 0.0)
+            if part_type == PartType.HEAD and leader:
+                value += self.LEADER_BONUS
+        return value
 
-def get_strategy(strategy_id: str) -> Strategy:
-    """IDに応じた方針インスタンスを返す（現在はrandomのみ）"""
-    if strategy_id == "random":
-        return RandomStrategy()
-    return RandomStrategy()
\ No newline at end of file
+def get_strategy(strategy_id: str, evaluation_budget: Optional[int] = SearchStrategy.DEFAULT_EVALUATION_BUDGET) -> Strategy:
+    """
+    IDに応じた方針インスタンスを返す（random / search、不明なIDはrandom）。
+    evaluation_budget は探索する方針での1回の決定あたりの評価数の上限（None なら無制限）。
+    """
+    if strategy_id == "search":
+        return SearchStrategy(evaluation_budget)
+    return RandomStrategy()
@@ -28,16 +28,16 @@ def calculate_break_probability(success: int, defense: int) -> float:
         return 1.0
     return success / denominator
 
-def check_is_hit(hit_prob: float) -> bool:
+def check_is_hit(hit_prob: float, rng: random.Random) -> bool:
     """命中したかどうかを判定"""
-    return random.random() < hit_prob
+    return rng.random() < hit_prob
 
-def check_attack_outcome(hit_prob: float, break_prob: float) -> tuple[bool, bool]:
+def check_attack_outcome(hit_prob: float, break_prob: float, rng: random.Random) -> tuple[bool, bool]:
     """
     攻撃の結果詳細（クリティカル、防御成功）を判定する。
     Returns: (is_critical, is_defense)
     """
-    is_break_success = (random.random() < break_prob)
+    is_break_success = (rng.random() < break_prob)
     is_defense = not is_break_success
     
     is_critical = False
@@ -44,6 +44,13 @@ class BattlePhase:
     LOG_WAIT = "log_wait"
     GAME_OVER = "game_over"
 
+class RngStream:
+    """World.rng() で使う乱数ストリーム名"""
+    AI = "ai"               # ターゲット選定
+    COMMANDER = "commander" # コマンド決定（リプレイ再生時は記録済みコマンドに置き換わるため独立させる）
+    COMBAT = "combat"       # 命中・防御判定、命中部位
+    TEAMS = "teams"         # チーム構成の生成
+
 class BattleTiming:
     """演出やフェーズ遷移のタイミング（秒）"""
     TARGET_INDICATION = 0.8
@@ -58,6 +65,14 @@ PART_LABELS = {
     PartType.LEGS: "脚部"
 }
 
+# パーツ生存状況の索引（AlivePartsComponent.alive_mask）での各部位のビット
+PART_BITS = {
+    PartType.HEAD: 1,
+    PartType.RIGHT_ARM: 2,
+    PartType.LEFT_ARM: 4,
+    PartType.LEGS: 8
+}
+
 # アクションメニューのパーツ表示順序
 MENU_PART_ORDER = [PartType.HEAD, PartType.RIGHT_ARM, PartType.LEFT_ARM]
 
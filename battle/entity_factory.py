@@ -1,22 +1,38 @@
 """エンティティ生成ファクトリ"""
 
-import random
 from core.ecs import World
 from components.common import NameComponent, PositionComponent
 from components.battle import (GaugeComponent, TeamComponent, RenderComponent,
                                BattleContextComponent, PartComponent, HealthComponent,
                                AttackComponent, PartListComponent, MedalComponent, DefeatedComponent,
-                               MobilityComponent)
-from components.battle_flow import BattleFlowComponent
+                               MobilityComponent, BattleStatsComponent, AlivePartsComponent,
+                               TeamRosterComponent, GaugePositionsComponent)
+from components.battle_flow import BattleFlowComponent, PresentationComponent, ReplayComponent
 from components.input import InputComponent
 from data.parts_data_manager import get_parts_manager
 from data.save_data_manager import get_save_manager
-from battle.constants import TEAM_SETTINGS, PartType, TeamType, GaugeStatus
+from battle.constants import TEAM_SETTINGS, PartType, TeamType, GaugeStatus, RngStream, PART_BITS
 from battle.attributes import AttributeLogic
+from battle.utils import refresh_gauge_positions
 
 class BattleEntityFactory:
     """バトルに必要なエンティティを生成するファクトリ"""
 
+    # 列指向ストレージ（NumPy配列）で保持するフィールドとdtype（タプルは取りうる値。状態のカテゴリ列）
+    COLUMN_FIELDS = {
+        'gauge': {'progress': 'float64', 'charging_time': 'float64',
+                  'cooldown_time': 'float64', 'stop_timer': 'float64',
+                  'status': (GaugeStatus.ACTION_CHOICE, GaugeStatus.CHARGING,
+                             GaugeStatus.EXECUTING, GaugeStatus.COOLDOWN)},
+        'health': {'hp': 'int64', 'display_hp': 'float64'},
+    }
+
+    @staticmethod
+    def use_column_storage(world: World) -> None:
+        """ゲージ・HPの数値・状態フィールドを列指向ストレージに切り替える（NumPyが必要）"""
+        for component_name, fields in BattleEntityFactory.COLUMN_FIELDS.items():
+            world.use_column_storage(component_name, fields)
+
     @staticmethod
     def create_medabot_from_setup(world: World, setup: dict) -> dict:
         pm = get_parts_manager()
@@ -38,7 +54,8 @@ class BattleEntityFactory:
                 world, 
                 p_type, 
                 data.get("name", p_id), 
-                stats
+                stats,
+                p_id
             )
         return parts
 
@@ -63,11 +80,25 @@ class BattleEntityFactory:
         return stats
 
     @staticmethod
-    def _create_part_entity(world: World, part_type: str, name: str, stats: dict) -> int:
+    def create_alive_parts(world: World, parts: dict) -> AlivePartsComponent:
+        """パーツエンティティのHPから、機体のパーツ生存状況の索引を作る"""
+        hp, max_hp = {}, {}
+        for p_type, p_id in parts.items():
+            health = world.entities[p_id]['health']
+            hp[p_type], max_hp[p_type] = int(health.hp), int(health.max_hp)
+
+        alive_parts = [p_type for p_type in parts if hp[p_type] > 0]
+        alive_mask = 0
+        for p_type in alive_parts:
+            alive_mask |= PART_BITS.get(p_type, 0)
+        return AlivePartsComponent(alive_mask, alive_parts, hp, max_hp)
+
+    @staticmethod
+    def _create_part_entity(world: World, part_type: str, name: str, stats: dict, part_id: str = None) -> int:
         """内部用パーツ生成ヘルパー"""
         eid = world.create_entity()
         world.add_component(eid, NameComponent(name))
-        world.add_component(eid, PartComponent(part_type, stats["attribute"]))
+        world.add_component(eid, PartComponent(part_type, stats["attribute"], part_id))
         world.add_component(eid, HealthComponent(stats["hp"], stats["hp"]))
         
         if stats["attack"] is not None:
@@ -85,54 +116,97 @@ class BattleEntityFactory:
         return eid
 
     @staticmethod
-    def create_battle_context(world: World) -> int:
+    def create_battle_context(world: World, presentation: PresentationComponent = None,
+                              replay: ReplayComponent = None) -> int:
+        world.register_singleton('battlecontext')
+        world.register_singleton('battleflow')
+        world.register_singleton('presentation')
+        world.register_singleton('battlestats')
         eid = world.create_entity()
         world.add_component(eid, BattleContextComponent())
         world.add_component(eid, BattleFlowComponent())
+        world.add_component(eid, presentation or PresentationComponent())
+        world.add_component(eid, BattleStatsComponent())
+        if replay is not None:
+            world.register_singleton('replay')
+            world.add_component(eid, replay)
         return eid
 
     @staticmethod
     def create_input_manager(world: World) -> int:
+        world.register_singleton('input')
         eid = world.create_entity()
         world.add_component(eid, InputComponent())
         return eid
 
     @staticmethod
-    def create_teams(world: World, player_count: int, enemy_count: int, px: int, ex: int, yoff: int, spacing: int, gw: int, gh: int):
-        save_mgr = get_save_manager()
+    def create_teams(world: World, player_count: int, enemy_count: int, px: int, ex: int, yoff: int, spacing: int, gw: int, gh: int,
+                     player_setups: list = None, enemy_setups: list = None):
+        """
+        両チームを生成する。編成（create_medabot_from_setup と同形式のsetupのリスト）が指定されていれば
+        それを使い、なければプレイヤーはセーブデータ、エネミーはランダム構成となる。
+        Returns: 実際に使った (player_setups, enemy_setups)
+        """
         pm = get_parts_manager()
 
         # プレイヤーチーム生成
-        for i in range(player_count):
-            setup = save_mgr.get_machine_setup(i)
+        if player_setups is None:
+            save_mgr = get_save_manager()
+            player_setups = [save_mgr.get_machine_setup(i) for i in range(player_count)]
+
+        roster = TeamRosterComponent()
+        for i, setup in enumerate(player_setups):
             BattleEntityFactory._create_team_unit(
-                world, i, setup, TeamType.PLAYER, px, yoff, spacing, gw, gh, pm
+                world, i, setup, TeamType.PLAYER, px, yoff, spacing, gw, gh, pm, roster
             )
 
         # エネミーチーム生成 (ランダム構成)
+        if enemy_setups is None:
+            enemy_setups = BattleEntityFactory.create_random_setups(enemy_count, world.rng(RngStream.TEAMS))
+
+        for i, setup in enumerate(enemy_setups):
+            BattleEntityFactory._create_team_unit(
+                world, i, setup, TeamType.ENEMY, ex, yoff, spacing, gw, gh, pm, roster
+            )
+
+        # チームの生存機体・アイコン位置の索引（ログ等と分けて専用のエンティティに持たせ、AIの部分スナップショットに含められるようにする。
+        # 機体の後に生成するため、機体のエンティティIDは索引の有無で変わらない）
+        world.register_singleton('teamroster')
+        world.register_singleton('gaugepositions')
+        index_eid = world.create_entity()
+        world.add_component(index_eid, roster)
+        world.add_component(index_eid, GaugePositionsComponent())
+        refresh_gauge_positions(world)
+
+        return player_setups, enemy_setups
+
+    @staticmethod
+    def create_random_setups(count: int, rng) -> list:
+        """ランダム構成の機体の編成（create_teams に渡せる形式）を count 体分作成"""
+        pm = get_parts_manager()
+        return [BattleEntityFactory._create_random_setup(pm, rng) for _ in range(count)]
+
+    @staticmethod
+    def _create_random_setup(pm, rng) -> dict:
+        """メダルとパーツをランダムに選んだ機体構成を作成"""
         medal_ids = pm.get_part_ids_for_type("medal")
         head_ids = pm.get_part_ids_for_type("head")
         r_arm_ids = pm.get_part_ids_for_type("right_arm")
         l_arm_ids = pm.get_part_ids_for_type("left_arm")
         legs_ids = pm.get_part_ids_for_type("legs")
 
-        for i in range(enemy_count):
-            # メダルとパーツをランダムに取得
-            setup = {
-                "parts": {
-                    "head": random.choice(head_ids) if head_ids else "head_001",
-                    "right_arm": random.choice(r_arm_ids) if r_arm_ids else "rarm_001",
-                    "left_arm": random.choice(l_arm_ids) if l_arm_ids else "larm_001",
-                    "legs": random.choice(legs_ids) if legs_ids else "legs_001",
-                },
-                "medal": random.choice(medal_ids) if medal_ids else "medal_001"
-            }
-            BattleEntityFactory._create_team_unit(
-                world, i, setup, TeamType.ENEMY, ex, yoff, spacing, gw, gh, pm
-            )
+        return {
+            "parts": {
+                "head": rng.choice(head_ids) if head_ids else "head_001",
+                "right_arm": rng.choice(r_arm_ids) if r_arm_ids else "rarm_001",
+                "left_arm": rng.choice(l_arm_ids) if l_arm_ids else "larm_001",
+                "legs": rng.choice(legs_ids) if legs_ids else "legs_001",
+            },
+            "medal": rng.choice(medal_ids) if medal_ids else "medal_001"
+        }
 
     @staticmethod
-    def _create_team_unit(world, index, setup, team_type, base_x, y_off, spacing, gw, gh, pm):
+    def _create_team_unit(world, index, setup, team_type, base_x, y_off, spacing, gw, gh, pm, roster):
         """チームの1機体を生成するヘルパーメソッド"""
         # パーツ群（実体）の生成
         parts = BattleEntityFactory.create_medabot_from_setup(world, setup)
@@ -165,4 +239,10 @@ class BattleEntityFactory:
         # パーツリストの紐付け
         plist = PartListComponent()
         plist.parts = parts
-        world.add_component(eid, plist)
\ No newline at end of file
+        world.add_component(eid, plist)
+        world.add_component(eid, BattleEntityFactory.create_alive_parts(world, parts))
+
+        # チームの生存機体索引へ登録
+        roster.members.setdefault(team_type, []).append(eid)
+        if is_leader:
+            roster.leaders[team_type] = eid
\ No newline at end of file
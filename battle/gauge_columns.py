@@ -0,0 +1,188 @@
+"""列指向ストレージ使用時のゲージの一括処理
+
+ゲージの数値・状態はNumPy配列（ColumnStore）上にあるため、機体ごとのビューを経由せず、
+生存マスクと状態の列に対する一括演算で対象を絞り込み・進行させる。
+機体ごとの後処理（待機列への追加など）は、結果が1件ずつの処理と一致するよう機体のクエリ順（生成順）で行う。
+"""
+
+from typing import Dict, List, Tuple
+from core.ecs import import_numpy
+from battle.constants import GaugeStatus, TeamType
+from battle.utils import FLOAT_MANTISSA_BITS, calculate_current_x, count_down_stop_timer, ticks_to_full
+
+# ゲージを持つ機体のクエリ（GaugeSystem と同じ）
+UNIT_QUERY = ('gauge', 'defeated', 'medal', 'partlist')
+
+class GaugeUnits:
+    """機能停止していない機体のゲージのスロット（機体のクエリ順）と、スロット順の生存マスク"""
+    __slots__ = ('eids', 'slots', 'alive', 'in_slot_order')
+
+    def __init__(self, eids: List[int], slots, alive):
+        self.eids = eids
+        self.slots = slots
+        self.alive = alive
+        # クエリ順とスロット順が一致していれば、マスクからスロット順に取り出すだけでクエリ順になる
+        self.in_slot_order = bool((slots[1:] > slots[:-1]).all())
+
+def get_gauge_units(world, store) -> GaugeUnits:
+    """
+    機能停止していない機体のゲージのスロットを取得する。
+    ストレージの挿入・削除（キャッシュの破棄）、または機能停止（生存機体の索引の減少）の発生時のみ作り直す。
+    """
+    np = import_numpy()
+    roster = world.get_singleton('teamroster')
+    live_count = sum(len(members) for members in roster.members.values()) if roster is not None else None
+    cached = store.cache.get('units')
+    if cached is not None and live_count is not None and cached[0] == live_count:
+        return cached[1]
+
+    eids, slots = [], []
+    alive = np.zeros(store.size, dtype=bool)
+    for eid, comps in world.query(*UNIT_QUERY):
+        if comps['defeated'].is_defeated: continue
+        slot = store.slots[eid]
+        eids.append(eid)
+        slots.append(slot)
+        alive[slot] = True
+
+    units = GaugeUnits(eids, np.array(slots, dtype=np.intp), alive)
+    store.cache['units'] = (live_count, units)
+    return units
+
+def _ordered_eids(store, units: GaugeUnits, mask) -> List[int]:
+    """スロット順のマスクで選ばれた機体のIDを、機体のクエリ順に並べて返す"""
+    if units.in_slot_order:
+        entity_ids = store.entity_ids
+        return [entity_ids[slot] for slot in mask.nonzero()[0].tolist()]
+    eids = units.eids
+    return [eids[i] for i in mask[units.slots].nonzero()[0].tolist()]
+
+def units_with_status(store, units: GaugeUnits, status: str) -> List[int]:
+    """指定の状態にある機体のID（機体のクエリ順）"""
+    return _ordered_eids(store, units, units.alive & (store.column('status') == store.code('status', status)))
+
+def advance_gauge_columns(store, units: GaugeUnits, dt: float) -> List[Tuple[int, bool]]:
+    """
+    GaugeSystem._advance_gauges の進行部分を一括で行う（停止中は停止時間のみ減らす）。
+    Returns: 閾値に達した機体の (機体ID, チャージ中だったか) のリスト（機体のクエリ順）
+    """
+    np = import_numpy()
+    status = store.column('status')
+    stop_timer, progress = store.column('stop_timer'), store.column('progress')
+
+    stopped = units.alive & (stop_timer > 0)
+    moving = units.alive & ~stopped
+    charging = moving & (status == store.code('status', GaugeStatus.CHARGING))
+    cooling = moving & (status == store.code('status', GaugeStatus.COOLDOWN))
+
+    np.maximum(stop_timer - dt, 0.0, out=stop_timer, where=stopped)
+    np.add(progress, dt / store.column('charging_time') * 100.0, out=progress, where=charging)
+    np.add(progress, dt / store.column('cooldown_time') * 100.0, out=progress, where=cooling)
+
+    reached = (charging | cooling) & (progress >= 100.0)
+    if not reached.any():
+        return []
+    slots = store.slots
+    return [(eid, bool(charging[slots[eid]])) for eid in _ordered_eids(store, units, reached)]
+
+def accumulate_columns(values, deltas, max_ticks):
+    """
+    battle.utils.accumulate の一括版（deltas > 0 のみ）。各要素に1tickごとに deltas を足す逐次の演算を max_ticks（配列）回行った値を、
+    2のべき乗の区間ごとに整数演算でまとめて求める（区間をまたぐtickと偶数丸めのtickのみ実際に足す）。
+    """
+    np = import_numpy()
+    values = np.array(values, dtype=np.float64)
+    remaining = np.array(max_ticks, dtype=np.int64)
+    low, high = 1 << (FLOAT_MANTISSA_BITS - 1), 1 << FLOAT_MANTISSA_BITS
+    while True:
+        active = remaining > 0
+        if not active.any():
+            return values
+
+        _, exponent = np.frexp(values)
+        ulp = np.ldexp(1.0, exponent - FLOAT_MANTISSA_BITS)
+        quotient = deltas / ulp
+        bulk = active & (values > 0) & (quotient < low) & (np.abs(quotient - np.trunc(quotient)) != 0.5)
+
+        # 結果が同じ区間に収まるtick数だけ整数演算でまとめて進め、残りがあれば区間をまたぐ1tickを実際に足す
+        units = np.where(bulk, values / ulp, 0.0).astype(np.int64)
+        step = np.where(bulk, np.rint(quotient), 1.0).astype(np.int64)
+        count = np.where(bulk, np.minimum((high - 1 - units) // np.maximum(step, 1), remaining), 0)
+        values = np.where(count > 0, np.ldexp((units + count * step).astype(np.float64), exponent - FLOAT_MANTISSA_BITS), values)
+        remaining -= count
+
+        single = remaining > 0
+        values = np.where(single, values + deltas, values)
+        remaining -= single
+
+def skip_gauge_columns(store, units: GaugeUnits, dt: float) -> None:
+    """
+    GaugeSystem._skip_to_next_event の一括版。チャージ中・クールダウン中の全ゲージの到達tick数を一括で概算し、
+    概算が最も早い機体のみ正確に数えて、最も早い到達tickの1tick手前まで accumulate_columns で一度に進める（1件ずつの演算と同じ値になる）。
+    停止時間は停止中の機体のみ1機ずつ求める（battle.utils.count_down_stop_timer）。
+    """
+    np = import_numpy()
+    status = store.column('status')
+    charging = status == store.code('status', GaugeStatus.CHARGING)
+    moving = units.alive & (charging | (status == store.code('status', GaugeStatus.COOLDOWN)))
+    slots = np.flatnonzero(moving)
+    if not slots.size: return
+
+    stop_timer = store.column('stop_timer')[slots]
+    progress = store.column('progress')[slots]
+    duration = np.where(charging[slots], store.column('charging_time')[slots], store.column('cooldown_time')[slots])
+    step = dt / duration * 100.0
+
+    stopped = np.flatnonzero(stop_timer > 0).tolist()
+    stop_ticks = np.zeros(slots.size, dtype=np.int64)
+    for i in stopped:
+        stop_ticks[i] = count_down_stop_timer(float(stop_timer[i]), dt)[1]
+
+    # 割り算による概算は丸め誤差で実際と1tickずれうるため、最も早い概算から1tick以内の機体のみ正確に数える
+    estimate = stop_ticks + np.maximum(np.ceil((100.0 - progress) / step), 1.0).astype(np.int64)
+    candidates = np.flatnonzero(estimate <= estimate.min() + 1).tolist()
+    skip = min(int(stop_ticks[i]) + ticks_to_full(float(progress[i]), float(step[i])) for i in candidates) - 1
+    if skip < 1: return
+
+    for i in stopped:
+        stop_timer[i] = count_down_stop_timer(float(stop_timer[i]), dt, skip)[0]
+    store.column('stop_timer')[slots] = stop_timer
+    store.column('progress')[slots] = accumulate_columns(progress, step, np.maximum(skip - stop_ticks, 0))
+
+def calculate_gauge_positions_columns(world, store) -> Tuple[Dict[int, float], Dict[str, List[int]]]:
+    """
+    battle.utils.calculate_gauge_positions の一括版（calculate_current_x と同じ演算）。
+    機体のホーム位置・チームはストレージの挿入・削除時のみ読み直す（バトル中に変化しない前提）。
+    """
+    np = import_numpy()
+    cached = store.cache.get('positions')
+    if cached is None:
+        eids, slots, start, target, sign, teams = [], [], [], [], [], {}
+        for eid, comps in world.query('position', 'gauge', 'team'):
+            team_type, base_x = comps['team'].team_type, comps['position'].x
+            teams.setdefault(team_type, []).append(len(eids))
+            eids.append(eid)
+            slots.append(store.slots[eid])
+            # 待機位置と実行位置（プレイヤーは右、エネミーは左へ進む）
+            start.append(calculate_current_x(base_x, GaugeStatus.ACTION_CHOICE, 0.0, team_type))
+            target.append(calculate_current_x(base_x, GaugeStatus.EXECUTING, 0.0, team_type))
+            sign.append(1.0 if team_type == TeamType.PLAYER else -1.0)
+        start, target, sign = (np.array(values, dtype=np.float64) for values in (start, target, sign))
+        cached = store.cache['positions'] = (
+            eids, np.array(slots, dtype=np.intp), start, target, sign, sign * (target - start),
+            {team_type: np.array(indices, dtype=np.intp) for team_type, indices in teams.items()}
+        )
+    eids, slots, start, target, sign, distance, teams = cached
+
+    status = store.column('status')[slots]
+    moved = sign * (store.column('progress')[slots] / 100.0 * distance)
+    x = np.where(status == store.code('status', GaugeStatus.CHARGING), start + moved,
+        np.where(status == store.code('status', GaugeStatus.COOLDOWN), target - moved,
+        np.where(status == store.code('status', GaugeStatus.EXECUTING), target, start)))
+
+    # プレイヤーはX座標が大きいほど、エネミーは小さいほど中央に近い（同じ位置なら生成順）
+    by_team = {}
+    for team_type, indices in teams.items():
+        keys = (-1.0 if team_type == TeamType.PLAYER else 1.0) * x[indices]
+        by_team[team_type] = [eids[i] for i in indices[np.argsort(keys, kind='stable')].tolist()]
+    return dict(zip(eids, x.tolist())), by_team
@@ -1,7 +1,11 @@
 """ECSアーキテクチャに基づくバトルシステム構成"""
 
 from core.ecs import World
+from components.battle_flow import PresentationComponent, ReplayComponent
+from config import AI_PARAMS, PROFILER_PARAMS
 from battle.entity_factory import BattleEntityFactory
+from battle.profiler import SystemProfiler
+from battle.replay import Replay, begin_replay_tick, end_replay_tick
 from battle.systems.gauge_system import GaugeSystem
 from battle.systems.target_selection_system import TargetSelectionSystem
 from battle.systems.turn_system import TurnSystem
@@ -13,37 +17,72 @@ from battle.systems.damage_system import DamageSystem
 from battle.systems.health_animation_system import HealthAnimationSystem
 from battle.systems.battle_status_system import BattleStatusSystem
 from battle.systems.input_system import InputSystem
-from battle.systems.render_system import RenderSystem
 from battle.systems.target_indicator_system import TargetIndicatorSystem
 from battle.systems.cutin_animation_system import CutinAnimationSystem
-from ui.field_renderer import FieldRenderer
-from ui.battle_ui_renderer import BattleUIRenderer
 
 class BattleSystem:
-    def __init__(self, screen, player_count: int = 3, enemy_count: int = 3,
+    """
+    バトルのWorldとシステム群を構築し、1フレーム分の更新を行う。
+    screen に None を渡すとヘッドレスモードとなり、描画系（Renderer / RenderSystem）を一切生成せず
+    pygameもインポートしない（大量シミュレーション用）。
+    presentation で確認待ち・演出の進め方を差し替えられる（battle.presentation 参照）。
+    time_skip=True でゲージ進行のみの区間を飛ばす（アイコン位置が飛ぶため描画なしでの使用を想定）。
+    player_setups / enemy_setups で編成を指定した場合、機体数はその長さに従う。
+    record_replay=True でリプレイを記録し（export_replay で取得）、replay を渡すとその試合を再生する
+    （シード・編成・プレゼンテーション方針・time_skip はリプレイのものが使われる）。
+    threaded_ai=True でAIの思考をワーカースレッドで行う（思考中もフレームを止めない。終了時は close を呼ぶこと）。
+    AIの決定はターン開始から ai_think_ticks 後（省略時は AI_PARAMS['THINK_TICKS']）に適用され、
+    threaded_ai の有無によらず同じシードからは同じ試合になる。
+    """
+    def __init__(self, screen=None, player_count: int = 3, enemy_count: int = 3,
                  player_team_x: int = 50, enemy_team_x: int = 450,
                  team_y_offset: int = 100, character_spacing: int = 120,
-                 gauge_width: int = 300, gauge_height: int = 40):
-        
-        self.world = World()
-        BattleEntityFactory.create_battle_context(self.world)
+                 gauge_width: int = 300, gauge_height: int = 40,
+                 column_storage: bool = False, profile: bool = False,
+                 presentation: PresentationComponent = None, time_skip: bool = False,
+                 player_setups: list = None, enemy_setups: list = None, seed: int = None,
+                 record_replay: bool = False, replay: Replay = None, threaded_ai: bool = False,
+                 ai_think_ticks: int = None):
+
+        replay_comp = None
+        if replay is not None:
+            seed, player_setups, enemy_setups = replay.seed, replay.player_setups, replay.enemy_setups
+            presentation, time_skip = replay.create_presentation(), replay.time_skip
+            replay_comp = replay.create_component()
+        elif record_replay:
+            replay_comp = ReplayComponent()
+        self.time_skip = time_skip
+
+        # seed 指定時は、チーム構成・AI・戦闘判定の乱数がすべて再現可能になる
+        self.world = World(seed)
+        if column_storage:
+            # 大規模バトル向け：ゲージ・HPをNumPy配列で保持し一括更新する
+            # （配列演算の固定コストのため、3対3程度では機体ごとの処理より遅く、1チーム30機程度から速くなる。
+            #   既定では使わない。比較は python -m simulation.benchmark の large_battle_*）
+            BattleEntityFactory.use_column_storage(self.world)
+        BattleEntityFactory.create_battle_context(self.world, presentation, replay_comp)
         BattleEntityFactory.create_input_manager(self.world)
-        BattleEntityFactory.create_teams(self.world, player_count, enemy_count,
+        self.player_setups, self.enemy_setups = BattleEntityFactory.create_teams(self.world, player_count, enemy_count,
             player_team_x, enemy_team_x, team_y_offset, character_spacing,
-            gauge_width, gauge_height
+            gauge_width, gauge_height, player_setups, enemy_setups
         )
 
-        self.field_renderer = FieldRenderer(screen)
-        self.ui_renderer = BattleUIRenderer(screen)
+        # システム別の処理時間計測（有効時のみ）
+        self.profiler = SystemProfiler(PROFILER_PARAMS['WINDOW_FRAMES'], PROFILER_PARAMS['SAMPLE_INTERVAL']) if profile else None
+
+        self.headless = screen is None
         
         # システム更新順序を整理
+        if ai_think_ticks is None:
+            ai_think_ticks = AI_PARAMS['THINK_TICKS']
+        self.ai_system = AISystem(self.world, threaded_ai, ai_think_ticks)
         self.systems = [
             InputSystem(self.world),             # 1. 入力受付 (INPUT) -> apply_action
             BattleFlowSystem(self.world),        # 2. 状態遷移管理
-            GaugeSystem(self.world),             # 3. ゲージ進行
+            GaugeSystem(self.world, time_skip),  # 3. ゲージ進行
             TargetSelectionSystem(self.world),   # 4. ターゲット選定 (IDLE時)
             TurnSystem(self.world),              # 5. ターン管理 (IDLE -> INPUT or ENEMY_TURN)
-            AISystem(self.world),                # 6. AI思考 (ENEMY_TURN) -> apply_action
+            self.ai_system,                      # 6. AI思考 (ENEMY_TURN) -> apply_action
             ActionInitiationSystem(self.world),  # 7. 行動起案
             TargetIndicatorSystem(self.world),   # 8. ターゲット演出
             CutinAnimationSystem(self.world),    # 9. カットイン演出
@@ -51,9 +90,65 @@ class BattleSystem:
             DamageSystem(self.world),            # 11. ダメージ適用
             HealthAnimationSystem(self.world),   # 12. HPバーのアニメーション
             BattleStatusSystem(self.world),      # 13. 勝敗判定
-            RenderSystem(self.world, self.field_renderer, self.ui_renderer) # 14. 描画
         ]
 
-    def update(self, dt: float = 0.016) -> None:
+        self.render_system = None
+        if not self.headless:
+            self.render_system = self._create_render_system(screen)
+            self.systems.append(self.render_system) # 14. 描画
+
+    def _create_render_system(self, screen):
+        """描画系の生成（pygameに依存するため、ヘッドレス時には呼ばれない）"""
+        from ui.field_renderer import FieldRenderer
+        from ui.battle_ui_renderer import BattleUIRenderer
+        from battle.systems.render_system import RenderSystem
+
+        self.field_renderer = FieldRenderer(screen)
+        self.ui_renderer = BattleUIRenderer(screen)
+        return RenderSystem(self.world, self.field_renderer, self.ui_renderer)
+
+    def update(self, dt: float = 0.016, render: bool = True) -> None:
+        """1tick進める。render=False の場合は描画システムを飛ばす（リプレイのシーク用）"""
+        flow = self.world.get_singleton('battleflow')
+        dt = begin_replay_tick(self.world, dt)
+
+        # 計測はサンプリング対象のフレームのみ行う（それ以外のフレームに計測のコストをかけない）
+        profiler = self.profiler if self.profiler and self.profiler.is_sampling() else None
+
+        # 各システムの構造変更は遅延させ、システムごとの同期点でまとめて適用する
+        self.world.begin_deferred()
         for system in self.systems:
-            system.update(dt)
\ No newline at end of file
+            # 現在のフェーズを対象としないシステムは呼び出さない
+            # （フェーズはtick内でも遷移するため、システムごとに判定し直す）
+            if system.phases is not None and flow.current_phase not in system.phases:
+                continue
+            if not render and system is self.render_system:
+                continue
+
+            if profiler:
+                profiler.measure(system, flow.current_phase, dt)
+            else:
+                system.update(dt)
+            self.world.flush()
+
+        if self.profiler:
+            self.profiler.end_frame()
+        self.world.end_deferred()
+        end_replay_tick(self.world)
+
+    def close(self) -> None:
+        """AIのワーカースレッドなど、バトルが保持する資源を解放する"""
+        self.ai_system.shutdown()
+
+    def export_replay(self) -> Replay:
+        """record_replay=True で記録した内容をリプレイとして取り出す"""
+        replay_comp = self.world.get_singleton('replay')
+        if replay_comp is None or replay_comp.playing:
+            raise ValueError("Replay recording is not enabled for this battle")
+
+        return Replay(
+            self.world.seed, self.player_setups, self.enemy_setups,
+            dict(vars(self.world.get_singleton('presentation'))), self.time_skip,
+            list(replay_comp.commands), list(replay_comp.confirm_ticks), list(replay_comp.dt_changes),
+            replay_comp.tick, self.world.get_singleton('battleflow').winner
+        )
@@ -0,0 +1,163 @@
+"""パーツ同士の相性表（事前計算済みの戦闘パラメータ）"""
+
+import threading
+from typing import Dict, Optional, Tuple
+from battle.constants import PartType
+from battle.attributes import AttributeLogic
+from battle.traits import TraitManager
+from battle.entity_factory import BattleEntityFactory
+from data.parts_data_manager import PartsDataManager, get_parts_manager
+from battle.calculator import (
+    calculate_hit_probability,
+    calculate_break_probability,
+    calculate_damage,
+    CRITICAL_THRESHOLD
+)
+
+class Matchup:
+    """1組の（攻撃パーツ×攻撃側メダル属性、脚部×防御側メダル属性）に対する戦闘パラメータ"""
+    __slots__ = ('hit_prob', 'break_prob', 'is_critical', 'break_damage', 'defense_damage', 'stop_duration')
+
+    def __init__(self, hit_prob: float, break_prob: float, is_critical: bool, break_damage: int,
+                 defense_damage: int, stop_duration: float):
+        self.hit_prob = hit_prob
+        self.break_prob = break_prob
+        self.is_critical = is_critical       # 防御突破時にクリティカルになるか
+        self.break_damage = break_damage     # 防御突破時（クリティカル含む）のダメージ
+        self.defense_damage = defense_damage # 防御成功時のダメージ
+        self.stop_duration = stop_duration   # 命中時の停止時間
+
+class AttackRecord:
+    """
+    1回の攻撃の判定に必要な値を詰めたもの（攻撃側×対象の Matchup と、狙う部位・対象の生存パーツ）。
+    CombatService はこれだけを受け取って判定する。
+    """
+    __slots__ = ('matchup', 'desired_part', 'alive_parts_map')
+
+    def __init__(self, matchup: Matchup, desired_part: Optional[str], alive_parts_map: Dict[str, int]):
+        self.matchup = matchup
+        self.desired_part = desired_part
+        self.alive_parts_map = alive_parts_map  # 生存パーツの部位 -> HP（機体の索引と同じ順）
+
+def build_matchup(attack: int, success: int, trait: str, atk_part_attr: str, atk_medal_attr: str,
+                  mobility: int, defense: int, tgt_medal_attr: str) -> Matchup:
+    """
+    攻撃パーツ・脚部の性能（パッシブボーナス適用後）と属性から、乱数に依存しない戦闘パラメータを計算する。
+    CombatService による戦闘の事前計算はこの結果を用いる。
+    """
+    # 属性相性補正
+    atk_bonus, def_bonus = AttributeLogic.calculate_affinity_bonus(atk_medal_attr, atk_part_attr, tgt_medal_attr)
+
+    # ステータス補正適用 (最小値クリップ含む)
+    adjusted_success = max(1, success + atk_bonus)
+    adjusted_attack = max(1, attack + atk_bonus)
+    adjusted_mobility = max(0, mobility + def_bonus)
+    adjusted_defense = max(0, defense + def_bonus)
+
+    hit_prob = calculate_hit_probability(adjusted_success, adjusted_mobility)
+    break_prob = calculate_break_probability(adjusted_success, adjusted_defense)
+    is_critical = (hit_prob + break_prob) > CRITICAL_THRESHOLD
+
+    break_damage = calculate_damage(adjusted_attack, adjusted_success, adjusted_mobility, adjusted_defense,
+                                    is_critical, False)
+    defense_damage = calculate_damage(adjusted_attack, adjusted_success, adjusted_mobility, adjusted_defense,
+                                      False, True)
+    stop_duration = TraitManager.get_behavior(trait).get_stop_duration(adjusted_success, adjusted_mobility)
+
+    return Matchup(hit_prob, break_prob, is_critical, break_damage, defense_damage, stop_duration)
+
+class MatchupTable:
+    """
+    パーツカタログの全組み合わせについて Matchup を保持する表。
+    キー: (攻撃パーツID, 攻撃側メダル属性, 脚部パーツID, 防御側メダル属性)
+    """
+
+    def __init__(self, catalog: Dict):
+        self.entries: Dict[Tuple[str, str, str, str], Matchup] = {}
+        self._build(catalog)
+
+    def get(self, attack_part_id: str, atk_medal_attr: str, legs_part_id: str, tgt_medal_attr: str) -> Optional[Matchup]:
+        return self.entries.get((attack_part_id, atk_medal_attr, legs_part_id, tgt_medal_attr))
+
+    def _build(self, catalog: Dict):
+        parts = catalog.get('parts', {})
+        attributes = list(PartsDataManager.ATTRIBUTE_LABELS.keys())
+        legs_catalog = parts.get(PartType.LEGS, {})
+
+        # 脚部はメダル属性ごとに補正後の (機動, 防御) を先に求めておく
+        legs_stats = {}
+        for legs_id, data in legs_catalog.items():
+            for medal_attr in attributes:
+                # パッシブボーナスの計算はエンティティ生成時と同じ処理を使う
+                stats = BattleEntityFactory._calculate_stats_with_bonus(data, PartType.LEGS, medal_attr)
+                legs_stats[legs_id, medal_attr] = (stats["mobility"], stats["defense"])
+
+        for part_type, part_dict in parts.items():
+            if part_type == PartType.LEGS: continue
+            for part_id, data in part_dict.items():
+                for atk_medal_attr in attributes:
+                    stats = BattleEntityFactory._calculate_stats_with_bonus(data, part_type, atk_medal_attr)
+                    if stats["attack"] is None: continue
+                    for (legs_id, tgt_medal_attr), (mobility, defense) in legs_stats.items():
+                        self.entries[part_id, atk_medal_attr, legs_id, tgt_medal_attr] = build_matchup(
+                            stats["attack"], stats["success"], stats["trait"], stats["attribute"], atk_medal_attr,
+                            mobility, defense, tgt_medal_attr
+                        )
+
+# カタログ（PartsDataManager.data）ごとに1度だけ構築する
+_matchup_table = None
+_matchup_catalog = None
+_matchup_lock = threading.Lock()  # AIのワーカースレッドと本体が同時に作らないようにする
+
+def get_matchup_table() -> MatchupTable:
+    """現在読み込まれているパーツカタログの相性表を取得（再読み込みされていれば作り直す）"""
+    global _matchup_table, _matchup_catalog
+    catalog = get_parts_manager().data
+    table = _matchup_table
+    if table is not None and _matchup_catalog is catalog:
+        return table
+    with _matchup_lock:
+        if _matchup_table is None or _matchup_catalog is not catalog:
+            # 表を作り終えてから公開する（途中の表を他のスレッドが読まないように）
+            table = MatchupTable(catalog)
+            _matchup_table, _matchup_catalog = table, catalog
+        return _matchup_table
+
+def find_matchup(world, attacker_comps: Dict, atk_part_comps: Dict, target_comps: Dict) -> Matchup:
+    """
+    攻撃側の機体・攻撃パーツと対象機体のコンポーネントから Matchup を取得する。
+    相性表から引き、カタログ外のパーツの場合はその場で計算する。
+    """
+    attack_comp = atk_part_comps['attack']
+    atk_part = atk_part_comps.get('part')
+    atk_medal = attacker_comps.get('medal')
+    tgt_medal = target_comps.get('medal')
+
+    atk_medal_attr = atk_medal.attribute if atk_medal else "undefined"
+    atk_part_attr = atk_part.attribute if atk_part else "undefined"
+    tgt_medal_attr = tgt_medal.attribute if tgt_medal else "undefined"
+
+    legs_id = target_comps['partlist'].parts.get(PartType.LEGS)
+    legs_comps = world.try_get_entity(legs_id) if legs_id is not None else None
+    legs_part = legs_comps.get('part') if legs_comps else None
+    mob_comp = legs_comps.get('mobility') if legs_comps else None
+
+    if atk_part and atk_part.part_id and legs_part and legs_part.part_id and mob_comp:
+        matchup = get_matchup_table().get(atk_part.part_id, atk_medal_attr, legs_part.part_id, tgt_medal_attr)
+        if matchup:
+            return matchup
+
+    # ターゲットの脚部性能（機動・防御）
+    mobility, defense = (mob_comp.mobility, mob_comp.defense) if mob_comp else (0, 0)
+    return build_matchup(attack_comp.attack, attack_comp.success, attack_comp.trait, atk_part_attr, atk_medal_attr,
+                         mobility, defense, tgt_medal_attr)
+
+def pack_attack(world, attacker_comps: Dict, atk_part_comps: Dict, target_comps: Dict,
+                desired_part: Optional[str]) -> AttackRecord:
+    """攻撃側の機体・攻撃パーツと対象機体のコンポーネントから AttackRecord を作る"""
+    alive = target_comps['aliveparts']
+    return AttackRecord(
+        find_matchup(world, attacker_comps, atk_part_comps, target_comps),
+        desired_part,
+        {part_type: alive.hp[part_type] for part_type in alive.alive_parts}
+    )
@@ -0,0 +1,17 @@
+"""プレゼンテーション方針（演出・確認待ちの進め方）のプリセット"""
+
+from components.battle_flow import PresentationComponent
+
+def interactive_presentation() -> PresentationComponent:
+    """通常プレイ：クリック待ち・演出時間ともに既定値"""
+    return PresentationComponent()
+
+def auto_presentation(player_strategy_id: str = "random", enemy_strategy_id: str = "random") -> PresentationComponent:
+    """自動進行：確認待ちを自動で送り、演出時間を0にし、プレイヤー側もAIが操作する"""
+    return PresentationComponent(
+        auto_confirm=True,
+        target_indication_time=0.0,
+        cutin_time=0.0,
+        player_strategy_id=player_strategy_id,
+        enemy_strategy_id=enemy_strategy_id
+    )
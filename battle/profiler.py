@@ -0,0 +1,113 @@
+"""システム別の処理時間計測（プロファイラ）"""
+
+import json
+import time
+from collections import deque
+from typing import Dict, Any, Deque
+
+# ヒストグラムのバケット上限（ミリ秒）。最後のバケットはそれ以上すべて
+HISTOGRAM_BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0]
+
+class SystemStats:
+    """1システム（またはシステム×フェーズ）分の累積統計"""
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'total_ms': self.total * 1000.0,
+            'mean_ms': self.total * 1000.0 / self.calls if self.calls else 0.0,
+            'max_ms': self.max * 1000.0,
+        }
+
+class SystemProfiler:
+    """
+    BattleSystem.update から呼ばれ、システムごとの処理時間・呼び出し回数を
+    BattlePhase別に集計する。直近 window 回分はヒストグラム用に保持する。
+    計測のコストを抑えるため、sample_interval フレームに1回だけ計測する（1なら毎フレーム）。
+    """
+    def __init__(self, window: int = 600, sample_interval: int = 1):
+        if sample_interval < 1:
+            raise ValueError("sample_interval must be at least 1")
+        self.window = window
+        self.sample_interval = sample_interval
+        self.frames = 0
+        self.sampled_frames = 0
+        self.systems: Dict[str, SystemStats] = {}
+        self.phases: Dict[str, Dict[str, SystemStats]] = {}
+        self.recent: Dict[str, Deque[float]] = {}
+
+    def is_sampling(self) -> bool:
+        """現在のフレームを計測するか"""
+        return self.frames % self.sample_interval == 0
+
+    def measure(self, system, phase: str, dt: float) -> None:
+        """システムを1回更新し、その処理時間を記録する"""
+        start = time.perf_counter()
+        system.update(dt)
+        self.record(system.__class__.__name__, phase, time.perf_counter() - start)
+
+    def record(self, name: str, phase: str, elapsed: float) -> None:
+        stats = self.systems.get(name)
+        if stats is None:
+            stats = self.systems[name] = SystemStats()
+            self.phases[name] = {}
+            self.recent[name] = deque(maxlen=self.window)
+        stats.add(elapsed)
+
+        phase_stats = self.phases[name].get(phase)
+        if phase_stats is None:
+            phase_stats = self.phases[name][phase] = SystemStats()
+        phase_stats.add(elapsed)
+
+        self.recent[name].append(elapsed)
+
+    def end_frame(self) -> None:
+        if self.is_sampling():
+            self.sampled_frames += 1
+        self.frames += 1
+
+    def histogram(self, name: str) -> Dict[str, int]:
+        """直近ウィンドウの処理時間分布（バケット上限ms -> 件数）"""
+        counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for elapsed in self.recent.get(name, ()):
+            ms = elapsed * 1000.0
+            for i, upper in enumerate(HISTOGRAM_BUCKETS_MS):
+                if ms <= upper:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+
+        labels = [f"<={upper}" for upper in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}"]
+        return dict(zip(labels, counts))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'frames': self.frames,
+            'sampled_frames': self.sampled_frames,
+            'sample_interval': self.sample_interval,
+            'window': self.window,
+            'systems': {
+                name: {
+                    **stats.to_dict(),
+                    'phases': {phase: s.to_dict() for phase, s in self.phases[name].items()},
+                    'histogram_ms': self.histogram(name),
+                }
+                for name, stats in self.systems.items()
+            }
+        }
+
+    def dump_json(self, path: str) -> None:
+        """集計結果をJSONファイルへ出力する"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,137 @@
+"""バトルのリプレイ（記録・保存・再生）
+
+リプレイはシード・編成・プレゼンテーション方針と、apply_action_command に渡された全コマンド（tick付き）、
+人間の確認操作のtick、dtの変化点だけを保持する。戦闘判定やターゲット選定はシードから再現されるため、
+1試合あたり数KBに収まる。
+"""
+
+import gzip
+import json
+from typing import Any, Dict, List, Optional
+
+from components.battle_flow import PresentationComponent, ReplayComponent
+
+REPLAY_VERSION = 1
+
+class Replay:
+    """1試合分のリプレイデータ"""
+    def __init__(self, seed: int, player_setups: List[dict], enemy_setups: List[dict],
+                 presentation: Dict[str, Any], time_skip: bool = False,
+                 commands: List[list] = None, confirm_ticks: List[int] = None, dt_changes: List[list] = None,
+                 ticks: int = 0, winner: Optional[str] = None):
+        self.seed = seed
+        self.player_setups = player_setups
+        self.enemy_setups = enemy_setups
+        self.presentation = presentation  # PresentationComponent の属性
+        self.time_skip = time_skip
+        self.commands = commands or []
+        self.confirm_ticks = confirm_ticks or []
+        self.dt_changes = dt_changes or []
+        self.ticks = ticks                # 記録終了時のtick数
+        self.winner = winner
+
+    def create_presentation(self) -> PresentationComponent:
+        return PresentationComponent(**self.presentation)
+
+    def create_component(self) -> ReplayComponent:
+        """再生用の ReplayComponent を生成する"""
+        return ReplayComponent(True, self.commands, self.confirm_ticks, self.dt_changes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': REPLAY_VERSION,
+            'seed': self.seed,
+            'player_setups': self.player_setups,
+            'enemy_setups': self.enemy_setups,
+            'presentation': self.presentation,
+            'time_skip': self.time_skip,
+            'commands': self.commands,
+            'confirm_ticks': self.confirm_ticks,
+            'dt_changes': self.dt_changes,
+            'ticks': self.ticks,
+            'winner': self.winner,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Replay':
+        if data.get('version') != REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version: {data.get('version')}")
+        return cls(
+            data['seed'], data['player_setups'], data['enemy_setups'], data['presentation'],
+            data.get('time_skip', False), data.get('commands'), data.get('confirm_ticks'),
+            data.get('dt_changes'), data.get('ticks', 0), data.get('winner')
+        )
+
+    def dumps(self) -> str:
+        """1行のコンパクトなJSON文字列にする（JSON Linesでの大量保存用）"""
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def loads(cls, text: str) -> 'Replay':
+        return cls.from_dict(json.loads(text))
+
+def open_replay_file(path: str, mode: str):
+    """リプレイファイルをテキストモードで開く（拡張子 .gz ならgzip）"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def save_replays(replays: List[Replay], path: str) -> None:
+    """リプレイをJSON Lines形式（1行1試合、拡張子 .gz ならgzip圧縮）で保存する"""
+    with open_replay_file(path, 'w') as f:
+        for replay in replays:
+            f.write(replay.dumps() + "\n")
+
+def load_replays(path: str) -> List[Replay]:
+    """save_replays で保存したファイルを読み込む"""
+    with open_replay_file(path, 'r') as f:
+        return [Replay.loads(line) for line in f if line.strip()]
+
+def begin_replay_tick(world, dt: float) -> float:
+    """
+    BattleSystem.update の先頭で呼ばれる。
+    記録時はdtの変化と確認操作を記録し、再生時は記録されたdtと確認操作を再現する。
+    Returns: このtickで使うdt
+    """
+    replay = world.get_singleton('replay')
+    if replay is None:
+        return dt
+
+    input_comp = world.get_singleton('input')
+    if replay.playing:
+        changes = replay.dt_changes
+        while replay.dt_cursor < len(changes) and changes[replay.dt_cursor][0] <= replay.tick:
+            replay.dt = changes[replay.dt_cursor][1]
+            replay.dt_cursor += 1
+        if input_comp:
+            input_comp.btn_ok = replay.tick in replay.confirm_set
+            input_comp.mouse_clicked = False
+        return replay.dt if replay.dt is not None else dt
+
+    if dt != replay.dt:
+        replay.dt_changes.append([replay.tick, dt])
+        replay.dt = dt
+    if input_comp and (input_comp.btn_ok or input_comp.mouse_clicked):
+        replay.confirm_ticks.append(replay.tick)
+    return dt
+
+def end_replay_tick(world) -> None:
+    """BattleSystem.update の末尾で呼ばれ、tickを進める"""
+    replay = world.get_singleton('replay')
+    if replay is not None:
+        replay.tick += 1
+
+def record_command(world, eid: int, action: str, part: Optional[str]) -> None:
+    """記録中であれば apply_action_command に渡されたコマンドを記録する"""
+    replay = world.get_singleton('replay')
+    if replay is not None and not replay.playing:
+        replay.commands.append([replay.tick, eid, action, part])
+
+def is_replaying(world) -> bool:
+    replay = world.get_singleton('replay')
+    return replay is not None and replay.playing
+
+def get_replayed_command(world, eid: int) -> Optional[tuple]:
+    """再生中、現在のtickにこの機体へ記録されたコマンド (action, part) を返す（無ければ None）"""
+    replay = world.get_singleton('replay')
+    return replay.command_index.get((replay.tick, eid))
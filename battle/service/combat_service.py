@@ -1,124 +1,150 @@
 """戦闘計算サービス"""
 
 import random
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Tuple
+from core.ecs import import_numpy
 from battle.constants import PartType
-from battle.attributes import AttributeLogic
-from battle.traits import TraitManager
-from battle.calculator import (
-    calculate_hit_probability,
-    calculate_break_probability,
-    check_is_hit,
-    check_attack_outcome,
-    calculate_damage
-)
+from battle.calculator import check_is_hit, check_attack_outcome
+from battle.matchup_table import AttackRecord
+from battle.vector_calculator import check_is_hit_batch, check_attack_outcome_batch
 
 class CombatService:
     """
     戦闘結果（命中、ダメージ、部位決定など）を計算するドメインサービス。
     ECSのWorldやEntityには依存せず、渡されたパラメータに基づいて計算を行う。
+    行動開始時の事前計算（ActionInitiationSystem）とAIの先読み（SearchStrategy）はいずれもここを通す。
+    コンポーネントからの AttackRecord の作成は battle.matchup_table.pack_attack で行う。
+
+    - resolve_attack: 1件ずつの判定（ライブの戦闘・リプレイ用。乱数の引き方は結果によって変わる）
+    - resolve_attacks: 多数の攻撃の一括判定（大量シミュレーション・ベンチマーク・AIの試行用。1件あたり乱数を3つずつ引く）
     """
 
     @staticmethod
-    def calculate_combat_result(
-        attacker_data: Dict[str, Any],
-        target_data: Dict[str, Any],
-        target_alive_parts_map: Dict[str, int]
-    ) -> Dict[str, Any]:
+    def resolve_attack(record: AttackRecord, rng: random.Random) -> Dict[str, Any]:
         """
-        戦闘の事前計算を行うメインメソッド。
-
-        Args:
-            attacker_data: {
-                'medal_attr': str,
-                'part_attr': str,
-                'attack_val': int,
-                'success_val': int,
-                'trait': str
-            }
-            target_data: {
-                'medal_attr': str,
-                'mobility': int,
-                'defense': int,
-                'desired_part': str (攻撃側が狙った部位)
-            }
-            target_alive_parts_map: {part_type: hp} の辞書（生存パーツのみ）
-
-        Returns:
-            Dict: ActionEventに格納する計算結果
+        1回の攻撃（AttackRecord）に乱数判定を加えて戦闘結果を確定する。
+        乱数は 命中 → 防御 → 命中部位 の順に引く。
         """
-        
-        # 1. 属性相性補正の計算
-        atk_bonus, def_bonus = AttributeLogic.calculate_affinity_bonus(
-            attacker_data['medal_attr'],
-            attacker_data['part_attr'],
-            target_data['medal_attr']
-        )
-
-        # 2. ステータス補正適用 (最小値クリップ含む)
-        adjusted_success = max(1, attacker_data['success_val'] + atk_bonus)
-        adjusted_attack = max(1, attacker_data['attack_val'] + atk_bonus)
-        
-        adjusted_mobility = max(0, target_data['mobility'] + def_bonus)
-        adjusted_defense = max(0, target_data['defense'] + def_bonus)
+        matchup = record.matchup
 
-        # 3. 命中判定
-        hit_prob = calculate_hit_probability(adjusted_success, adjusted_mobility)
-        
-        if not check_is_hit(hit_prob):
+        # 1. 命中判定
+        if not check_is_hit(matchup.hit_prob, rng):
             return CombatService._create_result_data(False, False, False, 0, None, 0.0)
 
-        # 4. 命中時の詳細計算（クリティカル・防御）
-        break_prob = calculate_break_probability(adjusted_success, adjusted_defense)
-        is_critical, is_defense = check_attack_outcome(hit_prob, break_prob)
-        
-        # 5. 命中部位の決定
-        hit_part = CombatService._determine_hit_part(
-            target_data['desired_part'],
-            is_defense,
-            target_alive_parts_map
-        )
+        # 2. 命中時の詳細計算（クリティカル・防御）
+        is_critical, is_defense = check_attack_outcome(matchup.hit_prob, matchup.break_prob, rng)
         
-        # 6. ダメージ計算
-        damage = calculate_damage(
-            adjusted_attack, adjusted_success, 
-            adjusted_mobility, adjusted_defense, 
-            is_critical, is_defense
-        )
+        # 3. 命中部位の決定
+        hit_part = CombatService._determine_hit_part(record.desired_part, is_defense, record.alive_parts_map, rng)
         
-        # 7. 特性による追加効果
-        trait_behavior = TraitManager.get_behavior(attacker_data['trait'])
-        stop_duration = trait_behavior.get_stop_duration(adjusted_success, adjusted_mobility)
+        # 4. ダメージと特性による追加効果は事前計算済み
+        damage = matchup.defense_damage if is_defense else matchup.break_damage
+
+        return CombatService._create_result_data(True, is_critical, is_defense, damage, hit_part, matchup.stop_duration)
+
+    @staticmethod
+    def resolve_attacks(records: List[AttackRecord], rng: random.Random) -> Dict[str, Any]:
+        """
+        複数の攻撃をまとめて判定する（battle.vector_calculator の配列版の判定を使う。NumPyが必要）。
+        rng からはシードを1つだけ引き、そのシードのNumPyの乱数生成器で1件あたり 命中・防御・命中部位 の
+        3つの一様乱数を結果によらず記録の順に作る。各攻撃の結果は他の攻撃の結果に左右されず、
+        同じ乱数の状態と記録からは常に同じ結果になる。
+        引き方が異なるため resolve_attack とは1件ずつは一致しないが、各結果の確率は同じ。
+
+        Returns:
+            Dict: 'is_hit', 'is_critical', 'is_defense', 'damage', 'stop_duration' の配列（記録の順）と、
+                  'hit_part' のリスト（命中しなかった攻撃は None）
+        """
+        np = import_numpy("Batch combat resolution")
+        count = len(records)
+        draws = np.random.default_rng(rng.getrandbits(64)).random((count, 3))
+        matchups = [record.matchup for record in records]
+        hit_prob = np.fromiter([m.hit_prob for m in matchups], np.float64, count)
+        break_prob = np.fromiter([m.break_prob for m in matchups], np.float64, count)
+
+        # 1. 命中判定、2. 命中時の詳細計算（クリティカル・防御）
+        is_hit = check_is_hit_batch(hit_prob, draws[:, 0])
+        is_critical, is_defense = check_attack_outcome_batch(hit_prob, break_prob, draws[:, 1])
+        is_critical &= is_hit
+        is_defense &= is_hit
+
+        # 3. 命中部位の決定（_determine_hit_part と同じ規則。狙った部位が無い場合は3つ目の乱数で選ぶ）
+        hit_part = [None] * count
+        guard_part = CombatService.guard_part
+        defended = is_defense.tolist()
+        part_draws = draws[:, 2].tolist()
+        for i in np.flatnonzero(is_hit).tolist():
+            record = records[i]
+            alive_parts_map = record.alive_parts_map
+            if not alive_parts_map:
+                hit_part[i] = PartType.HEAD
+            elif defended[i]:
+                hit_part[i] = guard_part(alive_parts_map)
+            elif record.desired_part in alive_parts_map:
+                hit_part[i] = record.desired_part
+            else:
+                parts = list(alive_parts_map)
+                hit_part[i] = parts[min(int(part_draws[i] * len(parts)), len(parts) - 1)]
+
+        # 4. ダメージと特性による追加効果は事前計算済み
+        damage = np.where(is_defense, np.fromiter([m.defense_damage for m in matchups], np.int64, count),
+                          np.fromiter([m.break_damage for m in matchups], np.int64, count))
+        return {
+            'is_hit': is_hit,
+            'is_critical': is_critical,
+            'is_defense': is_defense,
+            'damage': np.where(is_hit, damage, 0),
+            'hit_part': hit_part,
+            'stop_duration': np.where(is_hit, np.fromiter([m.stop_duration for m in matchups], np.float64, count), 0.0)
+        }
 
-        return CombatService._create_result_data(True, is_critical, is_defense, damage, hit_part, stop_duration)
+    @staticmethod
+    def hit_branches(record: AttackRecord) -> List[Tuple[float, str, int]]:
+        """
+        命中した場合の分岐 [(確率, 命中部位, ダメージ)]（外れの分岐は含まない）。
+        乱数を引かずに攻撃結果の期待値を求めるためのもの（AIの先読み用）。
+        狙った部位が破壊済みの場合の防御突破は、生存パーツへ等確率で命中する。
+        """
+        matchup = record.matchup
+        alive_parts_map = record.alive_parts_map
+        if not alive_parts_map:
+            return []
+
+        break_prob = matchup.hit_prob * matchup.break_prob
+        guard_prob = matchup.hit_prob - break_prob
+        branches = [(guard_prob, CombatService.guard_part(alive_parts_map), matchup.defense_damage)]
+        if record.desired_part in alive_parts_map:
+            branches.append((break_prob, record.desired_part, matchup.break_damage))
+        else:
+            share = break_prob / len(alive_parts_map)
+            branches.extend((share, part_type, matchup.break_damage) for part_type in alive_parts_map)
+        return branches
+
+    @staticmethod
+    def guard_part(alive_parts_map: Dict[str, int]) -> str:
+        """防御成功時にかばう部位（「頭部以外」かつ「HP最大」、同じHPなら先のもの。頭しか残っていなければ頭）"""
+        guard, guard_hp = PartType.HEAD, None
+        for part_type, hp in alive_parts_map.items():
+            if part_type != PartType.HEAD and (guard_hp is None or hp > guard_hp):
+                guard, guard_hp = part_type, hp
+        return guard
 
     @staticmethod
-    def _determine_hit_part(desired_part: str, is_defense: bool, alive_parts_map: Dict[str, int]) -> str:
+    def _determine_hit_part(desired_part: str, is_defense: bool, alive_parts_map: Dict[str, int], rng: random.Random) -> str:
         """実際に命中する部位を決定する"""
-        alive_keys = list(alive_parts_map.keys())
-        if not alive_keys:
+        if not alive_parts_map:
             # 万が一全て破壊されている場合（通常ありえないがフォールバック）
             return PartType.HEAD
 
         if is_defense:
-            # 防御成功時は「頭部以外」かつ「HP最大」のパーツがかばう
-            non_head = [p for p in alive_keys if p != PartType.HEAD]
-            if non_head:
-                # HPが高い順にソート
-                non_head.sort(key=lambda p: alive_parts_map[p], reverse=True)
-                return non_head[0]
-            # 頭しか残っていない場合は頭に当たる
-            return PartType.HEAD
-        
-        else:
-            # 防御失敗（通常命中）時
-            if desired_part and desired_part in alive_keys:
-                return desired_part
-            elif alive_keys:
-                # 狙った部位がない場合はランダム
-                return random.choice(alive_keys)
-        
-        return PartType.HEAD
+            # 防御成功時はかばう部位に当たる
+            return CombatService.guard_part(alive_parts_map)
+
+        # 防御失敗（通常命中）時
+        if desired_part and desired_part in alive_parts_map:
+            return desired_part
+        # 狙った部位がない場合はランダム
+        return rng.choice(list(alive_parts_map))
 
     @staticmethod
     def _create_result_data(is_hit, is_critical, is_defense, damage, hit_part, stop_duration):
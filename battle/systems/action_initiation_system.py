@@ -1,19 +1,11 @@
 """行動開始起案システム"""
 
-import random
 from core.ecs import System
 from components.action_event import ActionEventComponent
 from battle.utils import get_closest_target_by_gauge, reset_gauge_to_cooldown, is_target_valid
-from battle.constants import GaugeStatus, ActionType, BattlePhase, TraitType, PartType, BattleTiming
-from battle.attributes import AttributeLogic
-from battle.traits import TraitManager
-from battle.calculator import (
-    calculate_hit_probability, 
-    calculate_break_probability, 
-    check_is_hit,
-    check_attack_outcome,
-    calculate_damage
-)
+from battle.constants import GaugeStatus, ActionType, BattlePhase, TraitType, RngStream
+from battle.matchup_table import pack_attack
+from battle.service.combat_service import CombatService
 
 class ActionInitiationSystem(System):
     """
@@ -21,20 +13,21 @@ class ActionInitiationSystem(System):
     チャージ完了したエンティティに対し、ターゲットを確定し、
     **事前に戦闘計算を行って** ActionEventを生成する。
     """
+    phases = {BattlePhase.IDLE}
+
     def update(self, dt: float):
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        context = entities[0][1]['battlecontext']
-        flow = entities[0][1]['battleflow']
+        context = self.world.get_singleton('battlecontext')
+        flow = self.world.get_singleton('battleflow')
+        if not context or not flow: return
 
         # IDLEフェーズかつ待機列がある場合のみ処理
         if flow.current_phase != BattlePhase.IDLE or not context.waiting_queue:
             return
 
-        actor_eid = context.waiting_queue[0]
+        actor_eid = context.waiting_queue.first()
         actor_comps = self.world.try_get_entity(actor_eid)
         if not actor_comps:
-            context.waiting_queue.pop(0)
+            context.waiting_queue.popleft()
             return
 
         gauge = actor_comps['gauge']
@@ -74,13 +67,13 @@ class ActionInitiationSystem(System):
         # フェーズ移行
         if gauge.selected_action == ActionType.ATTACK:
             flow.current_phase = BattlePhase.TARGET_INDICATION
-            flow.phase_timer = BattleTiming.TARGET_INDICATION
+            flow.phase_timer = self.world.get_singleton('presentation').target_indication_time
         else:
             flow.current_phase = BattlePhase.EXECUTING
         
         # 待機列から削除
-        if context.waiting_queue and context.waiting_queue[0] == actor_eid:
-            context.waiting_queue.pop(0)
+        if context.waiting_queue.first() == actor_eid:
+            context.waiting_queue.popleft()
 
     def _pre_calculate_combat(self, attacker_id, target_id, target_desired_part, attacker_part_type, event):
         """戦闘結果を事前に計算し、イベントコンポーネントに保存する"""
@@ -98,107 +91,9 @@ class ActionInitiationSystem(System):
             event.calculation_result = None
             return
             
-        attack_comp = atk_part_comps['attack']
-
-        # 属性情報の取得
-        atk_medal = attacker_comps.get('medal')
-        atk_part = atk_part_comps.get('part')
-        tgt_medal = target_comps.get('medal')
-        
-        atk_medal_attr = atk_medal.attribute if atk_medal else "undefined"
-        atk_part_attr = atk_part.attribute if atk_part else "undefined"
-        tgt_medal_attr = tgt_medal.attribute if tgt_medal else "undefined"
-
-        # 相性補正の計算（Attributesロジックの使用）
-        atk_bonus, def_bonus = AttributeLogic.calculate_affinity_bonus(atk_medal_attr, atk_part_attr, tgt_medal_attr)
-
-        # ステータス補正適用 (最小値クリップ含む)
-        adjusted_success = max(1, attack_comp.success + atk_bonus)
-        adjusted_attack = max(1, attack_comp.attack + atk_bonus)
-        
-        base_mobility, base_defense = self._get_target_legs_stats(target_comps)
-        adjusted_mobility = max(0, base_mobility + def_bonus)
-        adjusted_defense = max(0, base_defense + def_bonus)
-
-        # 命中判定
-        hit_prob = calculate_hit_probability(adjusted_success, adjusted_mobility)
-        
-        if not check_is_hit(hit_prob):
-            event.calculation_result = self._create_result_data(False, False, False, 0, None, 0.0)
-        else:
-            event.calculation_result = self._calculate_hit_outcome(
-                attack_comp, adjusted_success, adjusted_attack, adjusted_mobility, adjusted_defense, 
-                hit_prob, target_comps, target_desired_part
-            )
-
-    def _calculate_hit_outcome(self, attack_comp, success, attack_power, mobility, defense, hit_prob, target_comps, target_desired_part):
-        """命中時の詳細計算（クリティカル、防御、ダメージ）を行う"""
-        break_prob = calculate_break_probability(success, defense)
-        is_critical, is_defense = check_attack_outcome(hit_prob, break_prob)
-        
-        # 命中部位の決定（防御発生時は「かばう」挙動）
-        hit_part = self._determine_hit_part(target_comps, target_desired_part, is_defense)
-        
-        # ダメージ計算 (補正後の攻撃力とステータスを使用)
-        damage = calculate_damage(attack_power, success, mobility, defense, is_critical, is_defense)
-        
-        # 特性に応じた追加効果（Traitsロジックの使用）
-        trait_behavior = TraitManager.get_behavior(attack_comp.trait)
-        stop_duration = trait_behavior.get_stop_duration(success, mobility)
-
-        return self._create_result_data(True, is_critical, is_defense, damage, hit_part, stop_duration)
-
-    def _create_result_data(self, is_hit, is_critical, is_defense, damage, hit_part, stop_duration):
-        return {
-            'is_hit': is_hit,
-            'is_critical': is_critical,
-            'is_defense': is_defense,
-            'damage': damage,
-            'hit_part': hit_part,
-            'stop_duration': stop_duration
-        }
-
-    def _get_target_legs_stats(self, target_comps):
-        """ターゲットの脚部性能（機動・防御）を取得"""
-        legs_id = target_comps['partlist'].parts.get(PartType.LEGS)
-        legs_comps = self.world.try_get_entity(legs_id) if legs_id is not None else None
-        
-        if legs_comps:
-            mob_comp = legs_comps.get('mobility')
-            if mob_comp:
-                return mob_comp.mobility, mob_comp.defense
-        return 0, 0
-
-    def _determine_hit_part(self, target_comps, desired_part, is_defense):
-        """実際に命中する部位を決定する"""
-        # 生存パーツのリストとマップ
-        alive_parts_map = {}
-        for pt, pid in target_comps['partlist'].parts.items():
-             p_comps = self.world.try_get_entity(pid)
-             if p_comps and p_comps['health'].hp > 0:
-                 alive_parts_map[pt] = pid
-                 
-        alive_keys = list(alive_parts_map.keys())
-
-        if is_defense:
-            # 防御成功時は「頭部以外」かつ「HP最大」のパーツがかばう
-            non_head = [p for p in alive_keys if p != PartType.HEAD]
-            if non_head:
-                non_head.sort(
-                    key=lambda p: self.world.entities[alive_parts_map[p]]['health'].hp, 
-                    reverse=True
-                )
-                return non_head[0]
-            return PartType.HEAD
-        
-        else:
-            # 防御失敗時は狙った部位へ
-            if desired_part and desired_part in alive_keys:
-                return desired_part
-            elif alive_keys:
-                return random.choice(alive_keys)
-        
-        return PartType.HEAD
+        # 相性補正・命中率・ダメージは相性表から引き、判定は CombatService で行う
+        record = pack_attack(self.world, attacker_comps, atk_part_comps, target_comps, target_desired_part)
+        event.calculation_result = CombatService.resolve_attack(record, self.world.rng(RngStream.COMBAT))
 
     def _handle_target_loss(self, actor_eid, actor_comps, gauge, flow, context):
         """ターゲットが見つからなかった場合の中断処理"""
@@ -208,8 +103,8 @@ class ActionInitiationSystem(System):
         
         reset_gauge_to_cooldown(gauge)
         
-        if context.waiting_queue and context.waiting_queue[0] == actor_eid:
-            context.waiting_queue.pop(0)
+        if context.waiting_queue.first() == actor_eid:
+            context.waiting_queue.popleft()
 
     def _resolve_target(self, actor_eid, actor_comps, gauge):
         """アクションタイプと武器特性に応じてターゲットを決定する"""
@@ -254,10 +149,5 @@ class ActionInitiationSystem(System):
         if not t_comps:
             return None
             
-        alive_parts = []
-        for pt, pid in t_comps['partlist'].parts.items():
-            p_comps = self.world.try_get_entity(pid)
-            if p_comps and p_comps['health'].hp > 0:
-                alive_parts.append(pt)
-                
-        return random.choice(alive_parts) if alive_parts else None
\ No newline at end of file
+        alive_parts = t_comps['aliveparts'].alive_parts
+        return self.world.rng(RngStream.COMBAT).choice(alive_parts) if alive_parts else None
\ No newline at end of file
@@ -2,7 +2,7 @@
 
 from core.ecs import System
 from components.battle import DamageEventComponent
-from battle.constants import ActionType, BattlePhase
+from battle.constants import ActionType, BattlePhase, PART_BITS
 from battle.utils import reset_gauge_to_cooldown
 
 class ActionResolutionSystem(System):
@@ -10,11 +10,12 @@ class ActionResolutionSystem(System):
     2. 行動解決システム
     事前に計算された ActionEvent の結果に基づき、DamageEventを発行する。
     """
+    phases = {BattlePhase.EXECUTING}
+
     def update(self, dt: float):
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        context = entities[0][1]['battlecontext']
-        flow = entities[0][1]['battleflow']
+        context = self.world.get_singleton('battlecontext')
+        flow = self.world.get_singleton('battleflow')
+        if not context or not flow: return
 
         if flow.current_phase != BattlePhase.EXECUTING:
             return
@@ -43,6 +44,10 @@ class ActionResolutionSystem(System):
         
         if not attacker_comps: return
 
+        stats = self.world.get_singleton('battlestats')
+        if stats:
+            stats.turn_count += 1
+
         if event.action_type == ActionType.ATTACK:
             self._handle_attack_action(event, attacker_comps, context)
             flow.current_phase = BattlePhase.CUTIN_RESULT
@@ -59,9 +64,7 @@ class ActionResolutionSystem(System):
         attacker_name = attacker_comps['medal'].nickname
         
         # 1. 自身の攻撃パーツ生存チェック
-        part_id = attacker_comps['partlist'].parts.get(event.part_type)
-        part_comps = self.world.try_get_entity(part_id) if part_id is not None else None
-        if not part_comps or part_comps['health'].hp <= 0:
+        if not attacker_comps['aliveparts'].alive_mask & PART_BITS.get(event.part_type, 0):
             context.battle_log.append(f"{attacker_name}の攻撃！ しかしパーツが破損している！")
             return
 
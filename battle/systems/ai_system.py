@@ -1,23 +1,69 @@
 """エネミー思考（AI）システム"""
 
-from core.ecs import System
-from battle.constants import BattlePhase
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+from core.ecs import System, World
+from core.snapshot import WorldSnapshot, take_snapshot, restore_snapshot
+from battle.constants import BattlePhase, RngStream
 from battle.ai.strategy import get_strategy
 from battle.utils import apply_action_command
+from battle.replay import is_replaying, get_replayed_command
+
+def decide_on_snapshot(snapshot: WorldSnapshot, strategy_id: str, eid: int) -> Tuple[str, Optional[str], tuple]:
+    """
+    スナップショットから復元した読み取り用のWorldで方針を評価する（ワーカースレッドで実行される）。
+    方針の乱数はスナップショットに含めたコマンド決定用ストリームの続きから引き、引いた後の状態も返す。
+    """
+    world = World()
+    restore_snapshot(world, snapshot)
+    action, part = get_strategy(strategy_id).decide_action(world, eid)
+    return action, part, world.rng(RngStream.COMMANDER).getstate()
 
 class AISystem(System):
     """
     エネミーのターン(ENEMY_TURN)に動作し、
     コマンダーとしての意思決定（どのパーツで攻撃するか）を行う。
+    プレゼンテーション方針でプレイヤー側の方針が指定されている場合は、INPUTフェーズでも代わりに決定する。
+
+    思考はターンの最初のtickに始め、think_ticks 後のtickで決定を適用する（ターン中はゲージが止まっているため、
+    その間に盤面は変わらない）。threaded=True の場合は、機体とパーツ（と機体の索引）のみの部分スナップショットと
+    コマンド決定用の乱数ストリームの状態をワーカースレッドへ渡して思考させ、適用するtickで結果を受け取る
+    （出ていなければそのtickで待つ）。適用するtick・盤面・乱数の引き順は同期実行と同じため、
+    結果（リプレイ）はスレッドの実行タイミングによらず同期実行と一致する。
     """
+    phases = {BattlePhase.ENEMY_TURN, BattlePhase.INPUT}
+
+    def __init__(self, world, threaded: bool = False, think_ticks: int = 0):
+        super().__init__(world)
+        if think_ticks < 0:
+            raise ValueError(f"think_ticks must be non-negative, got {think_ticks}")
+        self.think_ticks = think_ticks
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # 思考中の決定 [機体ID, 適用までの残りtick数, 決定（スレッド実行時は Future）]
+        self._thinking: Optional[list] = None
+        if threaded:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai")
+
+    def shutdown(self) -> None:
+        """ワーカースレッドを終了する（思考中の結果は破棄される）"""
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            self._thinking = None
+
     def update(self, dt: float):
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        context = entities[0][1]['battlecontext']
-        flow = entities[0][1]['battleflow']
+        context = self.world.get_singleton('battlecontext')
+        flow = self.world.get_singleton('battleflow')
+        if not context or not flow: return
 
-        # エネミー思考フェーズ以外は何もしない
-        if flow.current_phase != BattlePhase.ENEMY_TURN:
+        if flow.current_phase == BattlePhase.ENEMY_TURN:
+            # エネミー側の方針はプレゼンテーション方針で指定する
+            strategy_id = self.world.get_singleton('presentation').enemy_strategy_id
+        elif flow.current_phase == BattlePhase.INPUT:
+            # プレイヤー側のAI操作（自動進行時のみ）
+            strategy_id = self.world.get_singleton('presentation').player_strategy_id
+            if not strategy_id: return
+        else:
             return
 
         eid = context.current_turn_entity_id
@@ -25,10 +71,53 @@ class AISystem(System):
             flow.current_phase = BattlePhase.IDLE
             return
 
-        # AIロジック実行（現状はランダムのみ）
-        # 将来的にはStrategyComponent等を持たせて個別に設定可能にすると良い
-        strategy = get_strategy("random")
-        action, part = strategy.decide_action(self.world, eid)
+        # リプレイ再生中は記録されたコマンドを同じtickで適用する
+        if is_replaying(self.world):
+            command = get_replayed_command(self.world, eid)
+            if command:
+                apply_action_command(self.world, eid, *command)
+            return
+
+        command = self._think(eid, strategy_id)
+        if command is None:
+            return  # 思考中
 
         # 決定したコマンドを適用（共通処理）
-        apply_action_command(self.world, eid, action, part)
\ No newline at end of file
+        apply_action_command(self.world, eid, *command)
+
+    def _think(self, eid: int, strategy_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        """ターンの最初のtickで思考を始め、think_ticks 後のtickで (アクション名, 使用パーツ名) を返す（それまでは None）"""
+        thinking = self._thinking
+        if thinking is None or thinking[0] != eid:
+            thinking = self._thinking = [eid, self.think_ticks, self._start_decision(eid, strategy_id)]
+        if thinking[1] > 0:
+            thinking[1] -= 1
+            return None
+
+        self._thinking = None
+        decision = thinking[2]
+        if not isinstance(decision, Future):
+            return decision
+        # 未完了ならここで待ち、ワーカーが引いた後の乱数の状態を本体のストリームへ反映する
+        action, part, rng_state = decision.result()
+        self.world.rng(RngStream.COMMANDER).setstate(rng_state)
+        return action, part
+
+    def _start_decision(self, eid: int, strategy_id: str):
+        """同期実行ならその場で決定し、スレッド実行なら部分スナップショットでワーカーへ投入する"""
+        if not self.executor:
+            return get_strategy(strategy_id).decide_action(self.world, eid)
+        return self.executor.submit(decide_on_snapshot, self._take_readonly_snapshot(), strategy_id, eid)
+
+    def _take_readonly_snapshot(self) -> WorldSnapshot:
+        """方針の評価に必要な機体とそのパーツ、機体の索引、コマンド決定用の乱数ストリームのみの部分スナップショット"""
+        entity_ids = set()
+        roster_eid = self.world.get_singleton_entity('teamroster')
+        if roster_eid is not None:
+            entity_ids.add(roster_eid)
+        for eid, comps in self.world.query('gauge', 'partlist'):
+            entity_ids.add(eid)
+            entity_ids.update(comps['partlist'].parts.values())
+        snapshot = take_snapshot(self.world, entity_ids)
+        snapshot.rng_states = {RngStream.COMMANDER: self.world.rng(RngStream.COMMANDER).getstate()}
+        return snapshot
@@ -9,15 +9,13 @@ class BattleFlowSystem(System):
     バトル全体のフェーズ遷移を管理する。
     現状は主にログ待ちからIDLEへの復帰などを担当。
     """
+    phases = {BattlePhase.LOG_WAIT}
 
     def update(self, dt: float):
         # コンテキストとフローの取得
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        
-        eid, comps = entities[0]
-        context = comps['battlecontext']
-        flow = comps['battleflow']
+        context = self.world.get_singleton('battlecontext')
+        flow = self.world.get_singleton('battleflow')
+        if not context or not flow: return
         
         # ログ待ち状態でログが空になったらIDLEに戻る
         # (入力処理はInputSystemが行い、ログ送りをする。ここでは結果としての状態遷移を行う)
@@ -8,30 +8,17 @@ class BattleStatusSystem(System):
     """バトル状態管理システム（勝敗判定など）"""
     
     def update(self, dt: float = 0.016):
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        context = entities[0][1]['battlecontext']
-        flow = entities[0][1]['battleflow']
+        context = self.world.get_singleton('battlecontext')
+        flow = self.world.get_singleton('battleflow')
+        if not context or not flow: return
 
         if flow.current_phase == BattlePhase.GAME_OVER:
             return
 
-        # リーダーの生存確認
-        player_leader_alive = False
-        enemy_leader_alive = False
-
-        # 'team' と 'defeated' を持つエンティティのみを対象にする
-        for eid, comps in self.world.get_entities_with_components('team', 'defeated'):
-            team = comps['team']
-            
-            # リーダーである機体のみをチェック
-            if team.is_leader:
-                is_alive = not comps['defeated'].is_defeated
-                
-                if team.team_type == TeamType.PLAYER:
-                    player_leader_alive = is_alive
-                elif team.team_type == TeamType.ENEMY:
-                    enemy_leader_alive = is_alive
+        # リーダーの生存確認（チームの生存機体索引から判定）
+        roster = self.world.get_singleton('teamroster')
+        player_leader_alive = self._is_leader_alive(roster, TeamType.PLAYER)
+        enemy_leader_alive = self._is_leader_alive(roster, TeamType.ENEMY)
 
         # リーダーが倒れたら勝敗決定
         if not player_leader_alive:
@@ -39,4 +26,12 @@ class BattleStatusSystem(System):
             flow.current_phase = BattlePhase.GAME_OVER
         elif not enemy_leader_alive:
             flow.winner = "プレイヤー"
-            flow.current_phase = BattlePhase.GAME_OVER
\ No newline at end of file
+            flow.current_phase = BattlePhase.GAME_OVER
+
+    def _is_leader_alive(self, roster, team_type: str) -> bool:
+        if roster is None:
+            # 索引の無いWorldでは全機体からリーダーを探す
+            return any(comps['team'].is_leader and comps['team'].team_type == team_type and not comps['defeated'].is_defeated
+                       for _, comps in self.world.query('team', 'defeated'))
+        leader = roster.leaders.get(team_type)
+        return leader is not None and not self.world.entities[leader]['defeated'].is_defeated
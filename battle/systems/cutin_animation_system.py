@@ -1,7 +1,7 @@
 """カットイン演出管理システム"""
 
 from core.ecs import System
-from battle.constants import BattlePhase, BattleTiming
+from battle.constants import BattlePhase
 
 class CutinAnimationSystem(System):
     """
@@ -9,11 +9,11 @@ class CutinAnimationSystem(System):
     演出が終了したらEXECUTINGフェーズへ遷移させる。
     実際の描画はRenderSystemが行うが、ここでは「演出が進行している」状態を担保する。
     """
+    phases = {BattlePhase.CUTIN}
 
     def update(self, dt: float):
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        flow = entities[0][1]['battleflow']
+        flow = self.world.get_singleton('battleflow')
+        if not flow: return
 
         if flow.current_phase != BattlePhase.CUTIN:
             return
@@ -21,13 +21,14 @@ class CutinAnimationSystem(System):
         # タイマー更新
         flow.phase_timer -= dt
         
-        # 進行度更新
-        max_time = BattleTiming.CUTIN_ANIMATION
-        elapsed = max(0.0, max_time - flow.phase_timer)
-        flow.cutin_progress = min(1.0, elapsed / max_time)
-        
         # 時間経過で次のフェーズ（実行）へ
         if flow.phase_timer <= 0:
             flow.current_phase = BattlePhase.EXECUTING
             flow.phase_timer = 0.0
-            flow.cutin_progress = 1.0
\ No newline at end of file
+            flow.cutin_progress = 1.0
+            return
+
+        # 進行度更新（演出時間はプレゼンテーション方針に従う）
+        max_time = self.world.get_singleton('presentation').cutin_time
+        elapsed = max(0.0, max_time - flow.phase_timer)
+        flow.cutin_progress = min(1.0, elapsed / max_time)
\ No newline at end of file
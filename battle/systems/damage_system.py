@@ -1,35 +1,34 @@
 """ダメージ処理システム"""
 
 from core.ecs import System
-from battle.constants import PartType, BattlePhase, PART_LABELS
+from battle.utils import apply_part_damage
 
 class DamageSystem(System):
     """DamageEventComponentを監視し、実際のHP減算、状態異常適用、敗北判定を行う"""
 
     def update(self, dt: float):
-        entities = self.world.get_entities_with_components('battlecontext')
-        if not entities: return
-        context = entities[0][1]['battlecontext']
+        context = self.world.get_singleton('battlecontext')
+        if not context: return
+        stats = self.world.get_singleton('battlestats')
 
         # DamageEventComponentを持つターゲットを探す
-        for target_id, comps in self.world.get_entities_with_components('damageevent', 'partlist', 'defeated', 'gauge'):
+        for target_id, comps in self.world.query('damageevent', 'partlist', 'defeated', 'gauge', 'aliveparts', 'team'):
             event = comps['damageevent']
             
-            # 対象パーツのHPを削る
-            part_id = comps['partlist'].parts.get(event.target_part)
-            if part_id:
-                health = self.world.entities[part_id]['health']
-                health.hp = max(0, health.hp - event.damage)
-                
-                # カットイン演出でダメージとHP減少が表示されるためログ追加は削除
+            # 対象パーツのHPを削り、生存パーツ索引・停止・機能停止を反映する
+            # カットイン演出でダメージとHP減少が表示されるためログ追加は削除
+            dealt = apply_part_damage(self.world, target_id, comps, event.target_part, event.damage, event.stop_duration)
+            if dealt is not None and stats:
+                self._record_damage(stats, event, dealt)
 
-                # 状態異常：停止の適用
-                if event.stop_duration > 0:
-                    comps['gauge'].stop_timer = max(comps['gauge'].stop_timer, event.stop_duration)
+            # 処理が終わったらイベントを削除
+            self.world.remove_component(target_id, 'damageevent')
 
-                # 頭部破壊なら機能停止
-                if event.target_part == PartType.HEAD and health.hp <= 0:
-                    comps['defeated'].is_defeated = True
+    def _record_damage(self, stats, event, dealt: int):
+        """攻撃パーツごとの与ダメージ（実際に減ったHP）を集計する"""
+        attacker_comps = self.world.try_get_entity(event.attacker_id)
+        if not attacker_comps: return
 
-            # 処理が終わったらイベントを削除
-            self.world.remove_component(target_id, 'damageevent')
\ No newline at end of file
+        part_id = attacker_comps['partlist'].parts.get(event.attacker_part)
+        if part_id is not None:
+            stats.damage_dealt[part_id] = stats.damage_dealt.get(part_id, 0) + dealt
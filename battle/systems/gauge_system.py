@@ -1,58 +1,122 @@
 """ATBゲージ更新システム"""
 
+import math
 from core.ecs import System
 from battle.constants import GaugeStatus, BattlePhase, ActionType
-from battle.utils import interrupt_gauge_return_home, is_target_valid
+from battle.utils import (interrupt_gauge_return_home, is_target_valid, refresh_gauge_positions,
+                          accumulate, ticks_to_full, count_down_stop_timer)
+from battle.gauge_columns import get_gauge_units, units_with_status, advance_gauge_columns, skip_gauge_columns
 
 class GaugeSystem(System):
-    """ATBゲージの進行管理、およびチャージ中のアクション有効性監視を担当"""
+    """
+    ATBゲージの進行管理、およびチャージ中のアクション有効性監視を担当。
+    time_skip=True の場合、何も起きない区間を飛ばし、次のチャージ完了・クールダウン完了の直前まで
+    ゲージを一度に進める（到達tickは計算で求める。ヘッドレスの大量シミュレーション用）。
+    ゲージが動いたtick（進行・割り込み）のみ、アイコン位置の索引（GaugePositionsComponent）を1回作り直す。
+    列指向ストレージ使用時は、機体ごとのビューを読まずに状態・生存マスクの一括演算で処理する（battle.gauge_columns）。
+    """
+    phases = {BattlePhase.IDLE}
+
+    def __init__(self, world, time_skip: bool = False):
+        super().__init__(world)
+        self.time_skip = time_skip
+
     def update(self, dt: float):
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        context = entities[0][1]['battlecontext']
-        flow = entities[0][1]['battleflow']
+        context = self.world.get_singleton('battlecontext')
+        flow = self.world.get_singleton('battleflow')
+        if not context or not flow: return
 
         if flow.current_phase != BattlePhase.IDLE:
             return
 
-        gauge_entities = self.world.get_entities_with_components('gauge', 'defeated', 'medal', 'partlist')
+        store = self.world.get_column_store('gauge')
+        if store is not None:
+            moved = self._update_gauge_columns(store, dt, context, flow)
+        else:
+            gauge_entities = self.world.get_entities_with_components('gauge', 'defeated', 'medal', 'partlist')
+            moved = self._update_gauges(gauge_entities, dt, context, flow)
+
+        # 5. アイコン位置の索引を更新（最寄りの敵の検索・描画で使う）
+        # 待機列の処理待ちでゲージが止まっていたtickは作り直さない（他のシステムによる状態の切り替えではアイコン位置は変わらない）
+        if moved:
+            refresh_gauge_positions(self.world)
 
+    def _update_gauges(self, gauge_entities, dt, context, flow) -> bool:
+        """割り込みの確認、待機列の更新、ゲージ進行を行う。Returns: ゲージが動いた（止まっていなかった）か"""
         # 1. チャージ中の割り込みチェック
         for eid, comps in gauge_entities:
             if comps['defeated'].is_defeated: continue
-            if comps['gauge'].status == GaugeStatus.CHARGING:
-                self._check_interruption(eid, comps, comps['gauge'], context, flow)
+            gauge = comps['gauge']
+            if gauge.status == GaugeStatus.CHARGING:
+                message = self._interruption_message(self.world, eid, comps['medal'].nickname, gauge)
+                if message:
+                    self._interrupt(eid, gauge, context, flow, message)
 
         if flow.current_phase == BattlePhase.LOG_WAIT:
-            return
+            return True
 
         # 2. 待機列（ACTION_CHOICE / CHARGE完了）の機体を確認・更新
         self._update_waiting_queue(gauge_entities, context)
 
         # 3. 処理待ちがいる場合はゲージ停止（ウェイト式）
         if context.waiting_queue:
-            return
+            return False
 
         # 4. ゲージ進行処理
+        if self.time_skip:
+            self._skip_to_next_event(gauge_entities, dt)
         self._advance_gauges(gauge_entities, dt, context)
+        return True
 
-    def _check_interruption(self, eid, comps, gauge, context, flow):
-        """チャージ中の継続条件をチェックし、満たさない場合は中断させる"""
-        actor_name = comps['medal'].nickname
-        
+    def _update_gauge_columns(self, store, dt, context, flow) -> bool:
+        """_update_gauges と同じ処理を、列指向ストレージ上の一括演算で行う（機体ごとの後処理はクエリ順）"""
+        units = get_gauge_units(self.world, store)
+
+        # 1. チャージ中の割り込みチェック
+        # （予約・ターゲットは列以外のフィールドのため、ビューを介さず元のコンポーネントから読む）
+        for eid in units_with_status(store, units, GaugeStatus.CHARGING):
+            comps = self.world.entities[eid]
+            message = self._interruption_message(self.world, eid, comps['medal'].nickname, store.component(eid))
+            if message:
+                self._interrupt(eid, comps['gauge'], context, flow, message)
+
+        if flow.current_phase == BattlePhase.LOG_WAIT:
+            return True
+
+        # 2. 待機列（ACTION_CHOICE / CHARGE完了）の機体を確認・更新
+        for eid in units_with_status(store, units, GaugeStatus.ACTION_CHOICE):
+            context.waiting_queue.append(eid)
+
+        # 3. 処理待ちがいる場合はゲージ停止（ウェイト式）
+        if context.waiting_queue:
+            return False
+
+        # 4. ゲージ進行処理と、閾値に達した機体の後処理
+        if self.time_skip:
+            skip_gauge_columns(store, units, dt)
+        for eid, was_charging in advance_gauge_columns(store, units, dt):
+            gauge = self.world.entities[eid]['gauge']
+            if was_charging:
+                self._complete_charging(eid, gauge, context)
+            else:
+                self._complete_cooldown(eid, gauge, context)
+        return True
+
+    @staticmethod
+    def _interruption_message(world, eid, actor_name, gauge):
+        """チャージ中の継続条件をチェックし、満たさない場合は中断のメッセージを返す（継続できる場合はNone）"""
         # 1. 自身の予約パーツが破壊されたか
         if gauge.selected_action == ActionType.ATTACK and gauge.selected_part:
-            if not is_target_valid(self.world, eid, gauge.selected_part):
-                self._interrupt(eid, gauge, context, flow, f"{actor_name}の予約パーツは破壊された！")
-                return
+            if not is_target_valid(world, eid, gauge.selected_part):
+                return f"{actor_name}の予約パーツは破壊された！"
 
         # 2. ターゲットがロストしたか（事前ターゲットの場合のみ）
         target_data = gauge.part_targets.get(gauge.selected_part)
         if target_data:
             target_id, target_part_type = target_data
-            if not is_target_valid(self.world, target_id, target_part_type):
-                self._interrupt(eid, gauge, context, flow, f"{actor_name}はターゲットロストした！")
-                return
+            if not is_target_valid(world, target_id, target_part_type):
+                return f"{actor_name}はターゲットロストした！"
+        return None
 
     def _interrupt(self, eid, gauge, context, flow, message):
         """アクションを中断し、その地点からホームへ戻る"""
@@ -61,16 +125,14 @@ class GaugeSystem(System):
         
         interrupt_gauge_return_home(gauge)
         
-        if eid in context.waiting_queue:
-            context.waiting_queue.remove(eid)
+        context.waiting_queue.discard(eid)
 
     def _update_waiting_queue(self, gauge_entities, context):
         for eid, comps in gauge_entities:
             if comps['defeated'].is_defeated: continue
             # 行動選択待ち状態ならキューへ
             if comps['gauge'].status == GaugeStatus.ACTION_CHOICE:
-                if eid not in context.waiting_queue:
-                    context.waiting_queue.append(eid)
+                context.waiting_queue.append(eid)
 
     def _advance_gauges(self, gauge_entities, dt, context):
         for eid, comps in gauge_entities:
@@ -88,18 +150,53 @@ class GaugeSystem(System):
             elif gauge.status == GaugeStatus.COOLDOWN:
                 self._process_cooldown(eid, gauge, dt, context)
 
+    def _skip_to_next_event(self, gauge_entities, dt):
+        """
+        各ゲージが閾値に達するtick数（停止の残りtick数＋進行に必要なtick数）を計算で求め、
+        最も早い到達tickの1tick手前まで全ゲージを一度に進める（battle.utils.accumulate で固定ステップと同じ値になる）。
+        到達tick自体は通常のゲージ進行で処理するため、待機列への追加順も固定ステップと一致する。
+        待機列が空のIDLE中は他システムの状態が変化しないため、この区間の省略は結果に影響しない。
+        """
+        gauges = [comps['gauge'] for eid, comps in gauge_entities
+                  if not comps['defeated'].is_defeated
+                  and comps['gauge'].status in (GaugeStatus.CHARGING, GaugeStatus.COOLDOWN)]
+        if not gauges: return
+
+        plans = []
+        for gauge in gauges:
+            duration = gauge.charging_time if gauge.status == GaugeStatus.CHARGING else gauge.cooldown_time
+            step = dt / duration * 100.0
+            _, stop_ticks = count_down_stop_timer(gauge.stop_timer, dt)
+            plans.append((gauge, step, stop_ticks, stop_ticks + max(1, math.ceil((100.0 - gauge.progress) / step))))
+
+        # 割り算による概算は丸め誤差で実際と1tickずれうるため、最も早い概算から1tick以内の機体のみ正確に数える
+        first = min(estimate for _, _, _, estimate in plans)
+        skip = min(stop_ticks + ticks_to_full(gauge.progress, step)
+                   for gauge, step, stop_ticks, estimate in plans if estimate <= first + 1) - 1
+        if skip < 1: return
+
+        for gauge, step, stop_ticks, _ in plans:
+            if stop_ticks:
+                gauge.stop_timer, _ = count_down_stop_timer(gauge.stop_timer, dt, skip)
+            if skip > stop_ticks:
+                gauge.progress, _ = accumulate(gauge.progress, step, skip - stop_ticks)
+
     def _process_charging(self, eid, gauge, dt, context):
         gauge.progress += dt / gauge.charging_time * 100.0
         if gauge.progress >= 100.0:
-            gauge.progress = 100.0
-            if eid not in context.waiting_queue:
-                context.waiting_queue.append(eid)
+            self._complete_charging(eid, gauge, context)
 
     def _process_cooldown(self, eid, gauge, dt, context):
         gauge.progress += dt / gauge.cooldown_time * 100.0
         if gauge.progress >= 100.0:
-            gauge.progress = 0.0
-            gauge.status = GaugeStatus.ACTION_CHOICE
-            gauge.part_targets = {} 
-            if eid not in context.waiting_queue:
-                context.waiting_queue.append(eid)
\ No newline at end of file
+            self._complete_cooldown(eid, gauge, context)
+
+    def _complete_charging(self, eid, gauge, context):
+        gauge.progress = 100.0
+        context.waiting_queue.append(eid)
+
+    def _complete_cooldown(self, eid, gauge, context):
+        gauge.progress = 0.0
+        gauge.status = GaugeStatus.ACTION_CHOICE
+        gauge.part_targets = {} 
+        context.waiting_queue.append(eid)
\ No newline at end of file
@@ -7,10 +7,20 @@ class HealthAnimationSystem(System):
     HealthComponentのhp（真値）とdisplay_hp（描画用）を同期させる。
     ダメージを受けた際、表示上のHPを少しずつ減らすアニメーションを行う。
     """
+    # 変化の速さ（残りの差分に対する1秒あたりの割合）
+    LERP_SPEED = 5.0
+    # 変化量がこれ未満になったら真値に揃える
+    SNAP_THRESHOLD = 0.1
+
     def update(self, dt: float):
+        store = self.world.get_column_store('health')
+        if store is not None:
+            self._update_columns(store, dt)
+            return
+
         # バトルシーン内の全HPコンポーネントを対象とする
         # (Medabot機体そのものではなく、各パーツエンティティがHealthを持っている)
-        for eid, comps in self.world.get_entities_with_components('health'):
+        for eid, comps in self.world.query('health'):
             h = comps['health']
             
             if h.display_hp != h.hp:
@@ -19,11 +29,18 @@ class HealthAnimationSystem(System):
                 
                 # 変化の速さ（1秒間に最大どれだけHPを動かすか、または割合で動かす）
                 # ここでは「残りの差分の一定割合」を動かすことで、減り始めが速く、徐々にゆっくりになる演出にする
-                lerp_speed = 5.0
-                change = diff * lerp_speed * dt
+                change = diff * self.LERP_SPEED * dt
                 
                 # 変化が非常に小さい場合は直接代入して終了させる
-                if abs(change) < 0.1:
+                if abs(change) < self.SNAP_THRESHOLD:
                     h.display_hp = float(h.hp)
                 else:
-                    h.display_hp += change
\ No newline at end of file
+                    h.display_hp += change
+
+    def _update_columns(self, store, dt: float):
+        """列指向ストレージ上の全HPを一括で補間する（1件ずつの処理と同じ結果）"""
+        hp, display_hp = store.column('hp'), store.column('display_hp')
+        change = (hp - display_hp) * self.LERP_SPEED * dt
+        snap = abs(change) < self.SNAP_THRESHOLD
+        display_hp += change
+        display_hp[snap] = hp[snap]
\ No newline at end of file
@@ -2,61 +2,66 @@
 
 from core.ecs import System
 from battle.utils import calculate_action_menu_layout, apply_action_command
-from battle.constants import BattlePhase, ActionType, MENU_PART_ORDER, BattleTiming
+from battle.replay import is_replaying, get_replayed_command
+from battle.constants import BattlePhase, ActionType, MENU_PART_ORDER, PART_BITS
 
 class InputSystem(System):
     """ユーザー入力を処理し、バトルフローに応じた操作を行う"""
+    phases = {BattlePhase.INPUT, BattlePhase.LOG_WAIT, BattlePhase.ATTACK_DECLARATION, BattlePhase.CUTIN_RESULT}
+
     
     def update(self, dt: float):
-        inputs = self.world.get_entities_with_components('input')
-        if not inputs: return
-        input_comp = inputs[0][1]['input']
+        input_comp = self.world.get_singleton('input')
+        if not input_comp: return
 
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        context = entities[0][1]['battlecontext']
-        flow = entities[0][1]['battleflow']
+        context = self.world.get_singleton('battlecontext')
+        flow = self.world.get_singleton('battleflow')
+        if not context or not flow: return
+        presentation = self.world.get_singleton('presentation')
 
         if flow.current_phase == BattlePhase.GAME_OVER:
             return
 
+        # 確認操作（自動進行時は常に確認済みとみなす）
+        confirmed = input_comp.mouse_clicked or input_comp.btn_ok or presentation.auto_confirm
+
         if flow.current_phase == BattlePhase.LOG_WAIT:
-            self._handle_log_wait(input_comp, context)
+            self._handle_log_wait(confirmed, context)
             return
 
         if flow.current_phase == BattlePhase.ATTACK_DECLARATION:
-            self._handle_attack_declaration_wait(input_comp, context, flow)
+            self._handle_attack_declaration_wait(confirmed, context, flow, presentation)
             return
 
         if flow.current_phase == BattlePhase.CUTIN_RESULT:
-            self._handle_cutin_result(input_comp, context, flow)
+            self._handle_cutin_result(confirmed, context, flow)
             return
 
         if flow.current_phase == BattlePhase.INPUT:
-            self._handle_action_selection(context, flow, input_comp)
+            self._handle_action_selection(context, flow, input_comp, presentation)
 
-    def _handle_log_wait(self, input_comp, context):
-        if input_comp.mouse_clicked or input_comp.btn_ok:
+    def _handle_log_wait(self, confirmed, context):
+        if confirmed:
             if context.pending_logs:
                 context.battle_log.clear()
                 context.battle_log.append(context.pending_logs.pop(0))
             else:
                 context.battle_log.clear()
 
-    def _handle_attack_declaration_wait(self, input_comp, context, flow):
+    def _handle_attack_declaration_wait(self, confirmed, context, flow, presentation):
         """攻撃宣言メッセージの確認待ち"""
-        if input_comp.mouse_clicked or input_comp.btn_ok:
+        if confirmed:
             context.battle_log.clear()
             flow.current_phase = BattlePhase.CUTIN
-            flow.phase_timer = BattleTiming.CUTIN_ANIMATION
+            flow.phase_timer = presentation.cutin_time
 
-    def _handle_cutin_result(self, input_comp, context, flow):
+    def _handle_cutin_result(self, confirmed, context, flow):
         """カットイン後の結果ログ送り"""
         # 自動送りなどが無い場合、手動送り
         if not context.battle_log and context.pending_logs:
              context.battle_log.append(context.pending_logs.pop(0))
 
-        if input_comp.mouse_clicked or input_comp.btn_ok:
+        if confirmed:
             if context.pending_logs:
                 context.battle_log.clear()
                 context.battle_log.append(context.pending_logs.pop(0))
@@ -69,12 +74,22 @@ class InputSystem(System):
                     self.world.delete_entity(flow.processing_event_id)
                     flow.processing_event_id = None
 
-    def _handle_action_selection(self, context, flow, input_comp):
+    def _handle_action_selection(self, context, flow, input_comp, presentation):
         eid = context.current_turn_entity_id
         if eid is None or eid not in self.world.entities:
             flow.current_phase = BattlePhase.IDLE
             return
 
+        # リプレイ再生中は記録されたコマンドを同じtickで適用する
+        # （プレイヤー側をAIが操作していた場合は、記録時と同じく後段の AISystem が適用する）
+        if is_replaying(self.world):
+            if presentation.player_strategy_id:
+                return
+            command = get_replayed_command(self.world, eid)
+            if command:
+                apply_action_command(self.world, eid, *command)
+            return
+
         menu_items_count = len(MENU_PART_ORDER) + 1
         self._process_menu_navigation(input_comp, context, menu_items_count)
 
@@ -95,15 +110,14 @@ class InputSystem(System):
                 context.selected_menu_index = i
 
     def _confirm_action(self, eid, context):
-        part_list = self.world.entities[eid]['partlist']
+        alive_mask = self.world.entities[eid]['aliveparts'].alive_mask
         action, part = None, None
         idx = context.selected_menu_index
         
         if idx < len(MENU_PART_ORDER):
             p_type = MENU_PART_ORDER[idx]
-            p_id = part_list.parts.get(p_type)
             # 生存チェック
-            if p_id and self.world.entities[p_id]['health'].hp > 0:
+            if alive_mask & PART_BITS[p_type]:
                 action, part = ActionType.ATTACK, p_type
         else:
             action = ActionType.SKIP
@@ -3,8 +3,8 @@
 import pygame
 from core.ecs import System
 from config import GAME_PARAMS, COLORS
-from battle.utils import calculate_current_x
-from battle.constants import PartType, GaugeStatus, BattlePhase, TeamType, PART_LABELS, MENU_PART_ORDER
+from battle.constants import PartType, GaugeStatus, BattlePhase, TeamType, PART_LABELS, MENU_PART_ORDER, PART_BITS
+from battle.utils import calculate_gauge_positions
 from ui.cutin_renderer import CutinRenderer
 
 class RenderSystem(System):
@@ -19,9 +19,9 @@ class RenderSystem(System):
         self.hp_bar_order = [PartType.HEAD, PartType.RIGHT_ARM, PartType.LEFT_ARM, PartType.LEGS]
 
     def update(self, dt: float):
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        context, flow = entities[0][1]['battlecontext'], entities[0][1]['battleflow']
+        context = self.world.get_singleton('battlecontext')
+        flow = self.world.get_singleton('battleflow')
+        if not context or not flow: return
 
         self.field_renderer.clear()
         self.field_renderer.draw_field_guides()
@@ -44,11 +44,13 @@ class RenderSystem(System):
 
     def _render_characters(self, context, flow):
         char_positions = {}
-        for eid, comps in self.world.get_entities_with_components('render', 'position', 'gauge', 'partlist', 'team', 'medal'):
+        index = self.world.get_singleton('gaugepositions')
+        icon_positions = index.icon_x if index is not None else calculate_gauge_positions(self.world)[0]
+        for eid, comps in self.world.query('render', 'position', 'gauge', 'partlist', 'team', 'medal', 'aliveparts'):
             pos, gauge, team, medal = comps['position'], comps['gauge'], comps['team'], comps['medal']
             
-            # アイコンの現在位置計算 (Utils)
-            icon_x = calculate_current_x(pos.x, gauge.status, gauge.progress, team.team_type)
+            # アイコンの現在位置（GaugeSystem が更新した索引から取得）
+            icon_x = icon_positions[eid]
             char_positions[eid] = {'x': pos.x, 'y': pos.y, 'icon_x': icon_x}
             
             # ホーム位置と本体
@@ -56,25 +58,18 @@ class RenderSystem(System):
             border = self._get_border_color(eid, gauge, context, flow)
             
             # パーツごとの生存状況
-            part_status = self._get_part_status_map(comps['partlist'])
+            part_status = self._get_part_status_map(comps['aliveparts'])
             self.field_renderer.draw_character_icon(icon_x, pos.y, team.team_color, part_status, border)
             
             self.field_renderer.draw_text(medal.nickname, (pos.x - 20, pos.y - 25), font_type='medium')
 
         return char_positions
 
-    def _get_part_status_map(self, part_list_comp):
+    def _get_part_status_map(self, alive_parts_comp):
         """各パーツが生存しているかどうかのマップを作成"""
-        status = {}
-        for p_type in [PartType.HEAD, PartType.RIGHT_ARM, PartType.LEFT_ARM, PartType.LEGS]:
-            p_id = part_list_comp.parts.get(p_type)
-            is_alive = False
-            if p_id:
-                hp = self.world.entities[p_id]['health'].hp
-                if hp > 0:
-                    is_alive = True
-            status[p_type] = is_alive
-        return status
+        mask = alive_parts_comp.alive_mask
+        return {p_type: bool(mask & PART_BITS[p_type])
+                for p_type in [PartType.HEAD, PartType.RIGHT_ARM, PartType.LEFT_ARM, PartType.LEGS]}
 
     def _get_border_color(self, eid, gauge, context, flow):
         if eid == flow.active_actor_id or eid in context.waiting_queue or gauge.status == GaugeStatus.ACTION_CHOICE:
@@ -160,8 +155,9 @@ class RenderSystem(System):
             eid = context.current_turn_entity_id
             if eid:
                 comps = self.world.entities[eid]
-                buttons = [{'label': self.world.entities[p_id]['name'].name, 'enabled': self.world.entities[p_id]['health'].hp > 0} 
-                           for p_id in [comps['partlist'].parts.get(k) for k in MENU_PART_ORDER] if p_id]
+                alive_mask = comps['aliveparts'].alive_mask
+                buttons = [{'label': self.world.entities[p_id]['name'].name, 'enabled': bool(alive_mask & PART_BITS[k])}
+                           for k, p_id in [(k, comps['partlist'].parts.get(k)) for k in MENU_PART_ORDER] if p_id]
                 buttons.append({'label': "スキップ", 'enabled': True})
                 self.ui_renderer.draw_action_menu(comps['medal'].nickname, buttons, context.selected_menu_index)
         
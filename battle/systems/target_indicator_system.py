@@ -8,12 +8,12 @@ class TargetIndicatorSystem(System):
     TARGET_INDICATIONフェーズの時間管理を行う。
     演出終了後、ATTACK_DECLARATIONフェーズへ遷移し、攻撃宣言メッセージを発行する。
     """
+    phases = {BattlePhase.TARGET_INDICATION}
 
     def update(self, dt: float):
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        context = entities[0][1]['battlecontext']
-        flow = entities[0][1]['battleflow']
+        context = self.world.get_singleton('battlecontext')
+        flow = self.world.get_singleton('battleflow')
+        if not context or not flow: return
 
         if flow.current_phase != BattlePhase.TARGET_INDICATION:
             return
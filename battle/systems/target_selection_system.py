@@ -4,24 +4,32 @@ from core.ecs import System
 from battle.ai.personality import get_personality
 from components.battle_flow import BattleFlowComponent
 from battle.constants import BattlePhase, GaugeStatus
+from battle.gauge_columns import get_gauge_units, units_with_status
 
 class TargetSelectionSystem(System):
     """性格に基づき、各パーツの攻撃対象を事前に決定する"""
+    phases = {BattlePhase.IDLE}
 
     def update(self, dt: float):
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        flow = entities[0][1]['battleflow']
+        flow = self.world.get_singleton('battleflow')
+        if not flow: return
 
         # IDLE状態のときのみターゲット選定更新を行う（演出中などに変更されないように）
         if flow.current_phase != BattlePhase.IDLE:
             return
 
         # 行動選択待ち（ACTION_CHOICE）状態かつ、まだターゲットが決まっていないエンティティを処理
-        for eid, comps in self.world.get_entities_with_components('gauge', 'medal', 'defeated'):
-            if comps['defeated'].is_defeated: continue
-            
-            gauge = comps['gauge']
-            if gauge.status == GaugeStatus.ACTION_CHOICE and not gauge.part_targets:
-                personality = get_personality(comps['medal'].personality_id)
-                gauge.part_targets = personality.select_targets(self.world, eid)
+        # （列指向ストレージ使用時は状態の列から行動選択待ちの機体のみを取り出し、ターゲットは元のコンポーネントから読む）
+        store = self.world.get_column_store('gauge')
+        if store is not None:
+            eids = units_with_status(store, get_gauge_units(self.world, store), GaugeStatus.ACTION_CHOICE)
+            pending = [eid for eid in eids if not store.component(eid).part_targets]
+        else:
+            pending = [eid for eid, comps in self.world.query('gauge', 'medal', 'defeated')
+                       if not comps['defeated'].is_defeated
+                       and comps['gauge'].status == GaugeStatus.ACTION_CHOICE and not comps['gauge'].part_targets]
+
+        for eid in pending:
+            comps = self.world.entities[eid]
+            personality = get_personality(comps['medal'].personality_id)
+            comps['gauge'].part_targets = personality.select_targets(self.world, eid)
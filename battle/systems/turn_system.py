@@ -10,12 +10,12 @@ class TurnSystem(System):
     プレイヤーならINPUTフェーズへ、エネミーならENEMY_TURNフェーズへ遷移させる。
     意思決定ロジックはここには持たない。
     """
+    phases = {BattlePhase.IDLE}
 
     def update(self, dt: float):
-        entities = self.world.get_entities_with_components('battlecontext', 'battleflow')
-        if not entities: return
-        context = entities[0][1]['battlecontext']
-        flow = entities[0][1]['battleflow']
+        context = self.world.get_singleton('battlecontext')
+        flow = self.world.get_singleton('battleflow')
+        if not context or not flow: return
 
         # IDLEフェーズ以外ではターン処理を行わない
         if flow.current_phase != BattlePhase.IDLE:
@@ -24,10 +24,10 @@ class TurnSystem(System):
         if not context.waiting_queue: return
         
         # キュー先頭のエンティティを取得
-        eid = context.waiting_queue[0]
+        eid = context.waiting_queue.first()
         comps = self.world.entities.get(eid)
         if not comps:
-            context.waiting_queue.pop(0)
+            context.waiting_queue.popleft()
             return
 
         gauge = comps['gauge']
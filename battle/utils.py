@@ -1,9 +1,10 @@
 """バトル関連のユーティリティ関数"""
 
 import math
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from config import GAME_PARAMS
-from battle.constants import GaugeStatus, TeamType, ActionType, BattlePhase
+from battle.constants import GaugeStatus, TeamType, ActionType, BattlePhase, PartType, PART_BITS
+from battle.replay import record_command
 
 def calculate_action_times(attack_power: int) -> tuple:
     """攻撃力に基づいてチャージ時間とクールダウン時間を計算（対数スケール）"""
@@ -15,6 +16,76 @@ def calculate_action_times(attack_power: int) -> tuple:
     
     return charging_time, cooldown_time
 
+# 倍精度浮動小数点数の仮数のビット数（区間 [2^(e-1), 2^e) の値はすべて 2^(e-53) の整数倍）
+FLOAT_MANTISSA_BITS = 53
+# accumulate で残りがこのtick数以下なら、区間ごとの計算より実際に足す方が速い
+DIRECT_ADD_TICKS = 8
+
+def accumulate(value: float, delta: float, max_ticks: Optional[int] = None,
+               bound: Optional[float] = None) -> Tuple[float, int]:
+    """
+    value に1tickごとに delta を足す逐次の浮動小数点演算（value += delta の繰り返し）と同じ値を、tickごとに足さずに求める。
+    value と結果が同じ2のべき乗の区間にある間は、値がその区間のulpの整数倍で、delta もulpの整数倍に同じ丸め方で丸められるため、
+    整数演算で区間の終わりまで一度に進められる（0から100まででも区間は10個程度）。
+    丸めが偶数側に寄る（delta がulpのちょうど半分の端数を持つ）場合と区間をまたぐtick、残りが DIRECT_ADD_TICKS 以下の場合は実際に足す。
+    max_ticks 回、または bound に達する（delta > 0 なら bound 以上、delta < 0 なら bound 以下になる）まで進める。
+    Returns: (進めた後の値, 進めたtick数)
+    """
+    rising = delta > 0
+    ticks = 0
+    while max_ticks is None or ticks < max_ticks:
+        if bound is not None and (value >= bound if rising else value <= bound):
+            break
+
+        count = 0
+        if value > 0 and (max_ticks is None or max_ticks - ticks > DIRECT_ADD_TICKS):
+            _, exponent = math.frexp(value)
+            ulp = math.ldexp(1.0, exponent - FLOAT_MANTISSA_BITS)
+            quotient = delta / ulp
+            if abs(quotient) < (1 << (FLOAT_MANTISSA_BITS - 1)) and abs(quotient - math.trunc(quotient)) != 0.5:
+                units, step = int(value / ulp), round(quotient)
+                low, high = 1 << (FLOAT_MANTISSA_BITS - 1), 1 << FLOAT_MANTISSA_BITS
+                # 結果が同じ区間に収まるtick数
+                if step > 0:
+                    count = (high - 1 - units) // step
+                elif step < 0:
+                    count = (units - low) // -step
+                if max_ticks is not None:
+                    count = min(count, max_ticks - ticks)
+                # bound に達するtick数（bound が区間外なら区間の終わりが先に来る）
+                if bound is not None and count > 0:
+                    target = bound / ulp
+                    if rising and target < high:
+                        count = min(count, max(0, -((units - math.ceil(target)) // step)))
+                    elif not rising and target >= low:
+                        count = min(count, max(0, -((math.floor(target) - units) // -step)))
+                if count > 0:
+                    value = math.ldexp(units + count * step, exponent - FLOAT_MANTISSA_BITS)
+
+        if count > 0:
+            ticks += count
+        else:
+            value += delta
+            ticks += 1
+    return value, ticks
+
+def ticks_to_full(progress: float, step: float) -> int:
+    """進行度 progress のゲージが1tickに step ずつ進んで100に達するまでのtick数（固定ステップと同じ演算。最低1）"""
+    return max(1, accumulate(progress, step, bound=100.0)[1])
+
+def count_down_stop_timer(stop_timer: float, dt: float, max_ticks: Optional[int] = None) -> Tuple[float, int]:
+    """
+    停止時間を固定ステップと同じ演算（1tickごとに dt を引き、0で止める）で最大 max_ticks 回（Noneなら0になるまで）減らす。
+    dt 以下になるまでは引き算のみのため accumulate で求め、0で止まる最後の1tickだけを別に数える。
+    Returns: (減らした後の停止時間, 停止していたtick数)
+    """
+    if stop_timer <= 0:
+        return stop_timer, 0
+    stop_timer, ticks = accumulate(stop_timer, -dt, max_ticks, bound=dt)
+    if max_ticks is not None and ticks >= max_ticks:
+        return stop_timer, ticks
+    return 0.0, ticks + 1
+
 def apply_action_command(world, eid: int, action: str, part: Optional[str]):
     """
     コマンドを適用し、時間計算を行ってチャージを開始する共通関数
@@ -22,8 +93,11 @@ def apply_action_command(world, eid: int, action: str, part: Optional[str]):
     """
     comps = world.entities[eid]
     gauge = comps['gauge']
-    context = world.entities[0]['battlecontext'] # Singleton想定
-    flow = world.entities[0]['battleflow']
+    context = world.get_singleton('battlecontext')
+    flow = world.get_singleton('battleflow')
+
+    # リプレイ記録中ならコマンドを記録
+    record_command(world, eid, action, part)
 
     gauge.selected_action = action
     gauge.selected_part = part
@@ -54,8 +128,42 @@ def apply_action_command(world, eid: int, action: str, part: Optional[str]):
     flow.current_phase = BattlePhase.IDLE
     
     # 待機列から削除
-    if context.waiting_queue and context.waiting_queue[0] == eid:
-        context.waiting_queue.pop(0)
+    if context.waiting_queue.first() == eid:
+        context.waiting_queue.popleft()
+
+def apply_part_damage(world, target_id: int, comps, part_type: str, damage: int, stop_duration: float = 0) -> Optional[float]:
+    """
+    機体の部位へダメージを与え、パーツのHP・生存パーツ索引・停止・頭部破壊による機能停止を反映する。
+    実際に減ったHPを返す（部位が存在しなければ何もせず None）。
+    DamageSystem と、AIの先読み（フォークしたWorld上での仮の適用）の両方から呼ばれる。
+    """
+    part_id = comps['partlist'].parts.get(part_type)
+    if not part_id:
+        return None
+
+    health = world.entities[part_id]['health']
+    hp_before = health.hp
+    health.hp = max(0, health.hp - damage)
+
+    # 機体のパーツ生存状況の索引を更新する
+    alive = comps['aliveparts']
+    alive.hp[part_type] = int(health.hp)
+    if health.hp <= 0 and alive.alive_mask & PART_BITS[part_type]:
+        alive.alive_mask &= ~PART_BITS[part_type]
+        alive.alive_parts = [p for p in alive.alive_parts if p != part_type]
+
+    # 状態異常：停止の適用
+    if stop_duration > 0:
+        comps['gauge'].stop_timer = max(comps['gauge'].stop_timer, stop_duration)
+
+    # 頭部破壊なら機能停止
+    if part_type == PartType.HEAD and health.hp <= 0 and not comps['defeated'].is_defeated:
+        comps['defeated'].is_defeated = True
+        roster = world.get_singleton('teamroster')
+        if roster:
+            roster.members[comps['team'].team_type].remove(target_id)
+
+    return hp_before - health.hp
 
 def calculate_current_x(base_x: int, status: str, progress: float, team_type: str) -> float:
     """エンティティの現在のアイコンX座標を計算する（ゲージ進行に基づく視覚的座標）"""
@@ -86,38 +194,48 @@ def calculate_current_x(base_x: int, status: str, progress: float, team_type: st
             return target_x + (progress / 100.0) * (start_x - target_x)
         return start_x
 
+def refresh_gauge_positions(world) -> None:
+    """
+    全機体のアイコンX座標を1回ずつ計算して索引に保存し、チームごとに中央（敵陣側）に近い順へ並べ直す。
+    GaugeSystem がゲージ更新ごとに呼ぶ。
+    """
+    index = world.get_singleton('gaugepositions')
+    if index is None: return
+    index.icon_x, index.by_team = calculate_gauge_positions(world)
+
+def calculate_gauge_positions(world) -> Tuple[Dict[int, float], Dict[str, List[int]]]:
+    """全機体のアイコンX座標と、チームごとの中央（敵陣側）に近い順の並び (icon_x, by_team) を計算する"""
+    store = world.get_column_store('gauge')
+    if store is not None:
+        # 列指向ストレージ使用時は機体ごとのビューを読まずに一括で計算する（循環インポートを避けるためここで読み込む）
+        from battle.gauge_columns import calculate_gauge_positions_columns
+        return calculate_gauge_positions_columns(world, store)
+
+    icon_x, by_team = {}, {}
+    for eid, comps in world.query('position', 'gauge', 'team'):
+        gauge, team_type = comps['gauge'], comps['team'].team_type
+        icon_x[eid] = float(calculate_current_x(comps['position'].x, gauge.status, gauge.progress, team_type))
+        by_team.setdefault(team_type, []).append(eid)
+
+    # プレイヤーはX座標が大きいほど、エネミーは小さいほど中央に近い（同じ位置なら生成順）
+    for team_type, eids in by_team.items():
+        sign = -1.0 if team_type == TeamType.PLAYER else 1.0
+        eids.sort(key=lambda eid: sign * icon_x[eid])
+    return icon_x, by_team
+
 def get_closest_target_by_gauge(world, my_team_type: str):
     """
     現在のゲージ位置に基づき、最も「中央（敵陣側）」に近い敵対エンティティのIDを返す。
+    アイコン位置の索引を中央に近い順にたどり、最初の生存機体を返す（索引の無いWorldではその場で計算する）。
     """
     target_team = TeamType.ENEMY if my_team_type == TeamType.PLAYER else TeamType.PLAYER
-    best_target = None
-    
-    # プレイヤー視点：敵の中でX座標が最小（左側＝中央寄り）のものが一番近い
-    # エネミー視点：プレイヤーの中でX座標が最大（右側＝中央寄り）のものが一番近い
-    extreme_x = float('inf') if my_team_type == TeamType.PLAYER else float('-inf')
     
-    candidates = world.get_entities_with_components('team', 'defeated', 'position', 'gauge')
-    
-    for teid, tcomps in candidates:
-        if tcomps['team'].team_type == target_team and not tcomps['defeated'].is_defeated:
-            cur_x = calculate_current_x(
-                tcomps['position'].x, 
-                tcomps['gauge'].status, 
-                tcomps['gauge'].progress, 
-                tcomps['team'].team_type
-            )
-            
-            if my_team_type == TeamType.PLAYER:
-                if cur_x < extreme_x:
-                    extreme_x = cur_x
-                    best_target = teid
-            else:
-                if cur_x > extreme_x:
-                    extreme_x = cur_x
-                    best_target = teid
-                    
-    return best_target
+    index = world.get_singleton('gaugepositions')
+    by_team = index.by_team if index is not None else calculate_gauge_positions(world)[1]
+    for teid in by_team.get(target_team, []):
+        if not world.entities[teid]['defeated'].is_defeated:
+            return teid
+    return None
 
 def calculate_action_menu_layout(button_count: int = 4):
     """アクションメニューのボタン配置を計算し、各ボタンの矩形情報を返す"""
@@ -167,7 +285,8 @@ def is_target_valid(world, target_id: Optional[int], target_part: Optional[str]
     Returns:
         bool: ターゲットが有効（生存）ならTrue
     """
-    if target_id is None:
+    # 削除・再利用済みの古いID（世代不一致）はここで弾く
+    if not world.is_alive(target_id):
         return False
         
     t_comps = world.try_get_entity(target_id)
@@ -178,20 +297,10 @@ def is_target_valid(world, target_id: Optional[int], target_part: Optional[str]
     if 'defeated' in t_comps and t_comps['defeated'].is_defeated:
         return False
         
-    # 部位指定がある場合、その部位が破壊されていないか
+    # 部位指定がある場合、その部位が破壊されていないか（機体側の生存パーツ索引で判定）
     if target_part:
-        if 'partlist' not in t_comps:
-            return False
-            
-        p_id = t_comps['partlist'].parts.get(target_part)
-        if not p_id:
-            return False
-            
-        p_comps = world.try_get_entity(p_id)
-        if not p_comps or 'health' not in p_comps:
-            return False
-            
-        if p_comps['health'].hp <= 0:
+        alive = t_comps.get('aliveparts')
+        if not alive or not alive.alive_mask & PART_BITS.get(target_part, 0):
             return False
             
     return True
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""バトル計算ロジックの一括版（NumPy配列版）
+
+battle.calculator の各関数と同じ式を配列上で一度に評価する。
+乱数は呼び出し側が一様乱数 [0, 1) の配列として渡すため、同じ値を渡せばスカラー版と完全に一致する。
+攻撃の一括判定（CombatService.resolve_attacks）は判定部分（check_is_hit_batch / check_attack_outcome_batch）を使う。
+"""
+
+from core.ecs import import_numpy
+from battle.calculator import (
+    MOBILITY_WEIGHT,
+    DEFENSE_WEIGHT,
+    CRITICAL_THRESHOLD,
+    DAMAGE_PENALTY_DIVISOR
+)
+
+FEATURE = "Vectorized combat formulas"
+
+def _as_float(values):
+    np = import_numpy(FEATURE)
+    return np.asarray(values, dtype=np.float64)
+
+def _ratio(success, denominator):
+    """success / denominator（分母が0以下の要素は1.0）"""
+    np = import_numpy(FEATURE)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator <= 0, 1.0, success / denominator)
+
+def calculate_hit_probability_batch(success, mobility):
+    """calculate_hit_probability の配列版"""
+    success = _as_float(success)
+    denominator = success + (_as_float(mobility) * MOBILITY_WEIGHT)
+    return _ratio(success, denominator)
+
+def calculate_break_probability_batch(success, defense):
+    """calculate_break_probability の配列版"""
+    success = _as_float(success)
+    denominator = success + (_as_float(defense) * DEFENSE_WEIGHT)
+    return _ratio(success, denominator)
+
+def check_is_hit_batch(hit_prob, hit_draws):
+    """check_is_hit の配列版（hit_draws は rng.random() に相当する値）"""
+    return _as_float(hit_draws) < _as_float(hit_prob)
+
+def check_attack_outcome_batch(hit_prob, break_prob, break_draws):
+    """
+    check_attack_outcome の配列版。
+    Returns: (is_critical, is_defense) の真偽値配列
+    """
+    hit_prob, break_prob = _as_float(hit_prob), _as_float(break_prob)
+    is_defense = ~(_as_float(break_draws) < break_prob)
+    is_critical = ~is_defense & ((hit_prob + break_prob) > CRITICAL_THRESHOLD)
+    return is_critical, is_defense
+
+def calculate_damage_batch(base_attack, success, mobility, defense, is_critical, is_defense):
+    """calculate_damage の配列版（int64配列を返す）"""
+    np = import_numpy(FEATURE)
+    is_critical = np.asarray(is_critical, dtype=bool)
+    is_defense = np.asarray(is_defense, dtype=bool)
+
+    # クリティカルは全ステータス無視、クリーンヒットは防御のみ無視
+    penalty_mobility = np.where(is_critical, 0.0, _as_float(mobility))
+    penalty_defense = np.where(is_critical | ~is_defense, 0.0, _as_float(defense))
+
+    performance_diff = _as_float(success) - (penalty_mobility / DAMAGE_PENALTY_DIVISOR) - (penalty_defense / DAMAGE_PENALTY_DIVISOR)
+    bonus_damage = np.maximum(performance_diff, 0.0) / 2
+
+    return np.trunc(_as_float(base_attack) + bonus_damage).astype(np.int64)
+
+def evaluate_attacks_batch(attack, success, mobility, defense, hit_draws, break_draws, atk_bonus=0, def_bonus=0):
+    """
+    攻撃の組み合わせをまとめて評価する（build_matchup と CombatService.resolve_attack の判定・ダメージ部分に相当）。
+    各引数は同じ形状にブロードキャストできる配列。atk_bonus / def_bonus は属性相性補正。
+    命中しなかった要素の break_draws は使われない。
+
+    Returns:
+        Dict: 'hit_prob', 'break_prob', 'is_hit', 'is_critical', 'is_defense', 'damage' の配列
+    """
+    np = import_numpy(FEATURE)
+    # ステータス補正適用 (最小値クリップ含む)
+    adjusted_success = np.maximum(np.add(success, atk_bonus), 1)
+    adjusted_attack = np.maximum(np.add(attack, atk_bonus), 1)
+    adjusted_mobility = np.maximum(np.add(mobility, def_bonus), 0)
+    adjusted_defense = np.maximum(np.add(defense, def_bonus), 0)
+
+    hit_prob = calculate_hit_probability_batch(adjusted_success, adjusted_mobility)
+    break_prob = calculate_break_probability_batch(adjusted_success, adjusted_defense)
+    is_hit = check_is_hit_batch(hit_prob, hit_draws)
+
+    is_critical, is_defense = check_attack_outcome_batch(hit_prob, break_prob, break_draws)
+    is_critical = is_critical & is_hit
+    is_defense = is_defense & is_hit
+
+    damage = calculate_damage_batch(
+        adjusted_attack, adjusted_success,
+        adjusted_mobility, adjusted_defense,
+        is_critical, is_defense
+    )
+    damage = np.where(is_hit, damage, 0)
+
+    return {
+        'hit_prob': hit_prob,
+        'break_prob': break_prob,
+        'is_hit': is_hit,
+        'is_critical': is_critical,
+        'is_defense': is_defense,
+        'damage': damage
+    }
@@ -1,5 +1,6 @@
 """バトル固有のECSコンポーネント定義（純粋データ構造）"""
 
+from collections import OrderedDict
 from typing import List, Optional, Dict
 from core.ecs import Component
 
@@ -42,9 +43,10 @@ class RenderComponent(Component):
 
 class PartComponent(Component):
     """パーツの種類と属性"""
-    def __init__(self, part_type: str, attribute: str = "undefined"):
+    def __init__(self, part_type: str, attribute: str = "undefined", part_id: Optional[str] = None):
         self.part_type = part_type # "head", "right_arm", "left_arm", "legs"
         self.attribute = attribute
+        self.part_id = part_id     # パーツカタログ（parts_data.json）上のID
 
 class HealthComponent(Component):
     """HPデータ"""
@@ -73,6 +75,17 @@ class PartListComponent(Component):
     def __init__(self):
         self.parts: Dict[str, int] = {} 
 
+class AlivePartsComponent(Component):
+    """
+    機体のパーツ生存状況の索引（DamageSystem がHPを変更した時に更新する）。
+    各部位のHPを機体側に持つことで、パーツエンティティを辿らずに生存判定できる。
+    """
+    def __init__(self, alive_mask: int, alive_parts: List[str], hp: Dict[str, int], max_hp: Dict[str, int]):
+        self.alive_mask = alive_mask      # 生存パーツのビット集合（PART_BITS）
+        self.alive_parts = alive_parts    # 生存パーツの部位名（PartListComponent.parts の順）
+        self.hp = hp                      # 部位名 -> 現在HP
+        self.max_hp = max_hp              # 部位名 -> 最大HP
+
 class MedalComponent(Component):
     """メダル（頭脳）データ"""
     def __init__(self, medal_id: str, medal_name: str, nickname: str, personality_id: str = "random", attribute: str = "undefined"):
@@ -87,18 +100,64 @@ class DefeatedComponent(Component):
     def __init__(self):
         self.is_defeated = False
 
+class WaitingQueue(OrderedDict):
+    """
+    行動待ちの機体IDの列（重複のない先入れ先出し）。
+    所属判定・末尾への追加・先頭の取り出し・途中からの削除をいずれも O(1) で行う。
+    """
+    def append(self, eid: int) -> None:
+        """末尾に並べる（既に並んでいれば位置は変えない）"""
+        if eid not in self:
+            self[eid] = None
+
+    def first(self) -> Optional[int]:
+        """先頭の機体ID（空なら None）"""
+        return next(iter(self), None)
+
+    def popleft(self) -> int:
+        """先頭の機体IDを取り出す"""
+        return self.popitem(last=False)[0]
+
+    def discard(self, eid: int) -> None:
+        """並んでいれば列から外す"""
+        self.pop(eid, None)
+
 class BattleContextComponent(Component):
     """
     バトルログや待機列などの共有データ。
     ※ 状態管理フラグは BattleFlowComponent に移動しました。
     """
     def __init__(self):
-        self.waiting_queue: List[int] = []
+        self.waiting_queue = WaitingQueue()
         self.current_turn_entity_id: Optional[int] = None
         self.battle_log: List[str] = []
         self.pending_logs: List[str] = [] # ダメージ詳細などの一時バッファ
         self.selected_menu_index: int = 0
 
+class TeamRosterComponent(Component):
+    """
+    チームごとの生存機体とリーダーの索引（DamageSystem が機能停止を反映する）。
+    ターゲット選定や勝敗判定で全エンティティを走査しないために使う。
+    """
+    def __init__(self):
+        self.members: Dict[str, List[int]] = {}  # チーム種別 -> 生存機体のID（生成順）
+        self.leaders: Dict[str, int] = {}        # チーム種別 -> リーダー機体のID（機能停止後も保持）
+
+class GaugePositionsComponent(Component):
+    """
+    機体アイコンの現在X座標の索引（GaugeSystem がゲージの動いたtickごとに作り直す）。
+    最寄りの敵の検索と描画はここを参照し、座標を計算し直さない。
+    """
+    def __init__(self):
+        self.icon_x: Dict[int, float] = {}       # 機体ID -> アイコンのX座標
+        self.by_team: Dict[str, List[int]] = {}  # チーム種別 -> 機体ID（中央＝敵陣側に近い順）
+
+class BattleStatsComponent(Component):
+    """シミュレーション集計用のバトル統計"""
+    def __init__(self):
+        self.turn_count: int = 0                 # 解決された行動の数
+        self.damage_dealt: Dict[int, int] = {}   # 攻撃パーツのエンティティID -> 与えたダメージ（実際に減ったHP）
+
 class DamageEventComponent(Component):
     """ダメージ発生を伝える一時的なコンポーネント"""
     def __init__(self, attacker_id: int, attacker_part: str, damage: int, target_part: str, is_critical: bool = False, stop_duration: float = 0.0):
@@ -1,7 +1,8 @@
 """バトル進行状態（フロー）を管理するコンポーネント"""
 
 from core.ecs import Component
-from battle.constants import BattlePhase
+from typing import Optional, List
+from battle.constants import BattlePhase, BattleTiming
 
 class BattleFlowComponent(Component):
     """バトルの現在のフェーズを管理する"""
@@ -24,4 +25,39 @@ class BattleFlowComponent(Component):
         self.winner = None              # 勝者（game_over時）
         self.phase_timer = 0.0          # フェーズ遷移待ち用タイマー
         self.cutin_progress = 0.0       # カットイン演出進行度(0.0~1.0)
-        self.target_line_offset = 0.0   # ターゲットラインのアニメーション用オフセット
\ No newline at end of file
+        self.target_line_offset = 0.0   # ターゲットラインのアニメーション用オフセット
+
+class PresentationComponent(Component):
+    """
+    演出・確認待ちの進め方（プレゼンテーション方針）。
+    既定値は人間の操作を待つ通常プレイ。自動進行にするとバトルを純粋な計算として最後まで回せる。
+    """
+    def __init__(self, auto_confirm: bool = False,
+                 target_indication_time: float = BattleTiming.TARGET_INDICATION,
+                 cutin_time: float = BattleTiming.CUTIN_ANIMATION,
+                 player_strategy_id: Optional[str] = None,
+                 enemy_strategy_id: str = "random"):
+        self.auto_confirm = auto_confirm                      # ログ送り・攻撃宣言・結果確認を自動で行う
+        self.target_indication_time = target_indication_time  # ターゲット演出の時間（秒）
+        self.cutin_time = cutin_time                          # カットイン演出の時間（秒）
+        self.player_strategy_id = player_strategy_id          # 設定時、INPUTフェーズでもAIがコマンドを決定する
+        self.enemy_strategy_id = enemy_strategy_id            # エネミー側のコマンダー方針（get_strategy のID）
+
+class ReplayComponent(Component):
+    """
+    リプレイの記録・再生状態。tick は BattleSystem.update の呼び出し回数。
+    playing=False なら各リストへ記録し、True なら記録済みの内容を同じtickで再現する。
+    """
+    def __init__(self, playing: bool = False, commands: Optional[List[list]] = None,
+                 confirm_ticks: Optional[List[int]] = None, dt_changes: Optional[List[list]] = None):
+        self.playing = playing
+        self.tick = 0
+        self.commands = commands or []            # [tick, 機体ID, アクション, パーツ]
+        self.confirm_ticks = confirm_ticks or []  # 人間の確認操作（クリック・決定キー）があったtick
+        self.dt_changes = dt_changes or []        # [tick, dt]（dtが変わったtickのみ）
+        self.dt = None                            # 現在のdt
+
+        # 再生用の索引
+        self.command_index = {(tick, eid): (action, part) for tick, eid, action, part in self.commands}
+        self.confirm_set = set(self.confirm_ticks)
+        self.dt_cursor = 0
@@ -80,4 +80,16 @@ GAME_PARAMS = {
         'PANEL_Y': 40,
         'PANEL_HEIGHT': 520,
     }
-}
\ No newline at end of file
+}
+# プロファイラ設定（システム別の処理時間計測）
+# AI（コマンダー）の設定
+AI_PARAMS = {
+    'THINK_TICKS': 1,                       # ターン開始から決定を適用するまでのtick数（スレッド実行時の思考時間。同期実行でも同じだけ待つ）
+}
+
+PROFILER_PARAMS = {
+    'ENABLED': False,
+    'WINDOW_FRAMES': 600,                   # ヒストグラム用に保持する直近の計測数
+    'SAMPLE_INTERVAL': 10,                  # 計測するフレームの間隔（1なら毎フレーム）
+    'OUTPUT_PATH': 'profile_output.json',   # バトルシーン終了時のJSON出力先
+}
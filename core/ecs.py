@@ -1,6 +1,29 @@
 """ECSエンジン（汎用的な基盤のみ）"""
 
-from typing import Dict, Any, List, Optional
+import copy
+import random
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+
+# NumPyは列指向ストレージを使う場合のみ必要なため、初回使用時にインポートする（起動時間短縮）
+np = None
+
+def import_numpy(feature: str = "Column storage"):
+    """
+    NumPyを初回使用時にインポートして返す（列指向ストレージ・一括計算の各モジュールで共用する）。
+    インストールされていなければ、必要とする機能名 feature を示す ImportError を送出する。
+    """
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError(f"{feature} requires NumPy") from None
+        np = numpy
+    return np
+
+# エンティティIDの下位ビットは密なインデックス、上位ビットは世代（再利用回数）を表す
+ENTITY_INDEX_BITS = 20
+ENTITY_INDEX_MASK = (1 << ENTITY_INDEX_BITS) - 1
 
 class Component:
     """コンポーネント：データのみを持つ基底クラス"""
@@ -8,6 +31,9 @@ class Component:
 
 class System:
     """システム：コンポーネントを持つエンティティに対する処理を定義"""
+    # 実行対象のフェーズ集合（Noneなら常に実行）。スケジューラが呼び出し要否の判定に使う
+    phases: Optional[set] = None
+
     def __init__(self, world):
         self.world = world
 
@@ -15,34 +41,419 @@ class System:
         """システムの更新処理を実行"""
         pass
 
+class ColumnView:
+    """
+    列指向ストレージに格納されたコンポーネントの属性アクセス用ビュー。
+    列に登録されたフィールドは配列の該当スロットを読み書きし、それ以外は元のコンポーネントへ委譲する。
+    """
+    __slots__ = ('_store', '_slot', '_component')
+
+    def __init__(self, store: 'ColumnStore', slot: int, component: Component):
+        object.__setattr__(self, '_store', store)
+        object.__setattr__(self, '_slot', slot)
+        object.__setattr__(self, '_component', component)
+
+    def __getattr__(self, name: str):
+        store = self._store
+        column = store.columns.get(name)
+        if column is None:
+            return getattr(self._component, name)
+        categories = store.categories.get(name)
+        if categories is None:
+            return column.item(self._slot)
+        return categories[column.item(self._slot)]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        store = self._store
+        if name in store.columns:
+            store.set(name, self._slot, value)
+        else:
+            setattr(self._component, name, value)
+
+class ColumnStore:
+    """
+    特定コンポーネントの数値フィールドを、密なスロット順の連続したNumPy配列で保持する。
+    fields の値はdtype、または取りうる値のタプル（カテゴリ列。値の番号を int8 で保持し、状態の一括判定に使う）。
+    """
+    def __init__(self, fields: Dict[str, Any], capacity: int = 64):
+        import_numpy()
+        self.fields = dict(fields)
+        self.columns: Dict[str, Any] = {}
+        self.categories: Dict[str, tuple] = {}   # カテゴリ列 -> 値（番号順）
+        self._codes: Dict[str, Dict[Any, int]] = {}
+        for name, dtype in fields.items():
+            if isinstance(dtype, tuple):
+                self.categories[name] = dtype
+                self._codes[name] = {value: code for code, value in enumerate(dtype)}
+                dtype = 'int8'
+            self.columns[name] = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+        self.slots: Dict[int, int] = {}       # entity_id -> slot
+        self.entity_ids: List[int] = []       # slot -> entity_id
+        self.views: List[ColumnView] = []     # slot -> view
+        # 列から派生したデータの利用側のキャッシュ（スロットの構成が変わる挿入・削除で破棄される）
+        self.cache: Dict[str, Any] = {}
+
+    def column(self, name: str):
+        """使用中スロット分の配列ビューを取得（書き込みはストレージに反映される。カテゴリ列は番号の配列）"""
+        return self.columns[name][:self.size]
+
+    def code(self, name: str, value: Any) -> int:
+        """カテゴリ列での値の番号"""
+        code = self._codes[name].get(value)
+        if code is None:
+            raise ValueError(f"{value!r} is not a category of column '{name}'")
+        return code
+
+    def set(self, name: str, slot: int, value: Any) -> None:
+        """1スロットの値を書き込む（カテゴリ列は番号に変換する）"""
+        if name in self._codes:
+            value = self.code(name, value)
+        self.columns[name][slot] = value
+
+    def component(self, entity_id: int) -> Component:
+        """列以外のフィールドを読むための元のコンポーネント（列に登録されたフィールドの値は古いため読まないこと）"""
+        return self.views[self.slots[entity_id]]._component
+
+    def read(self, slot: int) -> Dict[str, Any]:
+        """1スロットの全列の値（カテゴリ列は元の値に戻す）"""
+        values = {}
+        for name, column in self.columns.items():
+            value = column.item(slot)
+            categories = self.categories.get(name)
+            values[name] = categories[value] if categories is not None else value
+        return values
+
+    def insert(self, entity_id: int, component: Component) -> ColumnView:
+        """コンポーネントの値を末尾スロットへ格納し、そのビューを返す"""
+        if self.size == len(next(iter(self.columns.values()))):
+            self._grow()
+
+        slot = self.size
+        for name in self.columns:
+            self.set(name, slot, getattr(component, name))
+
+        view = ColumnView(self, slot, component)
+        self.slots[entity_id] = slot
+        self.entity_ids.append(entity_id)
+        self.views.append(view)
+        self.size += 1
+        self.cache.clear()
+        return view
+
+    def remove(self, entity_id: int) -> Component:
+        """スロットを解放し、最新の値を書き戻した元のコンポーネントを返す（末尾と入れ替えて密に保つ）"""
+        slot = self.slots.pop(entity_id)
+        view = self.views[slot]
+        component = view._component
+        for name, value in self.read(slot).items():
+            setattr(component, name, value)
+
+        last = self.size - 1
+        if slot != last:
+            moved_view, moved_id = self.views[last], self.entity_ids[last]
+            for column in self.columns.values():
+                column[slot] = column[last]
+            object.__setattr__(moved_view, '_slot', slot)
+            self.views[slot], self.entity_ids[slot] = moved_view, moved_id
+            self.slots[moved_id] = slot
+
+        self.views.pop()
+        self.entity_ids.pop()
+        self.size -= 1
+        self.cache.clear()
+        return component
+
+    def _grow(self) -> None:
+        for name, column in self.columns.items():
+            grown = np.zeros(len(column) * 2, dtype=column.dtype)
+            grown[:len(column)] = column
+            self.columns[name] = grown
+
+# フォーク側で取得時に複製する可変な属性の型と、要素がこれらだけなら浅い複製で済む不変な値の型
+_CONTAINER_TYPES = (list, dict, set)
+_ATOM_TYPES = (str, int, float, bool, type(None), tuple)
+
+def _copy_container(value):
+    """フォーク側で変更される可能性のあるリスト・辞書・集合の属性を複製する（要素が不変な値なら浅い複製）"""
+    items = value.values() if isinstance(value, dict) else value
+    if all(isinstance(item, _ATOM_TYPES) for item in items):
+        return copy.copy(value)
+    return copy.deepcopy(value)
+
+class _AllNames:
+    """ForkView.owned 用：すべての属性をフォーク側の所有とみなす"""
+    __slots__ = ()
+
+    def __contains__(self, name: str) -> bool:
+        return True
+
+    def add(self, name: str) -> None:
+        pass
+
+_ALL_NAMES = _AllNames()
+
+class ForkView:
+    """
+    フォークしたWorld上のコンポーネント（コピーオンライト）。
+    読み取りは元のコンポーネントをそのまま参照し、書き込み時に初めて属性の浅い複製を作って以降はその複製を読み書きする。
+    リスト・辞書・集合の属性はその場で変更される可能性があるため、取得された時にその属性だけを複製する（フォークごとに1回）。
+    """
+    __slots__ = ('_source', '_copy', '_owned')
+
+    def __init__(self, source: Component):
+        object.__setattr__(self, '_source', source)
+        object.__setattr__(self, '_copy', None)
+        object.__setattr__(self, '_owned', None)   # 複製済みの属性名（フォーク側の値になっているもの）
+
+    def __getattr__(self, name: str):
+        duplicate = self._copy
+        if duplicate is None:
+            value = getattr(self._source, name)
+            if not isinstance(value, _CONTAINER_TYPES):
+                return value
+            duplicate = self._materialize()
+        else:
+            value = getattr(duplicate, name)
+            if not isinstance(value, _CONTAINER_TYPES) or name in self._owned:
+                return value
+
+        value = _copy_container(value)
+        setattr(duplicate, name, value)
+        self._owned.add(name)
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._materialize(), name, value)
+        self._owned.add(name)
+
+    def _resolve(self) -> Component:
+        """現在の値を持つオブジェクト（複製済みなら複製、未複製なら元のコンポーネント）"""
+        return self._copy if self._copy is not None else self._source
+
+    def _materialize(self) -> Component:
+        """元のコンポーネントの属性を浅く複製する（リスト・辞書・集合は元と共有したまま、取得時に複製する）"""
+        if self._copy is None:
+            source = self._source
+            while isinstance(source, ForkView):
+                source = source._resolve()
+            if isinstance(source, ColumnView):
+                component = source._component
+                state = {**vars(component), **source._store.read(source._slot)}
+            else:
+                component, state = source, vars(source)
+
+            duplicate = component.__class__.__new__(component.__class__)
+            duplicate.__dict__.update(state)
+            object.__setattr__(self, '_copy', duplicate)
+            object.__setattr__(self, '_owned', set())
+        return self._copy
+
+    @staticmethod
+    def owned(component: Component) -> 'ForkView':
+        """フォーク側で追加されたコンポーネント用（共有元を持たず、最初から自身を読み書きする）"""
+        view = ForkView(component)
+        object.__setattr__(view, '_copy', component)
+        object.__setattr__(view, '_owned', _ALL_NAMES)
+        return view
+
+class ForkedComponents(dict):
+    """
+    フォークしたWorldのエンティティのコンポーネントDict。
+    フォーク直後は元のコンポーネント（フォークのフォークでは元のフォークの ForkView）をそのまま保持し、
+    取り出された時に初めて自身の ForkView で包む（フォーク時にすべてを包むコストを避けるため）。
+    """
+    __slots__ = ('_wrapped',)
+
+    def __init__(self, components: Dict[str, Component]):
+        dict.__init__(self, components)
+        self._wrapped = set()   # 自身の ForkView で包んだコンポーネント名
+
+    def __getitem__(self, name: str):
+        component = dict.__getitem__(self, name)
+        if name not in self._wrapped:
+            component = ForkView(component)
+            dict.__setitem__(self, name, component)
+            self._wrapped.add(name)
+        return component
+
+    def __setitem__(self, name: str, component) -> None:
+        dict.__setitem__(self, name, ForkView.owned(component))
+        self._wrapped.add(name)
+
+    def get(self, name: str, default=None):
+        return self[name] if name in self else default
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def values(self):
+        return [self[name] for name in self]
+
+class ForkedEntities(dict):
+    """
+    フォークしたWorldのエンティティDict（エンティティID -> コンポーネントDict）。
+    取り出された時に初めてエンティティのコンポーネントDictを ForkedComponents で包む
+    （フォークのコストを、先読みで実際に触れたエンティティの数に比例させるため）。
+    """
+    __slots__ = ('_wrapped',)
+
+    def __init__(self, entities: Dict[int, Dict[str, Component]]):
+        dict.__init__(self, entities)
+        self._wrapped = set()   # 自身の ForkedComponents で包んだ（またはフォーク側で生成した）エンティティID
+
+    def __getitem__(self, entity_id: int):
+        components = dict.__getitem__(self, entity_id)
+        if entity_id not in self._wrapped:
+            components = ForkedComponents(components)
+            dict.__setitem__(self, entity_id, components)
+            self._wrapped.add(entity_id)
+        return components
+
+    def __setitem__(self, entity_id: int, components) -> None:
+        dict.__setitem__(self, entity_id, components)
+        self._wrapped.add(entity_id)
+
+    def get(self, entity_id: int, default=None):
+        return self[entity_id] if entity_id in self else default
+
+    def items(self):
+        return [(entity_id, self[entity_id]) for entity_id in self]
+
+    def values(self):
+        return [self[entity_id] for entity_id in self]
+
 class World:
     """ECSのワールド：エンティティとコンポーネントの管理を行う"""
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        # 乱数シード（未指定なら生成して保持し、後から同じ結果を再現できるようにする）
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(63)
+        self._rng_streams: Dict[str, random.Random] = {}
+        # フォーク元のWorld（乱数ストリームは初回使用時にフォーク元の状態から複製する）
+        self._rng_parent: Optional['World'] = None
+
         # Dict[entity_id, Dict[component_name, Component]]
         self.entities: Dict[int, Dict[str, Component]] = {}
-        self.next_entity_id = 0
+
+        # 密なインデックス -> 現在の世代。削除されたインデックスはフリーリストから再利用される
+        self.generations: List[int] = []
+        self._free_indices: List[int] = []
+
+        # クエリキャッシュ: Dict[コンポーネント名タプル, Dict[entity_id, コンポーネントDict]]
+        self._query_cache: Dict[Tuple[str, ...], Dict[int, Dict[str, Component]]] = {}
+        # コンポーネント名 -> そのコンポーネントを含むキャッシュ済みクエリキー
+        self._queries_by_component: Dict[str, List[Tuple[str, ...]]] = {}
+        # エンティティID -> 生成順の通し番号（クエリ結果を生成順に保つため）
+        self._entity_seq: Dict[int, int] = {}
+        self._next_seq = 0
+        # 生成順でない位置に追加され、次の読み出し時に並べ直すクエリキー
+        self._unordered_queries: set = set()
+
+        # シングルトンとして登録されたコンポーネント名 -> 保持エンティティID（未追加ならNone）
+        self._singletons: Dict[str, Optional[int]] = {}
+
+        # 列指向ストレージを使用するコンポーネント名 -> ColumnStore
+        self._column_stores: Dict[str, ColumnStore] = {}
+
+        # 遅延中の構造変更コマンド（None なら即時適用）と、生成予約済みのエンティティID
+        self._command_buffer: Optional[List[tuple]] = None
+        self._pending_entities: set = set()
+
+    def rng(self, stream: str) -> random.Random:
+        """
+        用途別の乱数ストリームを取得する。各ストリームはシードとストリーム名のみから決まるため、
+        他のストリームの消費順や実行プロセスに影響されず再現できる。
+        """
+        rng = self._rng_streams.get(stream)
+        if rng is None:
+            source = self._rng_parent._find_rng(stream) if self._rng_parent else None
+            if source is not None:
+                rng = random.Random()
+                rng.setstate(source.getstate())
+            else:
+                rng = random.Random(f"{self.seed}:{stream}")
+            self._rng_streams[stream] = rng
+        return rng
+
+    def _find_rng(self, stream: str) -> Optional[random.Random]:
+        """使用済みの乱数ストリームを自身またはフォーク元から探す（新たには生成しない）"""
+        rng = self._rng_streams.get(stream)
+        if rng is None and self._rng_parent is not None:
+            return self._rng_parent._find_rng(stream)
+        return rng
+
+    def fork(self) -> 'World':
+        """
+        AIの先読みなど投機的なシミュレーション用に、コンポーネントをコピーオンライトで共有したWorldを作る。
+        フォーク側の変更（属性・リストや辞書の中身・コンポーネントやエンティティの追加削除・乱数）は元のWorldに影響せず、
+        フォークのフォークの変更も元のフォークに影響しない。エンティティ・コンポーネント・クエリは使われた時に初めて
+        フォーク側に用意するため、フォーク自体のコストは先読みで触れたエンティティの数に比例する。
+        フォーク側は元のWorldのコンポーネントを参照して読むため、フォークを使い終えるまで元のWorldは変更しないこと
+        （先読みは1回の決定の中でフォークを作って捨てる。battle.ai.strategy.SearchStrategy）。
+        乱数ストリームはフォーク時点の状態から続く。列指向ストレージの値はビュー経由で読み、フォーク側では通常の属性として持つ。
+        """
+        if self._command_buffer:
+            raise ValueError("Cannot fork a world while structural changes are pending")
+
+        forked = World.__new__(World)
+        forked.seed = self.seed
+        forked._rng_streams = {}
+        forked._rng_parent = self
+
+        forked.entities = ForkedEntities(self.entities)
+        forked.generations = list(self.generations)
+        forked._free_indices = list(self._free_indices)
+
+        # クエリキャッシュは使われた時にフォーク側のエンティティから作る（生成順は _entity_seq で保たれる）
+        forked._query_cache = {}
+        forked._queries_by_component = {}
+        forked._entity_seq = dict(self._entity_seq)
+        forked._next_seq = self._next_seq
+        forked._unordered_queries = set()
+
+        forked._singletons = dict(self._singletons)
+        forked._column_stores = {}
+        forked._command_buffer = None
+        forked._pending_entities = set()
+        return forked
 
     def create_entity(self) -> int:
-        """新しいエンティティ（ID）を作成"""
-        eid = self.next_entity_id
-        self.entities[eid] = {}
-        self.next_entity_id += 1
+        """新しいエンティティ（ID）を作成（遅延中はIDのみ予約し、生成は同期点で行う）"""
+        if self._free_indices:
+            index = self._free_indices.pop()
+        else:
+            index = len(self.generations)
+            if index > ENTITY_INDEX_MASK:
+                raise ValueError("Entity index space exhausted")
+            self.generations.append(0)
+        eid = (self.generations[index] << ENTITY_INDEX_BITS) | index
+
+        if self._command_buffer is not None:
+            self._pending_entities.add(eid)
+            self._command_buffer.append((self._apply_create_entity, (eid,)))
+        else:
+            self._apply_create_entity(eid)
         return eid
 
     def add_component(self, entity_id: int, component: Component, component_name: Optional[str] = None) -> None:
         """エンティティにコンポーネントを追加"""
-        if entity_id not in self.entities:
+        if entity_id not in self.entities and entity_id not in self._pending_entities:
             raise ValueError(f"Entity with id {entity_id} does not exist")
 
         if component_name is None:
             component_name = component.__class__.__name__.lower().replace('component', '')
 
-        self.entities[entity_id][component_name] = component
+        if self._command_buffer is not None:
+            self._command_buffer.append((self._apply_add_component, (entity_id, component, component_name)))
+        else:
+            self._apply_add_component(entity_id, component, component_name)
 
     def remove_component(self, entity_id: int, component_name: str) -> None:
         """エンティティからコンポーネントを削除"""
-        if entity_id in self.entities and component_name in self.entities[entity_id]:
-            del self.entities[entity_id][component_name]
+        if self._command_buffer is not None:
+            self._command_buffer.append((self._apply_remove_component, (entity_id, component_name)))
+        else:
+            self._apply_remove_component(entity_id, component_name)
 
     def get_component(self, entity_id: int, component_name: str) -> Optional[Component]:
         """エンティティからコンポーネントを取得"""
@@ -50,19 +461,191 @@ class World:
             return self.entities[entity_id][component_name]
         return None
 
+    def is_alive(self, entity_id: Optional[int]) -> bool:
+        """IDが現在の世代を指しているか（削除・再利用済みの古いIDならFalse、生成予約中はTrue）"""
+        if entity_id is None:
+            return False
+        index = entity_id & ENTITY_INDEX_MASK
+        return index < len(self.generations) and self.generations[index] == entity_id >> ENTITY_INDEX_BITS
+
     def try_get_entity(self, entity_id: int) -> Optional[Dict[str, Component]]:
         """IDからエンティティのコンポーネント辞書を安全に取得する"""
         return self.entities.get(entity_id)
 
     def delete_entity(self, entity_id: int) -> None:
         """エンティティを削除"""
+        if self._command_buffer is not None:
+            self._command_buffer.append((self._apply_delete_entity, (entity_id,)))
+        else:
+            self._apply_delete_entity(entity_id)
+
+    def begin_deferred(self) -> None:
+        """
+        構造変更（エンティティ生成・削除、コンポーネント追加・削除）の遅延記録を開始する。
+        記録された変更は flush() の呼び出し（同期点）でまとめて適用される。
+        """
+        if self._command_buffer is None:
+            self._command_buffer = []
+
+    def flush(self) -> None:
+        """記録済みの構造変更を記録順に適用する"""
+        buffer = self._command_buffer
+        if not buffer:
+            return
+
+        self._command_buffer = []
+        for apply, args in buffer:
+            apply(*args)
+        self._pending_entities.clear()
+
+    def end_deferred(self) -> None:
+        """残りの構造変更を適用し、即時適用モードへ戻す"""
+        self.flush()
+        self._command_buffer = None
+
+    def _apply_create_entity(self, eid: int) -> None:
+        self.entities[eid] = {}
+        self._entity_seq[eid] = self._next_seq
+        self._next_seq += 1
+
+        # 空クエリ（全エンティティ）のみが新規エンティティに一致する
+        if () in self._query_cache:
+            self._query_cache[()][eid] = self.entities[eid]
+
+    def _apply_add_component(self, entity_id: int, component: Component, component_name: str) -> None:
+        if entity_id not in self.entities:
+            raise ValueError(f"Entity with id {entity_id} does not exist")
+
+        if component_name in self._singletons:
+            owner = self._singletons[component_name]
+            if owner is not None and owner != entity_id:
+                raise ValueError(f"Singleton component '{component_name}' already exists on entity {owner}")
+            self._singletons[component_name] = entity_id
+
+        components = self.entities[entity_id]
+        store = self._column_stores.get(component_name)
+        if store is not None:
+            if component_name in components:
+                store.remove(entity_id)
+            component = store.insert(entity_id, component)
+        components[component_name] = component
+
+        # 追加されたコンポーネントを含むクエリのみ再評価する
+        for key in self._queries_by_component.get(component_name, ()):
+            if all(name in components for name in key):
+                matched = self._query_cache[key]
+                if entity_id not in matched and matched and \
+                        self._entity_seq[next(reversed(matched))] > self._entity_seq[entity_id]:
+                    # 後に生成されたエンティティより後ろに追加されるため、読み出し時に生成順へ並べ直す
+                    self._unordered_queries.add(key)
+                matched[entity_id] = components
+
+    def _apply_remove_component(self, entity_id: int, component_name: str) -> None:
+        if entity_id in self.entities and component_name in self.entities[entity_id]:
+            del self.entities[entity_id][component_name]
+
+            if component_name in self._column_stores:
+                self._column_stores[component_name].remove(entity_id)
+
+            if self._singletons.get(component_name) == entity_id:
+                self._singletons[component_name] = None
+
+            for key in self._queries_by_component.get(component_name, ()):
+                self._query_cache[key].pop(entity_id, None)
+
+    def _apply_delete_entity(self, entity_id: int) -> None:
         if entity_id in self.entities:
-            del self.entities[entity_id]
+            components = self.entities.pop(entity_id)
+            del self._entity_seq[entity_id]
+
+            # 世代を進めてからインデックスを解放し、古いIDを無効化する
+            index = entity_id & ENTITY_INDEX_MASK
+            self.generations[index] += 1
+            self._free_indices.append(index)
+
+            for name in components:
+                if self._singletons.get(name) == entity_id:
+                    self._singletons[name] = None
+                if name in self._column_stores:
+                    self._column_stores[name].remove(entity_id)
+            for matched in self._query_cache.values():
+                matched.pop(entity_id, None)
+
+    def register_singleton(self, component_name: str) -> None:
+        """コンポーネント名をシングルトンとして登録する（2つ目の追加はエラーになる）"""
+        if component_name in self._singletons:
+            return
+
+        owners = [eid for eid, components in self.entities.items() if component_name in components]
+        if len(owners) > 1:
+            raise ValueError(f"Singleton component '{component_name}' exists on multiple entities: {owners}")
+        self._singletons[component_name] = owners[0] if owners else None
+
+    def get_singleton(self, component_name: str) -> Optional[Component]:
+        """シングルトンコンポーネントをO(1)で取得"""
+        entity_id = self._singletons.get(component_name)
+        if entity_id is None:
+            return None
+        return self.entities[entity_id][component_name]
+
+    def get_singleton_entity(self, component_name: str) -> Optional[int]:
+        """シングルトンコンポーネントを保持するエンティティIDを取得"""
+        return self._singletons.get(component_name)
+
+    def use_column_storage(self, component_name: str, fields: Dict[str, Any]) -> ColumnStore:
+        """
+        指定コンポーネントの数値・状態フィールドを列指向ストレージ（NumPy配列）で保持するよう切り替える。
+        既存のコンポーネントも移行され、Systemからは従来通り属性アクセスで参照できる。
+        """
+        store = ColumnStore(fields)
+        self._column_stores[component_name] = store
+        for entity_id, components in self.entities.items():
+            if component_name in components:
+                components[component_name] = store.insert(entity_id, components[component_name])
+        return store
+
+    def get_column_store(self, component_name: str) -> Optional[ColumnStore]:
+        """列指向ストレージを取得（未使用ならNone）"""
+        return self._column_stores.get(component_name)
 
     def get_entities_with_components(self, *component_names: str) -> List[tuple]:
         """指定されたコンポーネントをすべて持つエンティティIDとそのコンポーネントDictのリストを取得"""
-        result = []
-        for entity_id, components in self.entities.items():
+        return list(self.query(*component_names))
+
+    def query(self, *component_names: str) -> Iterator[tuple]:
+        """
+        get_entities_with_components と同じ結果を、遅延中（begin_deferred() 以降）はコピーせずに
+        ライブなストレージ上の遅延イテレータで返す（反復中の構造変更は同期点で適用されるため安全）。
+        即時適用モードでは反復中の構造変更がキャッシュを直接変更するため、結果の複製を反復する。
+        結果はキャッシュの構築時期や追加の順序によらず、常にエンティティの生成順に並ぶ。
+        """
+        matched = self._query_cache.get(component_names)
+        if matched is None:
+            matched = self._build_query(component_names)
+        elif component_names in self._unordered_queries:
+            matched = self._sort_query(component_names)
+        if self._command_buffer is None:
+            return iter(list(matched.items()))
+        return iter(matched.items())
+
+    def _sort_query(self, component_names: Tuple[str, ...]) -> Dict[int, Dict[str, Component]]:
+        """生成順でない位置に追加されたクエリキャッシュを生成順に並べ直す"""
+        seq = self._entity_seq
+        matched = dict(sorted(self._query_cache[component_names].items(), key=lambda item: seq[item[0]]))
+        self._query_cache[component_names] = matched
+        self._unordered_queries.discard(component_names)
+        return matched
+
+    def _build_query(self, component_names: Tuple[str, ...]) -> Dict[int, Dict[str, Component]]:
+        """初回クエリ時に全エンティティを走査してキャッシュを構築し、以降は差分更新に任せる"""
+        # フォーク側では一致したエンティティだけを包むため、素のDictとして走査する
+        entities = self.entities
+        matched = {}
+        for entity_id, components in dict.items(entities):
             if all(name in components for name in component_names):
-                result.append((entity_id, components))
-        return result
\ No newline at end of file
+                matched[entity_id] = entities[entity_id]
+
+        self._query_cache[component_names] = matched
+        for name in set(component_names):
+            self._queries_by_component.setdefault(name, []).append(component_names)
+        return matched
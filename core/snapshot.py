@@ -0,0 +1,251 @@
+"""Worldの状態スナップショット（キーフレーム・差分）
+
+コンポーネントはデータのみを持つため、各インスタンスの属性辞書をそのまま複製して保存する。
+コンポーネントごとの直列化処理は持たず、クラスと属性辞書から復元する。
+"""
+
+import copy
+import random
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from core.ecs import World, ColumnStore, ColumnView, ForkView
+
+# エンティティID -> {コンポーネント名: (クラス, 属性辞書)}
+EntityStates = Dict[int, Dict[str, Tuple[type, Dict[str, Any]]]]
+
+class WorldSnapshot:
+    """ある時点のWorldの全状態（エンティティ・コンポーネント・ID管理・クエリ順・乱数状態）"""
+    def __init__(self, entities: EntityStates, generations: List[int], free_indices: List[int],
+                 singletons: Dict[str, Optional[int]], queries: Dict[Tuple[str, ...], List[int]],
+                 rng_states: Dict[str, tuple]):
+        self.entities = entities
+        self.generations = generations
+        self.free_indices = free_indices
+        self.singletons = singletons
+        self.queries = queries        # クエリキー -> エンティティIDの順序（反復順を再現するため）
+        self.rng_states = rng_states
+
+class SnapshotDelta:
+    """直前のスナップショットからの差分（変化した属性と構造変更のみ）"""
+    def __init__(self, order: List[int], changed: EntityStates, replaced: EntityStates,
+                 meta: Dict[str, Any]):
+        self.order = order        # エンティティIDの並び
+        self.changed = changed    # 構成が同じエンティティの、値が変わった属性のみ
+        self.replaced = replaced  # 新規、またはコンポーネント・属性の構成が変わったエンティティ（全体）
+        self.meta = meta          # 変化したWorldの管理情報（WorldSnapshotの属性名 -> 値。乱数状態は変化したストリームのみ）
+
+# 複製せずに共有してよい（不変な）属性値の型
+_IMMUTABLE_TYPES = (int, float, str, bool, type(None))
+
+def _copy_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """属性辞書を複製する（不変な値はそのまま共有し、リスト・辞書などのみ深く複製する）"""
+    return {name: value if type(value) in _IMMUTABLE_TYPES else copy.deepcopy(value)
+            for name, value in state.items()}
+
+def _component_state(component) -> Tuple[type, Dict[str, Any]]:
+    """コンポーネントのクラスと属性辞書を取得（列指向ストレージの値は配列から読み出す）"""
+    while isinstance(component, ForkView):
+        component = component._resolve()
+    if isinstance(component, ColumnView):
+        base = component._component
+        return type(base), {**vars(base), **component._store.read(component._slot)}
+    return type(component), dict(vars(component))
+
+def take_snapshot(world: World, entity_ids: Optional[Collection[int]] = None) -> WorldSnapshot:
+    """
+    Worldの現在の状態を複製して保存する（構造変更の遅延中は取得できない）。
+    entity_ids を指定した場合はそのエンティティのみを含む部分スナップショットになる
+    （別スレッドでの読み取り用。含まれないエンティティのシングルトンは未追加として扱われる）。
+    """
+    if world._command_buffer:
+        raise ValueError("Cannot take a snapshot while structural changes are pending")
+
+    entities = {}
+    for eid, components in world.entities.items():
+        if entity_ids is not None and eid not in entity_ids: continue
+        states = entities[eid] = {}
+        for name, component in components.items():
+            cls, state = _component_state(component)
+            states[name] = (cls, _copy_state(state))
+
+    return WorldSnapshot(
+        entities,
+        list(world.generations),
+        list(world._free_indices),
+        {name: eid if eid in entities else None for name, eid in world._singletons.items()},
+        {key: [eid for eid, _ in world.query(*key) if eid in entities] for key in list(world._query_cache)},
+        {stream: rng.getstate() for stream, rng in world._rng_streams.items()}
+    )
+
+def restore_snapshot(world: World, snapshot: WorldSnapshot) -> None:
+    """
+    Worldをスナップショットの状態に戻す。同じエンティティ・同じクラスのコンポーネントはインスタンスを再利用するため、
+    外部で保持している参照も（列指向ストレージのビューを除き）引き続き有効。
+    """
+    if world._command_buffer:
+        raise ValueError("Cannot restore a snapshot while structural changes are pending")
+
+    old_entities = world.entities
+    world.entities = {}
+    world._query_cache = {}
+    world._queries_by_component = {}
+    world._singletons = {name: None for name in snapshot.singletons}
+    for name, store in world._column_stores.items():
+        world._column_stores[name] = ColumnStore(store.fields)
+
+    for eid, states in snapshot.entities.items():
+        world.entities[eid] = {}
+        old_components = old_entities.get(eid, {})
+        for name, (cls, state) in states.items():
+            component = old_components.get(name)
+            if isinstance(component, ColumnView):
+                component = component._component
+            if type(component) is not cls:
+                component = cls.__new__(cls)
+            component.__dict__.clear()
+            component.__dict__.update(_copy_state(state))
+            world._apply_add_component(eid, component, name)
+
+    world._singletons = dict(snapshot.singletons)
+    world._entity_seq = {eid: seq for seq, eid in enumerate(world.entities)}
+    world._next_seq = len(world._entity_seq)
+    world._unordered_queries = set()
+    world.generations = list(snapshot.generations)
+    world._free_indices = list(snapshot.free_indices)
+
+    # クエリキャッシュは保存時の反復順（エンティティの生成順）のまま作り直す
+    for key, eids in snapshot.queries.items():
+        world._query_cache[key] = {eid: world.entities[eid] for eid in eids}
+        for name in set(key):
+            world._queries_by_component.setdefault(name, []).append(key)
+
+    world._rng_streams = {}
+    for stream, state in snapshot.rng_states.items():
+        rng = world._rng_streams[stream] = random.Random()
+        rng.setstate(state)
+
+def diff_snapshots(base: WorldSnapshot, target: WorldSnapshot) -> SnapshotDelta:
+    """base から target への差分を求める"""
+    changed: EntityStates = {}
+    replaced: EntityStates = {}
+    for eid, states in target.entities.items():
+        base_states = base.entities.get(eid)
+        if base_states is None or list(base_states) != list(states) or \
+                any(base_states[name][0] is not cls or base_states[name][1].keys() != state.keys()
+                    for name, (cls, state) in states.items()):
+            replaced[eid] = states
+            continue
+
+        for name, (cls, state) in states.items():
+            base_state = base_states[name][1]
+            fields = {field: value for field, value in state.items() if base_state[field] != value}
+            if fields:
+                changed.setdefault(eid, {})[name] = (cls, fields)
+
+    meta = {attr: getattr(target, attr)
+            for attr in ('generations', 'free_indices', 'singletons', 'queries')
+            if getattr(base, attr) != getattr(target, attr)}
+    rng_states = {stream: state for stream, state in target.rng_states.items()
+                  if base.rng_states.get(stream) != state}
+    if rng_states:
+        meta['rng_states'] = rng_states
+    return SnapshotDelta(list(target.entities), changed, replaced, meta)
+
+def apply_delta(base: WorldSnapshot, delta: SnapshotDelta) -> WorldSnapshot:
+    """base に差分を適用した新しいスナップショットを返す（base は変更しない）"""
+    entities: EntityStates = {}
+    for eid in delta.order:
+        if eid in delta.replaced:
+            entities[eid] = delta.replaced[eid]
+            continue
+
+        states = dict(base.entities[eid])
+        for name, (cls, fields) in delta.changed.get(eid, {}).items():
+            states[name] = (cls, {**states[name][1], **fields})
+        entities[eid] = states
+
+    return WorldSnapshot(
+        entities,
+        delta.meta.get('generations', base.generations),
+        delta.meta.get('free_indices', base.free_indices),
+        delta.meta.get('singletons', base.singletons),
+        delta.meta.get('queries', base.queries),
+        {**base.rng_states, **delta.meta.get('rng_states', {})}
+    )
+
+class SnapshotTimeline:
+    """
+    tickごとのWorldの状態を、keyframe_interval ごとのキーフレームと、
+    その間 delta_interval ごとの差分（直前のチェックポイントから）として保持する。
+    """
+    def __init__(self, keyframe_interval: int = 600, delta_interval: int = 60):
+        if keyframe_interval % delta_interval:
+            raise ValueError("keyframe_interval must be a multiple of delta_interval")
+        self.keyframe_interval = keyframe_interval
+        self.delta_interval = delta_interval
+        self.keyframes: Dict[int, WorldSnapshot] = {}
+        self.deltas: Dict[int, SnapshotDelta] = {}
+        self._last: Optional[Tuple[int, WorldSnapshot]] = None  # 直前に記録したチェックポイント
+
+    def is_checkpoint(self, tick: int) -> bool:
+        return tick % self.delta_interval == 0
+
+    def _is_recorded(self, tick: int) -> bool:
+        return tick in self.keyframes or tick in self.deltas
+
+    def record(self, tick: int, world: World) -> None:
+        """チェックポイントのtickであれば状態を記録する（チェックポイントは順に通過する前提）"""
+        if not self.is_checkpoint(tick):
+            return
+        if self._is_recorded(tick):
+            # 記録済みの区間を再生し直している場合、未記録の区間に入る直前でのみ差分の基点を取り直す
+            if not self._is_recorded(tick + self.delta_interval):
+                self._last = (tick, take_snapshot(world))
+            return
+
+        snapshot = take_snapshot(world)
+        if tick % self.keyframe_interval == 0:
+            self.keyframes[tick] = snapshot
+        else:
+            previous = tick - self.delta_interval
+            if self._last is None or self._last[0] != previous:
+                # 差分の基点が無ければ記録しない（チェックポイントは順に記録される前提）
+                return
+            self.deltas[tick] = diff_snapshots(self._last[1], snapshot)
+        self._last = (tick, snapshot)
+
+    def _keyframe_before(self, tick: int) -> Optional[int]:
+        keyframe_tick = tick - tick % self.keyframe_interval
+        while keyframe_tick >= 0 and keyframe_tick not in self.keyframes:
+            keyframe_tick -= self.keyframe_interval
+        return keyframe_tick if keyframe_tick >= 0 else None
+
+    def latest_checkpoint(self, tick: int) -> Optional[int]:
+        """tick 以前で最も近い記録済みチェックポイントのtick（無ければ None）"""
+        found_tick = self._keyframe_before(tick)
+        if found_tick is None:
+            return None
+        while found_tick + self.delta_interval <= tick and found_tick + self.delta_interval in self.deltas:
+            found_tick += self.delta_interval
+        return found_tick
+
+    def nearest(self, tick: int) -> Optional[Tuple[int, WorldSnapshot]]:
+        """tick 以前で最も近い記録済みチェックポイントの (tick, スナップショット) を返す"""
+        found_tick = self.latest_checkpoint(tick)
+        if found_tick is None:
+            return None
+
+        keyframe_tick = self._keyframe_before(found_tick)
+        snapshot = self.keyframes[keyframe_tick]
+        for delta_tick in range(keyframe_tick + self.delta_interval, found_tick + 1, self.delta_interval):
+            snapshot = apply_delta(snapshot, self.deltas[delta_tick])
+        return found_tick, snapshot
+
+    def restore(self, world: World, tick: int) -> Optional[int]:
+        """tick 以前で最も近いチェックポイントへWorldを戻し、そのtickを返す（無ければ None）"""
+        found = self.nearest(tick)
+        if found is None:
+            return None
+        restore_snapshot(world, found[1])
+        self._last = found
+        return found[0]
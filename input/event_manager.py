@@ -8,10 +8,9 @@ class EventManager:
     """Pygameイベントを論理入力（InputComponent）に変換する"""
     def __init__(self, world: World):
         self.world = world
-        inputs = self.world.get_entities_with_components('input')
-        if inputs:
-            self.input_entity_id = inputs[0][0]
-        else:
+        self.world.register_singleton('input')
+        self.input_entity_id = self.world.get_singleton_entity('input')
+        if self.input_entity_id is None:
             self.input_entity_id = self.world.create_entity()
             self.world.add_component(self.input_entity_id, InputComponent())
 
@@ -1,6 +1,7 @@
 """バトル画面のシーンラッパー"""
 
 import pygame
+from config import PROFILER_PARAMS
 from battle.manager import BattleSystem
 from input.event_manager import EventManager
 
@@ -9,7 +10,8 @@ class BattleScene:
 
     def __init__(self, screen):
         self.screen = screen
-        self.battle_system = BattleSystem(screen)
+        # 操作中にAIの思考でフレームが止まらないよう、思考はワーカースレッドで行う
+        self.battle_system = BattleSystem(screen, profile=PROFILER_PARAMS['ENABLED'], threaded_ai=True)
         self.event_manager = EventManager(self.battle_system.world)
         self.running = True
 
@@ -18,16 +20,24 @@ class BattleScene:
         # EventManagerを通じてバトルシステムのイベントを処理
         running = self.event_manager.handle_events()
         if not running:
+            self._close()
             return 'quit'
         
         # InputComponentを取得して共通操作（中断）を確認
         input_comp = self.battle_system.world.entities[self.event_manager.input_entity_id]['input']
         
         if input_comp.btn_menu: # ESCキーなど
+            self._close()
             return 'title'
             
         return None
 
+    def _close(self):
+        """シーン終了時の処理（プロファイラ有効時は計測結果をJSON出力する）"""
+        if self.battle_system.profiler:
+            self.battle_system.profiler.dump_json(PROFILER_PARAMS['OUTPUT_PATH'])
+        self.battle_system.close()
+
     def update(self, dt):
         """更新処理"""
         # バトルシステムの更新
@@ -0,0 +1,80 @@
+"""リプレイ再生画面のシーン"""
+
+import pygame
+from core.snapshot import SnapshotTimeline
+from battle.manager import BattleSystem
+from battle.replay import Replay
+
+class ReplayScene:
+    """
+    記録済みの試合をバトル画面で再生するシーン。
+    Space: 一時停止 / ←→: シーク / ↑↓: 再生速度 / Esc: 終了
+    再生しながら一定間隔でWorldのキーフレーム・差分を記録し、シーク時は最寄りのチェックポイントから再生し直す。
+    """
+    SEEK_TICKS = 300   # 1回のシーク量（tick）
+    MAX_SPEED = 16
+
+    def __init__(self, screen, replay: Replay):
+        self.screen = screen
+        self.replay = replay
+        self.speed = 1
+        self.paused = False
+        self.timeline = SnapshotTimeline()
+        self._restart()
+
+    def _restart(self):
+        self.battle_system = BattleSystem(self.screen, replay=self.replay)
+        self.timeline.record(0, self.battle_system.world)
+
+    def _step(self, dt: float = 0.016):
+        """描画なしで1tick進め、チェックポイントであれば状態を記録する"""
+        self.battle_system.update(dt, render=False)
+        self.timeline.record(self.tick, self.battle_system.world)
+
+    @property
+    def tick(self) -> int:
+        return self.battle_system.world.get_singleton('replay').tick
+
+    def seek(self, tick: int):
+        """指定tickへ移動する（記録済みの最寄りチェックポイントへ戻し、残りを描画なしで再生する）"""
+        tick = max(0, min(tick, self.replay.ticks))
+        checkpoint = self.timeline.latest_checkpoint(tick)
+        if checkpoint is not None and (tick < self.tick or checkpoint > self.tick):
+            self.timeline.restore(self.battle_system.world, tick)
+        while self.tick < tick:
+            self._step()
+
+    def handle_events(self):
+        """イベント処理"""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return 'quit'
+            if event.type != pygame.KEYDOWN:
+                continue
+
+            if event.key == pygame.K_ESCAPE:
+                return 'quit'
+            elif event.key == pygame.K_SPACE:
+                self.paused = not self.paused
+            elif event.key == pygame.K_RIGHT:
+                self.seek(self.tick + self.SEEK_TICKS)
+            elif event.key == pygame.K_LEFT:
+                self.seek(self.tick - self.SEEK_TICKS)
+            elif event.key == pygame.K_UP:
+                self.speed = min(self.MAX_SPEED, self.speed * 2)
+            elif event.key == pygame.K_DOWN:
+                self.speed = max(1, self.speed // 2)
+        return None
+
+    def update(self, dt):
+        """更新処理（dtはリプレイに記録されたものが使われる）"""
+        if self.paused: return
+        for _ in range(self.speed):
+            if self.tick >= self.replay.ticks: break
+            self._step(dt)
+
+    def render(self):
+        """最新の状態を描画し、再生位置をウィンドウタイトルに表示する"""
+        self.battle_system.render_system.update(0.0)
+        state = "PAUSE" if self.paused else f"x{self.speed}"
+        pygame.display.set_caption(f"Medarot-P Replay {self.tick}/{self.replay.ticks} {state}")
@@ -0,0 +1 @@
+"""Headless battle simulation tools"""
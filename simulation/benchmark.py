@@ -0,0 +1,344 @@
+"""
+固定シードのシナリオでバトルの性能を計測するベンチマーク（コマンドライン用）
+
+使い方:
+    python -m simulation.benchmark --save-baseline          # 現在の計測値をベースラインとして保存
+    python -m simulation.benchmark --threshold 0.1          # ベースラインと比較し、10%以上の悪化を報告
+
+計測項目:
+    battles_per_sec        ヘッドレス自動バトル（time_skip有効）の1秒あたり試合数
+    frame_ms.<System>      固定ステップ実行時のシステム別1回あたり処理時間
+    frame_ms.total         1フレームあたりの全システム合計時間
+    create_teams_ms        BattleEntityFactory.create_teams 1回の所要時間
+    cutin_draw_ms          オフスクリーンSurfaceへの CutinRenderer.draw 1回の所要時間（pygameが必要）
+    peak_memory_kib        1試合あたりのピークメモリ（tracemalloc）
+    resolve_attack_us.<path>   1攻撃あたりの判定時間（scalar: CombatService.resolve_attack を1件ずつ、
+                           batch: CombatService.resolve_attacks で --attacks 件を一括）
+    large_battle_ms.<storage>  大人数（--large-units 対 --large-units）の固定ステップ実行の1tickあたり時間
+                           （objects / columns の両方を計測。列指向ストレージは機体数が多い場合のみ速い）
+    large_battle_column_speedup  上記の objects / columns の比（1より大きければ列指向ストレージが速い）
+    search_decision_ms.<stat>  探索方針（SearchStrategy）の1回の決定の所要時間（p50 / max）
+    search_budget_hit_rate 評価数の上限（evaluation_budget）まで使った決定の割合
+
+ベースラインと比較して threshold を超えて悪化した項目があれば終了コード1を返す。
+計測値は実行環境に依存するため、ベースラインは同じマシン上で作成したものと比較すること。
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, Any, Callable, List
+
+from core.ecs import World, import_numpy
+from battle.manager import BattleSystem
+from battle.presentation import auto_presentation
+from battle.entity_factory import BattleEntityFactory
+from battle.constants import BattlePhase, PartType, TraitType
+from battle.matchup_table import pack_attack
+from battle.service.combat_service import CombatService
+from battle.ai.strategy import SearchStrategy
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.10
+DT = 1.0 / 60
+MAX_TICKS = 100000
+
+def _metric(value: float, unit: str, higher_is_better: bool = False) -> Dict[str, Any]:
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+def _best_of(repeats: int, func: Callable[[], float]) -> float:
+    """func（所要秒数を返す）を repeats 回実行し、最短値を返す（揺らぎの影響を抑える）"""
+    return min(func() for _ in range(repeats))
+
+def _run_battle(seed: int, time_skip: bool, column_storage: bool, profile: bool = False) -> BattleSystem:
+    """自動進行のヘッドレスバトルを決着まで実行する"""
+    battle = BattleSystem(presentation=auto_presentation(), time_skip=time_skip,
+                          column_storage=column_storage, profile=profile, seed=seed)
+    flow = battle.world.get_singleton('battleflow')
+    ticks = 0
+    while flow.current_phase != BattlePhase.GAME_OVER and ticks < MAX_TICKS:
+        battle.update(DT)
+        ticks += 1
+    return battle
+
+def bench_battle_throughput(seeds: List[int], repeats: int, column_storage: bool) -> Dict[str, Any]:
+    def run():
+        start = time.perf_counter()
+        for seed in seeds:
+            _run_battle(seed, True, column_storage)
+        return time.perf_counter() - start
+
+    elapsed = _best_of(repeats, run)
+    return {'battles_per_sec': _metric(len(seeds) / elapsed, "battles/s", higher_is_better=True)}
+
+def bench_system_frame_time(seeds: List[int], column_storage: bool) -> Dict[str, Any]:
+    totals: Dict[str, List[float]] = {}
+    frames = 0
+    for seed in seeds:
+        profiler = _run_battle(seed, False, column_storage, profile=True).profiler
+        frames += profiler.sampled_frames
+        for name, stats in profiler.systems.items():
+            entry = totals.setdefault(name, [0.0, 0])
+            entry[0] += stats.total
+            entry[1] += stats.calls
+
+    metrics = {f"frame_ms.{name}": _metric(total * 1000.0 / calls, "ms")
+               for name, (total, calls) in sorted(totals.items())}
+    metrics['frame_ms.total'] = _metric(sum(total for total, _ in totals.values()) * 1000.0 / frames, "ms")
+    return metrics
+
+def bench_create_teams(iterations: int, repeats: int, column_storage: bool) -> Dict[str, Any]:
+    def run():
+        elapsed = 0.0
+        for seed in range(iterations):
+            world = World(seed)
+            if column_storage:
+                BattleEntityFactory.use_column_storage(world)
+            BattleEntityFactory.create_battle_context(world)
+            start = time.perf_counter()
+            BattleEntityFactory.create_teams(world, 3, 3, 50, 450, 100, 120, 300, 40)
+            elapsed += time.perf_counter() - start
+        return elapsed
+
+    elapsed = _best_of(repeats, run)
+    return {'create_teams_ms': _metric(elapsed * 1000.0 / iterations, "ms")}
+
+def bench_cutin_draw(frames: int, repeats: int) -> Dict[str, Any]:
+    """カットイン描画をオフスクリーンSurfaceに対して計測する（pygameが無ければ省略）"""
+    try:
+        import pygame
+    except ImportError:
+        print("pygame が無いため cutin_draw_ms を省略します", file=sys.stderr)
+        return {}
+    from config import GAME_PARAMS
+    from ui.cutin_renderer import CutinRenderer
+
+    pygame.font.init()
+    surface = pygame.Surface((GAME_PARAMS['SCREEN_WIDTH'], GAME_PARAMS['SCREEN_HEIGHT']))
+    renderer = CutinRenderer(surface)
+
+    hp_data = [{'key': key, 'label': key, 'current': 30, 'max': 50, 'ratio': 0.6}
+               for key in ("head", "right_arm", "left_arm", "legs")]
+    attacker = {'name': "ATTACKER", 'color': (60, 120, 220)}
+    target = {'name': "TARGET", 'color': (220, 60, 60)}
+    hit_result = {'is_hit': True, 'is_critical': False, 'is_defense': False, 'damage': 20,
+                  'hit_part': "head", 'stop_duration': 0.0}
+    traits = [TraitType.RIFLE, TraitType.SWORD]
+
+    def run():
+        start = time.perf_counter()
+        for i in range(frames):
+            progress = (i % 100) / 99
+            renderer.draw(attacker, target, hp_data, hp_data, progress, hit_result,
+                          mirror=bool(i % 2), attack_trait=traits[i % len(traits)])
+        return time.perf_counter() - start
+
+    elapsed = _best_of(repeats, run)
+    return {'cutin_draw_ms': _metric(elapsed * 1000.0 / frames, "ms")}
+
+def bench_peak_memory(seeds: List[int], column_storage: bool) -> Dict[str, Any]:
+    peaks = []
+    for seed in seeds:
+        tracemalloc.start()
+        _run_battle(seed, True, column_storage)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {'peak_memory_kib': _metric(sum(peaks) / len(peaks) / 1024.0, "KiB")}
+
+def bench_combat_resolution(attacks: int, repeats: int) -> Dict[str, Any]:
+    """3対3の全攻撃パーツ×全ターゲットの攻撃を attacks 件並べ、1件ずつの判定と一括判定の1件あたり時間を比べる"""
+    try:
+        import_numpy()
+    except ImportError:
+        print("NumPy が無いため resolve_attack_us を省略します", file=sys.stderr)
+        return {}
+    world = BattleSystem(presentation=auto_presentation(), seed=0).world
+    units = [(eid, comps) for eid, comps in world.query('partlist', 'team', 'aliveparts')]
+    pairs = []
+    for eid, comps in units:
+        for part_eid in comps['partlist'].parts.values():
+            part_comps = world.entities[part_eid]
+            if 'attack' not in part_comps: continue
+            pairs.extend((comps, part_comps, target_comps) for _, target_comps in units
+                         if target_comps['team'].team_type != comps['team'].team_type)
+    records = [pack_attack(world, atk, part, target, PartType.HEAD) for atk, part, target in pairs]
+    records = (records * (attacks // len(records) + 1))[:attacks]
+
+    def run_scalar():
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for record in records:
+            CombatService.resolve_attack(record, rng)
+        return time.perf_counter() - start
+
+    def run_batch():
+        rng = random.Random(0)
+        start = time.perf_counter()
+        CombatService.resolve_attacks(records, rng)
+        return time.perf_counter() - start
+
+    return {
+        'resolve_attack_us.scalar': _metric(_best_of(repeats, run_scalar) * 1e6 / attacks, "us"),
+        'resolve_attack_us.batch': _metric(_best_of(repeats, run_batch) * 1e6 / attacks, "us"),
+    }
+
+def bench_large_battle(units: int, ticks: int, repeats: int) -> Dict[str, Any]:
+    """
+    units 対 units のヘッドレスバトルを固定ステップで最大 ticks tick 進め、
+    オブジェクト／列指向ストレージの1tickあたりの時間を比べる（同じシード・編成のため両者は同じ試合になる）。
+    """
+    try:
+        import_numpy()
+    except ImportError:
+        print("NumPy が無いため large_battle_ms を省略します", file=sys.stderr)
+        return {}
+    setups = BattleEntityFactory.create_random_setups(units * 2, random.Random(units))
+
+    def run(column_storage: bool) -> float:
+        battle = BattleSystem(presentation=auto_presentation(), column_storage=column_storage, seed=units,
+                              player_setups=setups[:units], enemy_setups=setups[units:])
+        flow = battle.world.get_singleton('battleflow')
+        start = time.perf_counter()
+        for tick in range(ticks):
+            if flow.current_phase == BattlePhase.GAME_OVER:
+                break
+            battle.update(DT)
+        return (time.perf_counter() - start) / (tick + 1)
+
+    objects = _best_of(repeats, lambda: run(False))
+    columns = _best_of(repeats, lambda: run(True))
+    return {
+        'large_battle_ms.objects': _metric(objects * 1000.0, "ms"),
+        'large_battle_ms.columns': _metric(columns * 1000.0, "ms"),
+        'large_battle_column_speedup': _metric(objects / columns, "x", higher_is_better=True),
+    }
+
+def bench_search_decisions(seeds: List[int]) -> Dict[str, Any]:
+    """自動バトルの各ターンの開始時点で、同じ状態に対する探索方針の決定を計測する（決定はバトルには反映しない）"""
+    times, hits = [], 0
+    for seed in seeds:
+        battle = BattleSystem(presentation=auto_presentation(), time_skip=True, seed=seed)
+        world = battle.world
+        flow = world.get_singleton('battleflow')
+        context = world.get_singleton('battlecontext')
+        last_eid = None
+        for _ in range(MAX_TICKS):
+            if flow.current_phase == BattlePhase.GAME_OVER:
+                break
+            eid = context.current_turn_entity_id
+            if flow.current_phase in (BattlePhase.ENEMY_TURN, BattlePhase.INPUT) and eid is not None and eid != last_eid:
+                strategy = SearchStrategy()
+                start = time.perf_counter()
+                strategy.decide_action(world, eid)
+                times.append(time.perf_counter() - start)
+                hits += strategy.evaluations >= strategy.evaluation_budget
+            last_eid = eid
+            battle.update(DT)
+
+    times.sort()
+    return {
+        'search_decision_ms.p50': _metric(times[len(times) // 2] * 1000.0, "ms"),
+        'search_decision_ms.max': _metric(times[-1] * 1000.0, "ms"),
+        'search_budget_hit_rate': _metric(hits / len(times), "ratio"),
+    }
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    seeds = list(range(args.seed, args.seed + args.battles))
+    metrics: Dict[str, Any] = {}
+    metrics.update(bench_battle_throughput(seeds, args.repeats, args.column_storage))
+    metrics.update(bench_system_frame_time(seeds, args.column_storage))
+    metrics.update(bench_create_teams(args.team_iterations, args.repeats, args.column_storage))
+    if not args.skip_render:
+        metrics.update(bench_cutin_draw(args.cutin_frames, args.repeats))
+    metrics.update(bench_peak_memory(seeds, args.column_storage))
+    metrics.update(bench_search_decisions(seeds))
+    if args.attacks > 0:
+        metrics.update(bench_combat_resolution(args.attacks, args.repeats))
+    if args.large_units > 0:
+        metrics.update(bench_large_battle(args.large_units, args.large_ticks, args.repeats))
+
+    return {
+        'params': {
+            'battles': args.battles, 'seed': args.seed, 'repeats': args.repeats,
+            'team_iterations': args.team_iterations, 'cutin_frames': args.cutin_frames,
+            'column_storage': args.column_storage,
+            'attacks': args.attacks, 'large_units': args.large_units, 'large_ticks': args.large_ticks,
+        },
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'metrics': metrics,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """ベースラインと比較して結果を表示し、threshold を超えて悪化した項目名を返す"""
+    if current['params'] != baseline.get('params'):
+        print("警告: ベースラインと計測条件が異なります", baseline.get('params'), file=sys.stderr)
+
+    regressions = []
+    base_metrics = baseline.get('metrics', {})
+    print(f"{'metric':<40}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, metric in current['metrics'].items():
+        base = base_metrics.get(name)
+        if base is None or not base['value']:
+            print(f"{name:<40}{'-':>12}{metric['value']:>12.4f}{'new':>10}")
+            continue
+
+        change = metric['value'] / base['value'] - 1.0
+        worse = -change if metric['higher_is_better'] else change
+        mark = ""
+        if worse > threshold:
+            regressions.append(name)
+            mark = "  REGRESSION"
+        print(f"{name:<40}{base['value']:>12.4f}{metric['value']:>12.4f}{change:>+10.1%}{mark}")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="固定シードのバトル性能ベンチマーク")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="ベースラインファイルのパス")
+    parser.add_argument('--save-baseline', action='store_true', help="計測結果をベースラインとして保存する")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="悪化とみなす変化率（0.1 = 10%%）")
+    parser.add_argument('--battles', type=int, default=10, help="シナリオあたりの試合数")
+    parser.add_argument('--seed', type=int, default=0, help="最初の試合のシード（以降は連番）")
+    parser.add_argument('--repeats', type=int, default=3, help="時間計測の繰り返し回数（最短値を採用）")
+    parser.add_argument('--team-iterations', type=int, default=200, help="create_teams の計測回数")
+    parser.add_argument('--cutin-frames', type=int, default=200, help="カットイン描画の計測フレーム数")
+    parser.add_argument('--column-storage', action='store_true', help="列指向ストレージを有効にして計測する")
+    parser.add_argument('--attacks', type=int, default=10000, help="攻撃判定の計測件数（0で省略）")
+    parser.add_argument('--large-units', type=int, default=100, help="大人数バトルの1チームの機体数（0で省略）")
+    parser.add_argument('--large-ticks', type=int, default=3000, help="大人数バトルで進める最大tick数")
+    parser.add_argument('--skip-render', action='store_true', help="描画系の計測を省略する")
+    parser.add_argument('--output', help="計測結果をJSONで書き出すパス")
+    args = parser.parse_args(argv)
+
+    result = run_benchmarks(args)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"ベースラインを保存しました: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"ベースライン {args.baseline} が無いため比較を省略します（--save-baseline で作成）", file=sys.stderr)
+        for name, metric in result['metrics'].items():
+            print(f"{name:<40}{metric['value']:>12.4f} {metric['unit']}")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(result, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)}項目で {args.threshold:.0%} を超える悪化: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+記録済みリプレイの再生（コマンドライン用）
+
+使い方:
+    python -m simulation.replay replays.jsonl.gz --index 12          # ヘッドレスで最速再生し、結果を表示
+    python -m simulation.replay replays.jsonl.gz --index 12 --view   # バトル画面で再生（シーク可能）
+
+リプレイファイルは battle.replay.save_replays の形式（tournament の --replays で出力される）。
+"""
+
+import argparse
+import json
+import sys
+
+from battle.manager import BattleSystem
+from battle.replay import Replay, load_replays
+
+def play_headless(replay: Replay) -> BattleSystem:
+    """記録されたtick数だけ最速で再生し、終了時点のバトルを返す"""
+    battle = BattleSystem(replay=replay)
+    for _ in range(replay.ticks):
+        battle.update()
+    return battle
+
+def view(replay: Replay) -> None:
+    """pygameのウィンドウでリプレイを再生する"""
+    import pygame
+    from config import SCREEN_WIDTH, SCREEN_HEIGHT, GAME_PARAMS
+    from scenes.replay_scene import ReplayScene
+
+    pygame.init()
+    try:
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        scene = ReplayScene(screen, replay)
+        clock = pygame.time.Clock()
+        while scene.handle_events() != 'quit':
+            clock.tick(GAME_PARAMS['FPS'])
+            scene.update(1.0 / GAME_PARAMS['FPS'])
+            scene.render()
+    finally:
+        pygame.quit()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="記録済みのバトルを再生する")
+    parser.add_argument('path', help="リプレイファイル（JSON Lines、.gz可）")
+    parser.add_argument('--index', type=int, default=0, help="ファイル内の何試合目を再生するか")
+    parser.add_argument('--view', action='store_true', help="バトル画面で再生する")
+    args = parser.parse_args(argv)
+
+    replay = load_replays(args.path)[args.index]
+    if args.view:
+        view(replay)
+        return
+
+    world = play_headless(replay).world
+    flow = world.get_singleton('battleflow')
+    result = {
+        'seed': replay.seed,
+        'ticks': replay.ticks,
+        'winner': flow.winner,
+        'recorded_winner': replay.winner,
+        'turns': world.get_singleton('battlestats').turn_count,
+        'battle_log': world.get_singleton('battlecontext').battle_log,
+    }
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+if __name__ == '__main__':
+    main()
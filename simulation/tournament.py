@@ -0,0 +1,180 @@
+"""
+AI同士のバトルを大量に実行するトーナメントランナー（コマンドライン用）
+
+使い方:
+    python -m simulation.tournament teams.json --repeats 100 --workers 8 --output results.jsonl
+    python -m simulation.tournament teams.json --replays replays.jsonl.gz   # 全試合のリプレイも保存
+    python -m simulation.tournament teams.json --enemy-strategy search    # エネミー側を探索方針で操作
+
+teams.json の形式（各機体は BattleEntityFactory.create_medabot_from_setup と同じsetup）:
+    {
+        "teams": {
+            "team_a": [{"medal": "medal_001", "parts": {"head": "head_001", ...}}, ...],
+            "team_b": [...]
+        },
+        "matches": [["team_a", "team_b"]]   # 省略時は全チームの総当たり（先攻・後攻の両方）
+    }
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+from itertools import permutations
+from typing import Dict, Any, Iterator, List, Tuple
+
+from battle.manager import BattleSystem
+from battle.replay import open_replay_file
+from battle.presentation import auto_presentation
+from battle.constants import BattlePhase, TeamType
+
+# BattleFlowComponent.winner（表示用文字列）からチーム種別への対応
+WINNER_TEAMS = {"プレイヤー": TeamType.PLAYER, "エネミー": TeamType.ENEMY}
+
+DEFAULT_DT = 1.0 / 60
+DEFAULT_MAX_TICKS = 100000
+
+def run_battle(task: Tuple[int, int, str, str, List[dict], List[dict], float, int, bool, Tuple[str, str]]) -> Dict[str, Any]:
+    """1試合をヘッドレスで最後まで実行し、結果を返す（ワーカープロセスで実行される）"""
+    index, seed, player_name, enemy_name, player_setups, enemy_setups, dt, max_ticks, record_replay, strategies = task
+
+    battle = BattleSystem(
+        presentation=auto_presentation(*strategies), time_skip=True,
+        player_setups=player_setups, enemy_setups=enemy_setups, seed=seed,
+        record_replay=record_replay
+    )
+    world = battle.world
+    flow = world.get_singleton('battleflow')
+
+    ticks = 0
+    while flow.current_phase != BattlePhase.GAME_OVER and ticks < max_ticks:
+        battle.update(dt)
+        ticks += 1
+
+    # 攻撃パーツごとの与ダメージをカタログIDで集計
+    part_damage: Dict[str, int] = {}
+    for part_eid, damage in world.get_singleton('battlestats').damage_dealt.items():
+        part_id = world.entities[part_eid]['part'].part_id
+        part_damage[part_id] = part_damage.get(part_id, 0) + damage
+
+    winner_team = WINNER_TEAMS.get(flow.winner)
+    winner = {TeamType.PLAYER: player_name, TeamType.ENEMY: enemy_name}.get(winner_team)
+
+    result = {
+        'index': index,
+        'seed': seed,
+        'player': player_name,
+        'enemy': enemy_name,
+        'winner': winner,
+        'turns': world.get_singleton('battlestats').turn_count,
+        'ticks': ticks,
+        'part_damage': part_damage,
+    }
+    if record_replay:
+        result['replay'] = battle.export_replay().dumps()
+    return result
+
+def derive_seed(master_seed: int, index: int) -> int:
+    """マスターシードと試合番号から試合ごとのシードを決める（ワーカー構成に依存しない）"""
+    return random.Random(f"{master_seed}:{index}").getrandbits(63)
+
+def generate_tasks(teams: Dict[str, List[dict]], matches: List[List[str]], repeats: int,
+                   seed: int, dt: float, max_ticks: int, record_replays: bool = False,
+                   strategies: Tuple[str, str] = ("random", "random")) -> Iterator[tuple]:
+    """試合タスクを遅延生成する（大量試合でもメモリに展開しない）。strategies は (プレイヤー側, エネミー側) の方針ID"""
+    index = 0
+    for _ in range(repeats):
+        for player_name, enemy_name in matches:
+            yield (index, derive_seed(seed, index), player_name, enemy_name,
+                   teams[player_name], teams[enemy_name], dt, max_ticks, record_replays, strategies)
+            index += 1
+
+def run_tournament(teams: Dict[str, List[dict]], matches: List[List[str]], repeats: int = 1,
+                   seed: int = 0, workers: int = None, chunk_size: int = 32,
+                   dt: float = DEFAULT_DT, max_ticks: int = DEFAULT_MAX_TICKS,
+                   record_replays: bool = False,
+                   strategies: Tuple[str, str] = ("random", "random")) -> Iterator[Dict[str, Any]]:
+    """
+    全試合をプロセスプールに分配し、終わった順に結果をストリームで返す。
+    workers=1 の場合はプールを使わず現在のプロセスで実行する。
+    record_replays=True の場合、各結果の 'replay' にリプレイ（1行のJSON文字列）が入る。
+    """
+    tasks = generate_tasks(teams, matches, repeats, seed, dt, max_ticks, record_replays, strategies)
+    if workers == 1:
+        yield from map(run_battle, tasks)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(run_battle, tasks, chunksize=chunk_size)
+
+class TournamentSummary:
+    """ストリームされた試合結果を集計する"""
+    def __init__(self):
+        self.battles = 0
+        self.wins: Dict[str, int] = {}
+        self.appearances: Dict[str, int] = {}
+        self.total_turns = 0
+        self.part_damage: Dict[str, int] = {}
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.battles += 1
+        self.total_turns += result['turns']
+        for name in (result['player'], result['enemy']):
+            self.appearances[name] = self.appearances.get(name, 0) + 1
+        if result['winner']:
+            self.wins[result['winner']] = self.wins.get(result['winner'], 0) + 1
+        for part_id, damage in result['part_damage'].items():
+            self.part_damage[part_id] = self.part_damage.get(part_id, 0) + damage
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'battles': self.battles,
+            'win_rates': {name: self.wins.get(name, 0) / count for name, count in self.appearances.items()},
+            'mean_turns': self.total_turns / self.battles if self.battles else 0.0,
+            'part_damage': dict(sorted(self.part_damage.items(), key=lambda item: item[1], reverse=True)),
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI同士のバトルを並列に大量実行する")
+    parser.add_argument('spec', help="チーム編成と対戦カードを記述したJSONファイル")
+    parser.add_argument('--repeats', type=int, default=1, help="各対戦カードの試合数")
+    parser.add_argument('--seed', type=int, default=0, help="マスターシード（試合ごとのシードはここから導出される）")
+    parser.add_argument('--workers', type=int, default=None, help="ワーカープロセス数（既定: CPUコア数）")
+    parser.add_argument('--chunk-size', type=int, default=32, help="ワーカーへ一度に渡す試合数")
+    parser.add_argument('--max-ticks', type=int, default=DEFAULT_MAX_TICKS, help="1試合の最大tick数（超えたら引き分け）")
+    parser.add_argument('--output', help="試合ごとの結果を書き出すJSON Linesファイル")
+    parser.add_argument('--replays', help="全試合のリプレイを書き出すJSON Linesファイル（.gz で圧縮、行の順序は --output と同じ）")
+    parser.add_argument('--player-strategy', default="random", help="プレイヤー側のコマンダー方針（random / search）")
+    parser.add_argument('--enemy-strategy', default="random", help="エネミー側のコマンダー方針（random / search）")
+    args = parser.parse_args(argv)
+
+    with open(args.spec, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    teams = spec['teams']
+    matches = spec.get('matches') or [list(pair) for pair in permutations(teams, 2)]
+
+    summary = TournamentSummary()
+    out = open(args.output, 'w', encoding='utf-8') if args.output else None
+    replay_out = open_replay_file(args.replays, 'w') if args.replays else None
+    try:
+        for result in run_tournament(teams, matches, args.repeats, args.seed, args.workers, args.chunk_size,
+                                     max_ticks=args.max_ticks, record_replays=bool(replay_out),
+                                     strategies=(args.player_strategy, args.enemy_strategy)):
+            summary.add(result)
+            replay = result.pop('replay', None)
+            if replay_out:
+                replay_out.write(replay + "\n")
+            if out:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if out:
+            out.close()
+        if replay_out:
+            replay_out.close()
+
+    json.dump(summary.to_dict(), sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+if __name__ == '__main__':
+    main()
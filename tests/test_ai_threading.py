@@ -0,0 +1,34 @@
+"""AIの思考をワーカースレッドで行った場合の再現性のテスト"""
+
+import pytest
+
+from battle.manager import BattleSystem
+from battle.presentation import auto_presentation
+from battle.constants import BattlePhase
+
+MAX_TICKS = 100000
+
+def run_battle(seed: int, threaded_ai: bool, strategy_id: str):
+    battle = BattleSystem(presentation=auto_presentation(strategy_id, strategy_id), seed=seed,
+                          threaded_ai=threaded_ai, record_replay=True)
+    flow = battle.world.get_singleton('battleflow')
+    try:
+        for _ in range(MAX_TICKS):
+            if flow.current_phase == BattlePhase.GAME_OVER:
+                break
+            battle.update(1.0 / 60)
+    finally:
+        battle.close()
+    return battle.export_replay().to_dict()
+
+@pytest.mark.parametrize("strategy_id", ["random", "search"])
+@pytest.mark.parametrize("seed", [3, 7])
+def test_threaded_ai_matches_sync(seed, strategy_id):
+    sync = run_battle(seed, False, strategy_id)
+    assert sync['winner'] is not None
+    for _ in range(2):
+        assert run_battle(seed, True, strategy_id) == sync
+
+def test_think_ticks_must_be_non_negative():
+    with pytest.raises(ValueError):
+        BattleSystem(presentation=auto_presentation(), seed=0, ai_think_ticks=-1)
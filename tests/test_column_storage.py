@@ -0,0 +1,79 @@
+"""列指向ストレージ（ColumnStore）のテスト"""
+
+import pytest
+
+from core.ecs import Component, World
+from battle.manager import BattleSystem
+from battle.presentation import auto_presentation
+from battle.constants import BattlePhase
+
+pytest.importorskip("numpy")
+
+DT = 1.0 / 60
+MAX_TICKS = 100000
+
+class Gauge(Component):
+    def __init__(self, progress: float, status: str):
+        self.progress = progress
+        self.status = status
+        self.name = f"unit{progress:g}"
+
+def make_world(count: int = 5):
+    world = World(seed=0)
+    eids = []
+    for i in range(count):
+        eid = world.create_entity()
+        world.add_component(eid, Gauge(float(i), 'idle' if i % 2 else 'charging'))
+        eids.append(eid)
+    store = world.use_column_storage('gauge', {'progress': 'float64', 'status': ('idle', 'charging')})
+    return world, store, eids
+
+def test_views_read_and_write_columns():
+    world, store, eids = make_world()
+    gauge = world.entities[eids[1]]['gauge']
+    assert (gauge.progress, gauge.status, gauge.name) == (1.0, 'idle', 'unit1')
+
+    gauge.progress = 50.0
+    gauge.status = 'charging'
+    slot = store.slots[eids[1]]
+    assert store.column('progress')[slot] == 50.0
+    assert store.column('status')[slot] == store.code('status', 'charging')
+    with pytest.raises(ValueError):
+        gauge.status = 'unknown'
+
+def test_removal_keeps_slots_dense_and_writes_back():
+    world, store, eids = make_world()
+    world.entities[eids[0]]['gauge'].progress = 9.0
+    component = store.remove(eids[0])
+    assert component.progress == 9.0 and store.size == 4
+
+    # 末尾のスロットが空いた位置へ移っても、各ビューは同じ機体の値を読む
+    for i, eid in enumerate(eids[1:], start=1):
+        assert world.entities[eid]['gauge'].progress == float(i)
+        assert store.entity_ids[store.slots[eid]] == eid
+
+def test_storage_grows_past_capacity():
+    world, store, eids = make_world(100)
+    assert [world.entities[eid]['gauge'].progress for eid in eids] == [float(i) for i in range(100)]
+
+def battle_trace(seed: int, column_storage: bool):
+    battle = BattleSystem(presentation=auto_presentation(), seed=seed, column_storage=column_storage)
+    world = battle.world
+    flow = world.get_singleton('battleflow')
+    context = world.get_singleton('battlecontext')
+    log = []
+    for _ in range(MAX_TICKS):
+        if flow.current_phase == BattlePhase.GAME_OVER:
+            break
+        battle.update(DT)
+        for line in context.battle_log:
+            if not log or log[-1] != line:
+                log.append(line)
+    hp = [comps['health'].hp for _, comps in world.get_entities_with_components('health')]
+    gauges = [(comps['gauge'].status, comps['gauge'].progress, comps['gauge'].stop_timer)
+              for _, comps in world.get_entities_with_components('gauge')]
+    return flow.winner, log, hp, gauges
+
+@pytest.mark.parametrize("seed", range(4))
+def test_column_storage_matches_object_storage(seed):
+    assert battle_trace(seed, True) == battle_trace(seed, False)
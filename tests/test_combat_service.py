@@ -0,0 +1,57 @@
+"""CombatService の1件ずつの判定と一括判定のテスト"""
+
+import random
+
+import pytest
+
+from battle.constants import PartType
+from battle.matchup_table import Matchup, AttackRecord
+from battle.service.combat_service import CombatService
+
+pytest.importorskip("numpy")
+
+ALIVE = {PartType.HEAD: 30, PartType.RIGHT_ARM: 40, PartType.LEFT_ARM: 40, PartType.LEGS: 20}
+
+def make_record(hit_prob=0.7, break_prob=0.6, desired_part=PartType.HEAD, alive=None):
+    matchup = Matchup(hit_prob, break_prob, False, 25, 10, 0.5)
+    return AttackRecord(matchup, desired_part, dict(ALIVE if alive is None else alive))
+
+def test_resolve_attacks_is_reproducible_and_independent_of_other_records():
+    records = [make_record(desired_part=part) for part in (PartType.HEAD, PartType.LEGS, None)] * 50
+    first = CombatService.resolve_attacks(records, random.Random(1))
+    again = CombatService.resolve_attacks(records, random.Random(1))
+    assert first['hit_part'] == again['hit_part']
+    assert (first['damage'] == again['damage']).all()
+
+    # 1件あたりの乱数の数は固定のため、後ろに記録を足しても前の結果は変わらない
+    longer = CombatService.resolve_attacks(records + [make_record()] * 10, random.Random(1))
+    assert longer['hit_part'][:len(records)] == first['hit_part']
+    assert (longer['is_defense'][:len(records)] == first['is_defense']).all()
+
+def test_resolve_attacks_follows_scalar_rules():
+    records = [make_record(desired_part=PartType.RIGHT_ARM, alive={PartType.HEAD: 5, PartType.LEGS: 9})] * 200
+    result = CombatService.resolve_attacks(records, random.Random(2))
+    for i in range(len(records)):
+        if not result['is_hit'][i]:
+            assert result['hit_part'][i] is None and result['damage'][i] == 0 and result['stop_duration'][i] == 0.0
+        elif result['is_defense'][i]:
+            assert result['hit_part'][i] == PartType.LEGS and result['damage'][i] == 10
+        else:
+            assert result['hit_part'][i] in (PartType.HEAD, PartType.LEGS) and result['damage'][i] == 25
+
+def test_resolve_attacks_matches_scalar_distribution():
+    records = [make_record()] * 20000
+    batch = CombatService.resolve_attacks(records, random.Random(3))
+    rng = random.Random(3)
+    scalar = [CombatService.resolve_attack(record, rng) for record in records]
+
+    batch_hit = batch['is_hit'].mean()
+    scalar_hit = sum(r['is_hit'] for r in scalar) / len(scalar)
+    batch_guard = batch['is_defense'].sum() / batch['is_hit'].sum()
+    scalar_guard = sum(r['is_defense'] for r in scalar) / sum(r['is_hit'] for r in scalar)
+    assert batch_hit == pytest.approx(0.7, abs=0.02) and scalar_hit == pytest.approx(0.7, abs=0.02)
+    assert batch_guard == pytest.approx(0.4, abs=0.02) and scalar_guard == pytest.approx(0.4, abs=0.02)
+
+def test_guard_part_prefers_first_non_head_with_most_hp():
+    assert CombatService.guard_part(ALIVE) == PartType.RIGHT_ARM
+    assert CombatService.guard_part({PartType.HEAD: 10}) == PartType.HEAD
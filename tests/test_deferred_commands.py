@@ -0,0 +1,73 @@
+"""World の構造変更の遅延（begin_deferred / flush / end_deferred）のテスト"""
+
+from core.ecs import Component, World
+
+class Stats(Component):
+    def __init__(self, hp: int = 10):
+        self.hp = hp
+
+class Marker(Component):
+    pass
+
+def matched(world, *names):
+    return [eid for eid, _ in world.query(*names)]
+
+def test_changes_are_applied_at_flush_in_recorded_order():
+    world = World(seed=0)
+    first = world.create_entity()
+    world.add_component(first, Stats())
+    assert matched(world, 'stats') == [first]
+
+    world.begin_deferred()
+    second = world.create_entity()
+    world.add_component(second, Stats(5))
+    world.add_component(first, Marker())
+    world.remove_component(first, 'stats')
+
+    # 同期点までは何も変わらない（予約されたIDにはコンポーネントを追加できる）
+    assert second not in world.entities and world.is_alive(second)
+    assert matched(world, 'stats') == [first]
+    assert 'marker' not in world.entities[first]
+
+    world.flush()
+    assert matched(world, 'stats') == [second]
+    assert matched(world, 'marker') == [first]
+    assert world.entities[second]['stats'].hp == 5
+
+def test_query_iteration_is_safe_while_deferred():
+    world = World(seed=0)
+    eids = [world.create_entity() for _ in range(3)]
+    for eid in eids:
+        world.add_component(eid, Stats())
+
+    world.begin_deferred()
+    for eid, _ in world.query('stats'):
+        world.delete_entity(eid)
+        world.add_component(world.create_entity(), Stats())
+    assert matched(world, 'stats') == eids
+
+    world.flush()
+    assert len(matched(world, 'stats')) == 3
+    assert not any(world.is_alive(eid) for eid in eids)
+
+def test_delete_then_add_in_same_flush_keeps_order():
+    world = World(seed=0)
+    eid = world.create_entity()
+    world.add_component(eid, Stats())
+
+    world.begin_deferred()
+    world.remove_component(eid, 'stats')
+    world.add_component(eid, Stats(1))
+    world.flush()
+    assert world.entities[eid]['stats'].hp == 1
+
+def test_end_deferred_flushes_and_returns_to_immediate_mode():
+    world = World(seed=0)
+    world.begin_deferred()
+    eid = world.create_entity()
+    world.end_deferred()
+    assert eid in world.entities
+
+    other = world.create_entity()
+    assert other in world.entities
+    world.flush()   # 即時適用モードでは何もしない
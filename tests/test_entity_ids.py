@@ -0,0 +1,57 @@
+"""世代付きエンティティIDの再利用のテスト"""
+
+import pytest
+
+from core.ecs import Component, ENTITY_INDEX_BITS, ENTITY_INDEX_MASK, World
+from battle.utils import is_target_valid
+
+class Stats(Component):
+    pass
+
+def test_deleted_index_is_reused_with_new_generation():
+    world = World(seed=0)
+    old = world.create_entity()
+    world.add_component(old, Stats())
+    world.delete_entity(old)
+
+    new = world.create_entity()
+    assert new & ENTITY_INDEX_MASK == old & ENTITY_INDEX_MASK
+    assert new >> ENTITY_INDEX_BITS == (old >> ENTITY_INDEX_BITS) + 1
+    assert new != old
+
+def test_stale_id_is_not_alive():
+    world = World(seed=0)
+    old = world.create_entity()
+    world.add_component(old, Stats())
+    world.delete_entity(old)
+    new = world.create_entity()
+    world.add_component(new, Stats())
+
+    assert world.is_alive(new) and not world.is_alive(old)
+    assert world.try_get_entity(old) is None
+    assert world.get_component(old, 'stats') is None
+    assert not is_target_valid(world, old)
+    assert not world.is_alive(None)
+    with pytest.raises(ValueError):
+        world.add_component(old, Stats())
+
+def test_stale_id_does_not_match_queries():
+    world = World(seed=0)
+    old = world.create_entity()
+    world.add_component(old, Stats())
+    list(world.query('stats'))
+    world.delete_entity(old)
+    new = world.create_entity()
+    world.add_component(new, Stats())
+    assert [eid for eid, _ in world.query('stats')] == [new]
+
+def test_ids_are_dense_until_reuse():
+    world = World(seed=0)
+    eids = [world.create_entity() for _ in range(5)]
+    assert eids == list(range(5))
+    world.delete_entity(eids[2])
+    world.delete_entity(eids[4])
+    # 最後に解放されたインデックスから再利用する
+    assert world.create_entity() & ENTITY_INDEX_MASK == 4
+    assert world.create_entity() & ENTITY_INDEX_MASK == 2
+    assert world.create_entity() == 5
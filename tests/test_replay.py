@@ -0,0 +1,60 @@
+"""リプレイの記録・保存・再生のテスト"""
+
+import pytest
+
+from battle.manager import BattleSystem
+from battle.presentation import auto_presentation
+from battle.constants import BattlePhase
+from battle.replay import Replay, load_replays, save_replays
+
+MAX_TICKS = 100000
+
+def final_state(battle):
+    """勝者と全パーツのHP"""
+    hp = [comps['health'].hp for _, comps in battle.world.get_entities_with_components('health')]
+    return battle.world.get_singleton('battleflow').winner, hp
+
+def record_battle(seed: int, time_skip: bool, dts=(1.0 / 60,)):
+    """dts を順に繰り返しながら自動バトルを最後まで記録する"""
+    battle = BattleSystem(presentation=auto_presentation(), seed=seed, time_skip=time_skip, record_replay=True)
+    flow = battle.world.get_singleton('battleflow')
+    for tick in range(MAX_TICKS):
+        if flow.current_phase == BattlePhase.GAME_OVER:
+            break
+        battle.update(dts[tick % len(dts)])
+    return battle.export_replay(), final_state(battle)
+
+def play_replay(replay: Replay):
+    battle = BattleSystem(replay=replay)
+    for _ in range(replay.ticks):
+        # dt は記録されたものに置き換えられる
+        battle.update(123.0, render=False)
+    return final_state(battle)
+
+@pytest.mark.parametrize("time_skip", [False, True])
+@pytest.mark.parametrize("seed", range(3))
+def test_replay_reproduces_battle(seed, time_skip):
+    replay, expected = record_battle(seed, time_skip)
+    assert replay.winner == expected[0]
+    assert play_replay(Replay.loads(replay.dumps())) == expected
+
+def test_replay_reproduces_changing_dt():
+    replay, expected = record_battle(4, False, dts=(1.0 / 60, 1.0 / 30, 1.0 / 60, 0.05))
+    assert len(replay.dt_changes) > 1
+    assert play_replay(replay) == expected
+
+def test_save_and_load_replays(tmp_path):
+    replays = [record_battle(seed, True)[0] for seed in range(2)]
+    path = str(tmp_path / "replays.jsonl.gz")
+    save_replays(replays, path)
+    assert [replay.to_dict() for replay in load_replays(path)] == [replay.to_dict() for replay in replays]
+
+def test_invalid_replays_are_rejected():
+    data = record_battle(0, True)[0].to_dict()
+    data['version'] = 0
+    with pytest.raises(ValueError):
+        Replay.from_dict(data)
+
+    battle = BattleSystem(presentation=auto_presentation(), seed=0)
+    with pytest.raises(ValueError):
+        battle.export_replay()
@@ -0,0 +1,57 @@
+"""探索方針（SearchStrategy）の先読みと評価数の上限のテスト"""
+
+from itertools import islice
+
+from battle.manager import BattleSystem
+from battle.presentation import auto_presentation
+from battle.constants import BattlePhase
+from battle.ai.strategy import SearchStrategy
+from core.snapshot import take_snapshot
+
+MAX_TICKS = 100000
+
+def turn_states(seeds):
+    """自動バトルの各ターンの開始時点の (World, 行動する機体ID) を順に返す"""
+    for seed in seeds:
+        battle = BattleSystem(presentation=auto_presentation(), time_skip=True, seed=seed)
+        flow = battle.world.get_singleton('battleflow')
+        context = battle.world.get_singleton('battlecontext')
+        last_eid = None
+        for _ in range(MAX_TICKS):
+            if flow.current_phase == BattlePhase.GAME_OVER:
+                break
+            eid = context.current_turn_entity_id
+            if flow.current_phase in (BattlePhase.ENEMY_TURN, BattlePhase.INPUT) and eid is not None and eid != last_eid:
+                yield battle.world, eid
+            last_eid = eid
+            battle.update(1.0 / 60)
+
+def test_budget_bounds_and_binds():
+    budget = SearchStrategy.DEFAULT_EVALUATION_BUDGET
+    used = []
+    for world, eid in turn_states(range(5)):
+        bounded, unbounded = SearchStrategy(), SearchStrategy(None)
+        bounded.decide_action(world, eid)
+        unbounded.decide_action(world, eid)
+        assert bounded.evaluations <= budget
+        used.append(unbounded.evaluations)
+
+    # 既定の上限は一部の決定でしか使いきらない（1手目だけでは上限に届かない）
+    assert max(used) > budget
+    assert sorted(used)[len(used) // 2] < budget
+
+def test_small_budget_falls_back_to_first_ply():
+    for world, eid in turn_states([0]):
+        strategy = SearchStrategy(4)
+        action, part = strategy.decide_action(world, eid)
+        assert action in ("attack", "skip")
+        assert strategy.evaluations <= 4
+
+def test_lookahead_does_not_change_world():
+    for world, eid in islice(turn_states([1]), 10):
+        before = take_snapshot(world)
+        SearchStrategy(None).decide_action(world, eid)
+        after = take_snapshot(world)
+        assert after.entities == before.entities
+        assert after.rng_states == before.rng_states
+        assert after.generations == before.generations
@@ -0,0 +1,86 @@
+"""Worldのスナップショット・差分・タイムラインのテスト"""
+
+import copy
+
+import pytest
+
+from battle.manager import BattleSystem
+from battle.presentation import auto_presentation
+from battle.constants import BattlePhase
+from core.snapshot import SnapshotTimeline, apply_delta, diff_snapshots, restore_snapshot, take_snapshot
+
+DT = 1.0 / 60
+MAX_TICKS = 100000
+
+def snapshot_state(snapshot):
+    return (snapshot.entities, snapshot.generations, snapshot.free_indices,
+            snapshot.singletons, snapshot.queries, snapshot.rng_states)
+
+def record_replay(seed: int):
+    battle = BattleSystem(presentation=auto_presentation(), seed=seed, record_replay=True)
+    flow = battle.world.get_singleton('battleflow')
+    for _ in range(MAX_TICKS):
+        if flow.current_phase == BattlePhase.GAME_OVER:
+            break
+        battle.update(DT)
+    return battle.export_replay()
+
+def replay_snapshots(replay, ticks):
+    """リプレイを再生し、指定tick（update の呼び出し回数）ごとのスナップショットを返す"""
+    battle = BattleSystem(replay=replay)
+    snapshots = {0: take_snapshot(battle.world)} if 0 in ticks else {}
+    for tick in range(1, max(ticks) + 1):
+        battle.update(DT, render=False)
+        if tick in ticks:
+            snapshots[tick] = take_snapshot(battle.world)
+    return battle, snapshots
+
+def play_to_end(battle, replay):
+    while battle.world.get_singleton('replay').tick < replay.ticks:
+        battle.update(DT, render=False)
+    return take_snapshot(battle.world)
+
+@pytest.mark.parametrize("ticks", [(0, 1), (5, 200), (100, 101)])
+def test_apply_delta_reconstructs_target(ticks):
+    replay = record_replay(0)
+    _, snapshots = replay_snapshots(replay, ticks)
+    base, target = snapshots[ticks[0]], snapshots[ticks[1]]
+    base_before = copy.deepcopy(snapshot_state(base))
+
+    delta = diff_snapshots(base, target)
+    assert snapshot_state(apply_delta(base, delta)) == snapshot_state(target)
+    assert snapshot_state(base) == base_before
+
+def test_restore_snapshot_continues_like_straight_run():
+    replay = record_replay(1)
+    straight, _ = replay_snapshots(replay, [1])
+    expected = snapshot_state(play_to_end(straight, replay))
+
+    battle, snapshots = replay_snapshots(replay, [150, 300])
+    # 先へ進めた後に途中の状態へ戻し、そこから最後まで再生し直す
+    restore_snapshot(battle.world, snapshots[150])
+    assert snapshot_state(play_to_end(battle, replay)) == expected
+
+def test_timeline_returns_checkpoint_states():
+    replay = record_replay(0)
+    timeline = SnapshotTimeline(keyframe_interval=120, delta_interval=30)
+    battle = BattleSystem(replay=replay)
+    expected = {0: snapshot_state(take_snapshot(battle.world))}
+    timeline.record(0, battle.world)
+    for tick in range(1, min(replay.ticks, 400) + 1):
+        battle.update(DT, render=False)
+        timeline.record(tick, battle.world)
+        if timeline.is_checkpoint(tick):
+            expected[tick] = snapshot_state(take_snapshot(battle.world))
+
+    for tick in (0, 29, 30, 95, 120, 130, 359, 400):
+        found_tick, snapshot = timeline.nearest(tick)
+        assert found_tick == tick - tick % 30
+        assert snapshot_state(snapshot) == expected[found_tick]
+
+    assert timeline.restore(battle.world, 200) == 180
+    assert snapshot_state(take_snapshot(battle.world)) == expected[180]
+
+def test_timeline_rejects_unaligned_intervals():
+    with pytest.raises(ValueError):
+        SnapshotTimeline(600, 70)
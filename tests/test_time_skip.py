@@ -0,0 +1,92 @@
+"""time_skip（次のゲージ到達までの一括スキップ）が固定ステップと同じ結果になることのテスト"""
+
+import random
+
+import pytest
+
+from battle.manager import BattleSystem
+from battle.presentation import auto_presentation
+from battle.constants import BattlePhase
+from battle.utils import accumulate, count_down_stop_timer, ticks_to_full
+
+DT = 1.0 / 60
+MAX_TICKS = 100000
+
+# 丸めの境界に乗りやすい値（実際のチャージ時間・停止時間で起きる dt の整数倍など）を混ぜる
+DURATIONS = [1.0, 1.6, 2.0, 2.4471580313422194, 2.079181246047625]
+STOPS = [0.0, 0.5, 1.0, 2.0, 3.0]
+
+def random_cases(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        progress = rng.choice([0.0, 88.54166666666666, rng.random() * 100.0, rng.random() * 1e-3])
+        step = DT / rng.choice(DURATIONS + [rng.uniform(0.5, 3.5)]) * 100.0
+        stop = rng.choice(STOPS + [rng.random() * 3.0])
+        yield progress, step, stop, rng.randrange(0, 400)
+
+def add_each_tick(value: float, delta: float, ticks: int) -> float:
+    for _ in range(ticks):
+        value += delta
+    return value
+
+def test_accumulate_matches_adding_each_tick():
+    for progress, step, _, ticks in random_cases(3000):
+        assert accumulate(progress, step, ticks) == (add_each_tick(progress, step, ticks), ticks)
+
+def test_ticks_to_full_matches_adding_each_tick():
+    for progress, step, _, _ in random_cases(3000, seed=1):
+        ticks = 1
+        while add_each_tick(progress, step, ticks) < 100.0:
+            ticks += 1
+        assert ticks_to_full(progress, step) == ticks
+    # 割り算や progress + n * step では12tickだが、逐次の加算は丸め誤差が積み上がり11tick目に100へ達する
+    assert ticks_to_full(88.54166666666666, DT / 1.6 * 100.0) == 11
+
+def test_count_down_stop_timer_matches_each_tick():
+    for _, _, stop, limit in random_cases(3000, seed=2):
+        value, ticks = stop, 0
+        while value > 0 and ticks < limit:
+            value = max(0.0, value - DT)
+            ticks += 1
+        assert count_down_stop_timer(stop, DT, limit) == (value, ticks)
+    # 0.5秒の停止は割り算では30tickだが、逐次の引き算の丸め誤差で31tick続く
+    assert count_down_stop_timer(0.5, DT) == (0.0, 31)
+
+def test_accumulate_columns_matches_scalar():
+    np = pytest.importorskip("numpy")
+    from battle.gauge_columns import accumulate_columns
+
+    cases = list(random_cases(500, seed=3))
+    values = np.array([progress for progress, _, _, _ in cases])
+    deltas = np.array([step for _, step, _, _ in cases])
+    ticks = np.array([ticks for _, _, _, ticks in cases])
+    expected = [accumulate(progress, step, count)[0] for progress, step, _, count in cases]
+    assert accumulate_columns(values, deltas, ticks).tolist() == expected
+
+def battle_trace(seed: int, time_skip: bool, column_storage: bool = False):
+    """戦闘ログ・勝者・最終的なパーツHPとゲージ"""
+    battle = BattleSystem(presentation=auto_presentation(), seed=seed, time_skip=time_skip, column_storage=column_storage)
+    world = battle.world
+    flow = world.get_singleton('battleflow')
+    context = world.get_singleton('battlecontext')
+    log = []
+    for _ in range(MAX_TICKS):
+        if flow.current_phase == BattlePhase.GAME_OVER:
+            break
+        battle.update(DT)
+        for line in context.battle_log:
+            if not log or log[-1] != line:
+                log.append(line)
+    hp = [comps['health'].hp for _, comps in world.get_entities_with_components('health')]
+    gauges = [(comps['gauge'].status, comps['gauge'].progress, comps['gauge'].stop_timer)
+              for _, comps in world.get_entities_with_components('gauge')]
+    return flow.winner, log, hp, gauges
+
+@pytest.mark.parametrize("seed", range(6))
+def test_time_skip_matches_fixed_step(seed):
+    assert battle_trace(seed, True) == battle_trace(seed, False)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_time_skip_with_column_storage_matches_fixed_step(seed):
+    pytest.importorskip("numpy")
+    assert battle_trace(seed, True, column_storage=True) == battle_trace(seed, False)
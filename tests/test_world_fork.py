@@ -0,0 +1,117 @@
+"""World.fork（コピーオンライトのフォーク）の分離のテスト"""
+
+import pytest
+
+from core.ecs import Component, World
+
+class Stats(Component):
+    def __init__(self, hp: int, tags=None, parts=None):
+        self.hp = hp
+        self.tags = tags if tags is not None else []
+        self.parts = parts if parts is not None else {}
+
+class Marker(Component):
+    pass
+
+class Roster(Component):
+    def __init__(self):
+        self.members = {'a': [], 'b': []}
+
+def make_world():
+    world = World(seed=1)
+    world.register_singleton('roster')
+    roster = Roster()
+    holder = world.create_entity()
+    world.add_component(holder, roster)
+
+    eids = []
+    for i in range(4):
+        eid = world.create_entity()
+        world.add_component(eid, Stats(10 * (i + 1), ['x'], {'head': 10, 'arm': [1, 2]}))
+        if i % 2 == 0:
+            world.add_component(eid, Marker())
+        roster.members['a' if i < 2 else 'b'].append(eid)
+        eids.append(eid)
+    return world, eids
+
+def state(world):
+    """比較用にWorldの状態を素の値へ書き出す"""
+    entities = {}
+    for eid, components in world.entities.items():
+        entities[eid] = {name: {key: getattr(comp, key) for key in ('hp', 'tags', 'parts', 'members') if hasattr(comp, key)}
+                         for name, comp in components.items()}
+    queries = {names: [eid for eid, _ in world.query(*names)] for names in (('stats',), ('stats', 'marker'))}
+    return repr((entities, queries, list(world.generations), world.rng('test').getstate()))
+
+def mutate(world, eids):
+    """フォーク側で属性・コンテナの中身・構造・シングルトン・乱数をすべて変更する"""
+    stats = world.entities[eids[0]]['stats']
+    stats.hp -= 5
+    stats.tags.append('y')
+    stats.parts['head'] = 0
+    stats.parts['arm'].append(3)
+    world.get_singleton('roster').members['a'].remove(eids[0])
+    world.add_component(eids[1], Marker())
+    world.remove_component(eids[2], 'marker')
+    world.delete_entity(eids[3])
+    new = world.create_entity()
+    world.add_component(new, Stats(1))
+    world.rng('test').random()
+
+def test_fork_writes_do_not_leak_to_parent():
+    world, eids = make_world()
+    list(world.query('stats', 'marker'))
+    before = state(world)
+
+    forked = world.fork()
+    mutate(forked, eids)
+    assert forked.entities[eids[0]]['stats'].hp == 5
+    assert forked.entities[eids[0]]['stats'].parts['arm'] == [1, 2, 3]
+    assert [eid for eid, _ in forked.query('stats', 'marker')] == [eids[0], eids[1]]
+    assert not forked.is_alive(eids[3])
+
+    assert state(world) == before
+    assert world.is_alive(eids[3])
+
+def test_nested_fork_writes_do_not_leak_to_outer_fork():
+    world, eids = make_world()
+    before = state(world)
+    outer = world.fork()
+    outer.entities[eids[0]]['stats'].hp = 7
+    outer.entities[eids[0]]['stats'].tags.append('outer')
+    outer_before = state(outer)
+
+    inner = outer.fork()
+    assert inner.entities[eids[0]]['stats'].hp == 7
+    mutate(inner, eids)
+    assert inner.entities[eids[0]]['stats'].tags == ['x', 'outer', 'y']
+
+    assert state(outer) == outer_before
+    assert state(world) == before
+
+def test_fork_continues_rng_from_fork_point():
+    world, _ = make_world()
+    world.rng('test').random()
+    forked = world.fork()
+    assert forked.rng('test').random() == world.rng('test').random()
+
+def test_fork_reads_column_storage_without_writing_it():
+    pytest.importorskip("numpy")
+    world, eids = make_world()
+    world.use_column_storage('stats', {'hp': 'int32'})
+    forked = world.fork()
+
+    stats = forked.entities[eids[1]]['stats']
+    assert stats.hp == 20
+    stats.hp = 3
+    stats.tags.append('fork')
+    assert forked.entities[eids[1]]['stats'].hp == 3
+    assert world.entities[eids[1]]['stats'].hp == 20
+    assert world.entities[eids[1]]['stats'].tags == ['x']
+
+def test_fork_rejects_pending_changes():
+    world, _ = make_world()
+    world.begin_deferred()
+    world.create_entity()
+    with pytest.raises(ValueError):
+        world.fork()